@@ -0,0 +1,485 @@
+import itertools
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, TypedDict, TypeVar
+
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    Select,
+    String,
+    Table,
+    bindparam,
+    event,
+    exc,
+    func,
+    insert,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection, Engine, create_engine
+from sqlalchemy.orm import DeclarativeBase, Session, relationship, selectinload
+
+T = TypeVar("T")
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+# Clustered on (tag_id, run_id) so a tag's runs are one range scan, with the
+# reverse index for tag checks of a given run and cascading deletes
+runs_tags_table = Table(
+    "runs_tags",
+    Base.metadata,
+    Column("tag_id", ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Column("run_id", ForeignKey("runs.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_runs_tags_run_id_tag_id", "run_id", "tag_id"),
+    sqlite_with_rowid=False,
+)
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True)
+    tag = Column(String, nullable=False, unique=True)
+
+    # Only orders the tags of a query, see Catalog.refresh_tag_counts
+    run_count = Column(Integer, nullable=False, default=0)
+
+    runs = relationship(
+        "Run",
+        secondary=runs_tags_table,
+        back_populates="tags",
+        passive_deletes=True,
+    )
+
+
+class Run(Base):
+    __tablename__ = "runs"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+    data = Column(String, nullable=False)
+
+    # Many to Many
+    tags = relationship(
+        "Tag",
+        secondary=runs_tags_table,
+        back_populates="runs",
+        passive_deletes=True,
+    )
+    plots = relationship(
+        "Plot",
+        back_populates="run",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class Plot(Base):
+    __tablename__ = "plots"
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(
+        ForeignKey("runs.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    output = Column(String, nullable=False)
+    template = Column(String, nullable=False)
+    plot_type = Column(String, nullable=False)
+
+    run = relationship("Run", back_populates="plots")
+
+
+class RunRecord(TypedDict):
+    """Simulation run added to the catalog"""
+
+    name: str
+    data: str
+    tags: list[str]
+
+
+class PlotRecord(TypedDict):
+    """Rendered plot of a cataloged run"""
+
+    run: str
+    output: str
+    template: str
+    plot_type: str
+
+
+def batches(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def create_catalog_engine(
+    path: str | Path,
+    timeout: float = 30.0,
+    pool_size: int = 5,
+    echo: bool = False,
+) -> Engine:
+    """Engine for a catalog file, safe to share between threads and processes
+
+    Connections use WAL, so readers never wait on a writer, and write
+    transactions take the database lock when they begin instead of failing
+    with "database is locked" when a read lock cannot be upgraded. Pooled
+    connections inherited through ``fork`` are discarded, never reused
+
+    Parameters
+    ----------
+    path : str | Path
+        SQLite database file
+    timeout : float, optional
+        Seconds a writer waits for another writer, by default 30.0
+    pool_size : int, optional
+        Connections kept open per process, by default 5
+    echo : bool, optional
+        Log every statement, by default False
+
+    Returns
+    -------
+    Engine
+        Catalog engine
+    """
+    engine = create_engine(
+        f"sqlite:///{path}",
+        echo=echo,
+        pool_size=pool_size,
+        connect_args={"timeout": timeout, "check_same_thread": False},
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        # Transactions are started by the "begin" listener
+        dbapi_connection.isolation_level = None
+        connection_record.info["pid"] = os.getpid()
+
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "checkout")
+    def check_pid(dbapi_connection, connection_record, connection_proxy):
+        # SQLite connections must not cross a fork
+        if connection_record.info["pid"] != os.getpid():
+            connection_record.dbapi_connection = None
+            connection_proxy.dbapi_connection = None
+            raise exc.DisconnectionError("Connection belongs to another process")
+
+    @event.listens_for(engine, "begin")
+    def begin(connection):
+        mode = connection.get_execution_options().get("sqlite_begin", "DEFERRED")
+        connection.exec_driver_sql(f"BEGIN {mode}")
+
+    return engine
+
+
+class Catalog:
+    """
+    Index of simulation runs, their tags and rendered plots
+
+    Uses the tagging model of the association table prototype, with bulk
+    ingestion through Core ``executemany`` and eager loading for queries
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        batch_size: int = 10_000,
+        timeout: float = 30.0,
+        pool_size: int = 5,
+        echo: bool = False,
+    ) -> None:
+        """Opens the catalog, creating its tables if needed
+
+        Parameters
+        ----------
+        path : str | Path
+            SQLite database file
+        batch_size : int, optional
+            Rows written per transaction during ingestion, by default 10_000
+        timeout : float, optional
+            Seconds a writer waits for another writer, by default 30.0
+        pool_size : int, optional
+            Connections kept open per process, by default 5
+        echo : bool, optional
+            Log every statement, by default False
+        """
+        self.engine = create_catalog_engine(path, timeout, pool_size, echo)
+        self.batch_size = batch_size
+
+        Base.metadata.create_all(self.engine)
+
+    def session(self) -> Session:
+        return Session(self.engine)
+
+    def add_runs(self, runs: Iterable[RunRecord]) -> int:
+        """Adds runs and their tags, one transaction per batch
+
+        Parameters
+        ----------
+        runs : Iterable[RunRecord]
+            New runs, names must not be cataloged yet
+
+        Returns
+        -------
+        int
+            Number of runs added
+        """
+        tag_ids: dict[str, int] = {}
+        added = 0
+        for batch in batches(runs, self.batch_size):
+            with self.__write() as connection:
+                self.__add_tags(
+                    connection, {tag for run in batch for tag in run["tags"]}, tag_ids
+                )
+
+                # Ids are assigned here rather than returned per row, which
+                # is safe since the transaction holds the write lock
+                first = connection.scalar(select(func.max(Run.id))) or 0
+                run_ids = range(first + 1, first + 1 + len(batch))
+                connection.execute(
+                    insert(Run),
+                    [
+                        {"id": run_id, "name": run["name"], "data": run["data"]}
+                        for run_id, run in zip(run_ids, batch)
+                    ],
+                )
+
+                links = [
+                    {"tag_id": tag_ids[tag], "run_id": run_id}
+                    for run_id, run in zip(run_ids, batch)
+                    for tag in dict.fromkeys(run["tags"])
+                ]
+                if links:
+                    connection.execute(insert(runs_tags_table), links)
+                    self.__count_tags(
+                        connection, Counter(link["tag_id"] for link in links)
+                    )
+
+            added += len(batch)
+
+        return added
+
+    def add_plots(self, plots: Iterable[PlotRecord]) -> int:
+        """Adds rendered plots of cataloged runs, one transaction per batch
+
+        Parameters
+        ----------
+        plots : Iterable[PlotRecord]
+            New plots
+
+        Returns
+        -------
+        int
+            Number of plots added
+        """
+        added = 0
+        for batch in batches(plots, self.batch_size):
+            with self.__write() as connection:
+                names = {plot["run"] for plot in batch}
+                run_ids = dict(
+                    connection.execute(
+                        select(Run.name, Run.id).where(Run.name.in_(names))
+                    ).all()
+                )
+                missing = names - run_ids.keys()
+                if missing:
+                    raise KeyError(f"Runs not in the catalog: {sorted(missing)}")
+
+                connection.execute(
+                    insert(Plot),
+                    [
+                        {
+                            "run_id": run_ids[plot["run"]],
+                            "output": plot["output"],
+                            "template": plot["template"],
+                            "plot_type": plot["plot_type"],
+                        }
+                        for plot in batch
+                    ],
+                )
+
+            added += len(batch)
+
+        return added
+
+    def tag_runs(self, names: Iterable[str], tag: str) -> None:
+        """Tags cataloged runs, ignoring runs already tagged"""
+        tag_ids: dict[str, int] = {}
+        for batch in batches(names, self.batch_size):
+            with self.__write() as connection:
+                self.__add_tags(connection, {tag}, tag_ids)
+                connection.execute(
+                    sqlite_insert(runs_tags_table)
+                    .from_select(
+                        ["tag_id", "run_id"],
+                        select(literal(tag_ids[tag]), Run.id).where(
+                            Run.name.in_(batch)
+                        ),
+                    )
+                    .on_conflict_do_nothing()
+                )
+
+        self.refresh_tag_counts([tag])
+
+    def refresh_tag_counts(self, tags: Optional[Sequence[str]] = None) -> None:
+        """Recounts tagged runs, e.g. after deleting runs or tags
+
+        Counts only choose the order tags are checked in, so stale counts slow
+        queries down without changing their results
+        """
+        statement = update(Tag).values(
+            run_count=select(func.count())
+            .select_from(runs_tags_table)
+            .where(runs_tags_table.c.tag_id == Tag.id)
+            .scalar_subquery()
+        )
+        if tags is not None:
+            statement = statement.where(Tag.tag.in_(tags))
+
+        with self.__write() as connection:
+            connection.execute(statement)
+
+    def runs(
+        self, session: Session, tags: Iterable[str], limit: Optional[int] = None
+    ) -> list[Run]:
+        """Runs tagged with every tag, with their plots loaded
+
+        Parameters
+        ----------
+        session : Session
+            Catalog session
+        tags : Iterable[str]
+            Required tags
+        limit : Optional[int], optional
+            Maximum number of runs, by default None
+
+        Returns
+        -------
+        list[Run]
+            Runs by id
+        """
+        statement = self.__where_tagged(
+            session,
+            select(Run).options(selectinload(Run.plots)),
+            Run.id,
+            tags,
+        )
+        if statement is None:
+            return []
+
+        return list(session.scalars(statement.limit(limit)))
+
+    def plots(
+        self, session: Session, tags: Iterable[str], limit: Optional[int] = None
+    ) -> list[Plot]:
+        """Plots of the runs tagged with every tag, with their run loaded
+
+        Parameters
+        ----------
+        session : Session
+            Catalog session
+        tags : Iterable[str]
+            Required run tags
+        limit : Optional[int], optional
+            Maximum number of plots, by default None
+
+        Returns
+        -------
+        list[Plot]
+            Plots by run
+        """
+        statement = self.__where_tagged(
+            session, select(Plot).options(selectinload(Plot.run)), Plot.run_id, tags
+        )
+        if statement is None:
+            return []
+
+        return list(session.scalars(statement.order_by(Plot.id).limit(limit)))
+
+    def close(self) -> None:
+        with self.engine.connect() as connection:
+            # Refreshes the planner statistics of tables that changed
+            connection.exec_driver_sql("PRAGMA optimize")
+        self.engine.dispose()
+
+    def __enter__(self) -> "Catalog":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __write(self):
+        """Write transaction, holding the database lock from its start"""
+        return self.engine.execution_options(sqlite_begin="IMMEDIATE").begin()
+
+    @staticmethod
+    def __add_tags(
+        connection: Connection, tags: set[str], tag_ids: dict[str, int]
+    ) -> None:
+        """Creates missing tags and fills in the id of every tag"""
+        new = [{"tag": tag} for tag in tags if tag not in tag_ids]
+        if not new:
+            return
+
+        connection.execute(sqlite_insert(Tag).on_conflict_do_nothing(), new)
+        tag_ids.update(
+            connection.execute(
+                select(Tag.tag, Tag.id).where(Tag.tag.in_([row["tag"] for row in new]))
+            ).all()
+        )
+
+    @staticmethod
+    def __count_tags(connection: Connection, counts: Counter[int]) -> None:
+        connection.execute(
+            update(Tag.__table__)
+            .where(Tag.__table__.c.id == bindparam("key"))
+            .values(run_count=Tag.__table__.c.run_count + bindparam("added")),
+            [{"key": key, "added": added} for key, added in counts.items()],
+        )
+
+    @staticmethod
+    def __where_tagged(
+        session: Session, statement: Select, run_id: Column, tags: Iterable[str]
+    ) -> Optional[Select]:
+        """Restricts a statement to runs carrying every tag
+
+        The runs of the rarest tag are scanned in order and the other tags are
+        looked up per run, so the query costs the size of the rarest tag, not
+        of the catalog. Returns None when a tag does not exist
+        """
+        tags = set(tags)
+        if not tags:
+            return statement.order_by(run_id)
+
+        counts = session.execute(
+            select(Tag.id, Tag.run_count).where(Tag.tag.in_(tags))
+        ).all()
+        if len(counts) < len(tags):
+            return None
+
+        driver, *others = [tag_id for tag_id, _ in sorted(counts, key=lambda c: c[1])]
+        statement = statement.join(
+            runs_tags_table, runs_tags_table.c.run_id == run_id
+        ).where(runs_tags_table.c.tag_id == driver)
+        for tag_id in others:
+            link = runs_tags_table.alias()
+            statement = statement.where(
+                select(link.c.run_id)
+                .where(link.c.run_id == run_id, link.c.tag_id == tag_id)
+                .exists()
+            )
+
+        # Ordered by the scanned index, so a limit stops the scan early
+        return statement.order_by(runs_tags_table.c.run_id)
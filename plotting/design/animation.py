@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+from .axis_data import AxisDataCache
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .plot_base import PlotBase
+
+# Trace arrays holding one value per point
+POINT_ARRAYS = ("x", "y", "z", "text")
+
+# Space around the full trajectory so the view stays fixed during playback
+RANGE_PADDING = 0.02
+
+
+def animation_dict(
+    plot: PlotBase,
+    frames: int = 100,
+    points_per_frame: int = 500,
+    time_column: Optional[str] = None,
+    frame_duration: int = 50,
+) -> dict:
+    """Figure dict playing back every trace over time
+
+    Each trace is split into one segment per frame, stored once in the figure
+    and decimated to ``points_per_frame``. Each frame only shows its own
+    segments and moves a marker to the trace's latest point, so the figure
+    grows with the number of points and frames instead of frames times points
+    or frames squared, and slider jumps in either direction show the right
+    trail
+
+    Parameters
+    ----------
+    plot : PlotBase
+        Built plot, its trace styles and layout are reused
+    frames : int, optional
+        Number of frames at a fixed time step, by default 100
+    points_per_frame : int, optional
+        Most points added by each trace per frame, by default 500
+    time_column : Optional[str], optional
+        Output data column played back, by default the rate group time
+        column or ``time_s``
+    frame_duration : int, optional
+        Milliseconds per frame when playing, by default 50
+
+    Returns
+    -------
+    dict
+        Plotly figure with frames, slider and play/pause buttons
+    """
+    import numpy as np
+
+    if frames < 1 or points_per_frame < 2:
+        raise ValueError("Animations need a frame and two points per frame")
+
+    if time_column is None:
+        time_column = (
+            "time_s" if plot.rate_groups is None else plot.rate_groups.time_column
+        )
+
+    times = [
+        _point_times(plot, index, time_column) for index in range(len(plot.traces))
+    ]
+    finite = [time[np.isfinite(time)] for time in times if np.isfinite(time).any()]
+    if not finite:
+        raise ValueError(f"No '{time_column}' values to animate")
+    frame_times = np.linspace(
+        min(time.min() for time in finite), max(time.max() for time in finite), frames
+    )
+
+    layout = plot.figure.layout.to_plotly_json()
+    source_traces = [trace.to_plotly_json() for trace in plot.figure.data]
+    data: list[dict] = []
+    segment_traces: list[tuple[int, int]] = []
+    markers: list[tuple[int, dict, np.ndarray]] = []
+    for index, time in enumerate(times):
+        trace = source_traces[index]
+        ends = np.searchsorted(time, frame_times, side="right")
+
+        # Legend clicks toggle the trail and marker together
+        legendgroup = trace.get("legendgroup") or f"trace-{index}"
+        for segment, properties in enumerate(
+            _segments(trace, ends, points_per_frame, len(time), legendgroup)
+        ):
+            segment_traces.append((len(data), segment))
+            data.append(properties)
+
+        markers.append((len(data), trace, np.maximum(ends - 1, 0)))
+        data.append(_marker(trace, max(ends[0] - 1, 0), legendgroup))
+
+    _fix_ranges(layout, source_traces)
+
+    # The first frame sets every segment, later frames only show their own
+    # segments on top of the previous frame (``baseframe``). plotly.js merges
+    # the chain into the full state, so jumps in either direction are right
+    # Names chain the frames, so they are unique
+    digits = 6
+    names = [f"{time:.{digits}g}" for time in frame_times]
+    while len(set(names)) < len(names) and digits < 17:
+        digits += 1
+        names = [f"{time:.{digits}g}" for time in frame_times]
+    animation_frames = []
+    for frame, name in enumerate(names):
+        shown = [
+            (position, {"visible": segment <= frame})
+            for position, segment in segment_traces
+            if frame == 0 or segment == frame
+        ]
+        moved = [
+            (
+                position,
+                {
+                    "type": trace.get("type", "scatter"),
+                    **_marker_position(trace, last[frame]),
+                },
+            )
+            for position, trace, last in markers
+        ]
+        animation_frame = {
+            "name": name,
+            "data": [properties for _, properties in shown + moved],
+            "traces": [position for position, _ in shown + moved],
+        }
+        if frame > 0:
+            animation_frame["baseframe"] = names[frame - 1]
+        animation_frames.append(animation_frame)
+
+    frame_args = {
+        "frame": {"duration": frame_duration, "redraw": True},
+        "transition": {"duration": 0},
+        "mode": "immediate",
+    }
+    layout["sliders"] = [
+        {
+            "active": 0,
+            "currentvalue": {"prefix": f"{time_column}: "},
+            "pad": {"t": 40},
+            "steps": [
+                {"method": "animate", "label": name, "args": [[name], frame_args]}
+                for name in names
+            ],
+        }
+    ]
+    layout["updatemenus"] = [
+        {
+            "type": "buttons",
+            "showactive": False,
+            "direction": "left",
+            "x": 0,
+            "y": 0,
+            "xanchor": "right",
+            "yanchor": "top",
+            "pad": {"t": 45, "r": 10},
+            "buttons": [
+                {
+                    "label": "Play",
+                    "method": "animate",
+                    "args": [None, {**frame_args, "fromcurrent": True}],
+                },
+                {
+                    "label": "Pause",
+                    "method": "animate",
+                    "args": [
+                        [None],
+                        {**frame_args, "frame": {"duration": 0, "redraw": False}},
+                    ],
+                },
+            ],
+        }
+    ]
+
+    return {"data": data, "layout": layout, "frames": animation_frames}
+
+
+def _point_times(plot: PlotBase, index: int, time_column: str) -> np.ndarray:
+    """Time of each displayed point of a trace"""
+    import numpy as np
+
+    trace = plot.traces[index]
+    key = AxisDataCache.key(time_column, None, trace.rate_group)
+    if key in plot.axis_data:
+        time = plot.axis_data[key]
+    elif plot.lean:
+        raise ValueError(f"Lean builds release the output data, '{key}' is gone")
+    else:
+        time = plot.axis_data.get(time_column, None, trace.rate_group)
+
+    time = time.to_numpy(dtype=np.float64)
+    index_map = plot.index_maps[index]
+    return time if index_map is None else time[index_map.rows]
+
+
+def _segments(
+    trace: dict, ends: np.ndarray, budget: int, length: int, legendgroup: str
+) -> list[dict]:
+    """One hidden trace per frame with the points added in that frame
+
+    Segments start at the previous segment's last point so lines stay
+    connected
+    """
+    import numpy as np
+
+    style = {
+        name: value
+        for name, value in trace.items()
+        if name not in POINT_ARRAYS and name != "uid"
+    }
+    colors = _point_colors(trace, length)
+    if colors is not None:
+        style["marker"] = {
+            name: value for name, value in trace["marker"].items() if name != "color"
+        }
+
+    starts = np.concatenate(([0], np.maximum(ends[:-1] - 1, 0)))
+    segments = []
+    for segment, (start, end) in enumerate(zip(starts, ends)):
+        rows = np.unique(np.linspace(start, end - 1, budget).round().astype(np.intp))
+        if end <= start:
+            rows = rows[:0]
+
+        # The first frame shows the first segment
+        properties = {
+            **style,
+            "visible": segment == 0,
+            "showlegend": bool(style.get("showlegend", True)) and segment == 0,
+            "legendgroup": legendgroup,
+        }
+        for name in POINT_ARRAYS:
+            if trace.get(name) is not None:
+                properties[name] = _take(trace[name], rows)
+        if colors is not None:
+            properties["marker"] = {**style["marker"], "color": _take(colors, rows)}
+        segments.append(properties)
+
+    return segments
+
+
+def _marker(trace: dict, row: int, legendgroup: str) -> dict:
+    """Current position of a trace, drawn over its trail"""
+    marker = trace.get("marker") or {}
+    line = trace.get("line") or {}
+    color = line.get("color")
+    if color is None and isinstance(marker.get("color"), str):
+        color = marker["color"]
+
+    return {
+        "type": trace.get("type", "scatter"),
+        **{name: trace[name] for name in ("xaxis", "yaxis", "scene") if name in trace},
+        "legendgroup": legendgroup,
+        "mode": "markers",
+        "marker": {"size": (marker.get("size") or 6) + 4, "color": color},
+        "showlegend": False,
+        "hoverinfo": "skip",
+        **_marker_position(trace, row),
+    }
+
+
+def _marker_position(trace: dict, row: int) -> dict:
+    """Marker coordinates at a displayed point"""
+    return {
+        name: [_take(trace[name], [row])[0] if len(trace[name]) else None]
+        for name in ("x", "y", "z")
+        if trace.get(name) is not None
+    }
+
+
+def _point_colors(trace: dict, length: int) -> Optional[np.ndarray]:
+    """Per-point marker colors, e.g. heatmap levels"""
+    import numpy as np
+
+    color = (trace.get("marker") or {}).get("color")
+    if color is None or isinstance(color, str) or np.ndim(color) == 0:
+        return None
+
+    return color if len(color) == length else None
+
+
+def _take(values, rows):
+    """Rows of a trace array, numeric arrays as NumPy arrays that plotly.py
+    validates and serializes"""
+    import numpy as np
+
+    if not isinstance(values, np.ndarray) or values.dtype.kind not in "fiu":
+        return [values[row] for row in rows]
+    if len(rows) > 1:
+        return values[rows]
+
+    return values[rows].tolist()
+
+
+def _fix_ranges(layout: dict, traces: list[dict]) -> None:
+    """Sets autoranged axes to the full data extent, so the trail can grow"""
+    import numpy as np
+
+    extents: dict[tuple[str, ...], list[float]] = {}
+    for trace in traces:
+        if trace.get("type") == "scatter3d":
+            scene = trace.get("scene", "scene")
+            axes = [(scene, f"{name}axis", name) for name in "xyz"]
+        else:
+            axes = [
+                (trace.get(f"{name}axis", name).replace(name, f"{name}axis", 1), name)
+                for name in "xy"
+            ]
+
+        for *path, name in axes:
+            values = np.asarray(trace.get(name, []), dtype=np.float64)
+            if not np.isfinite(values).any():
+                continue
+
+            extent = extents.setdefault(tuple(path), [np.inf, -np.inf])
+            extent[0] = min(extent[0], float(np.nanmin(values)))
+            extent[1] = max(extent[1], float(np.nanmax(values)))
+
+    for path, (low, high) in extents.items():
+        axis = layout
+        for name in path:
+            axis = axis.setdefault(name, {})
+        if axis.get("range") is None:
+            padding = (high - low) * RANGE_PADDING or 1.0
+            axis["range"] = [low - padding, high + padding]
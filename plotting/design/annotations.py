@@ -73,13 +73,31 @@ class Classification:
         }
 
 
-def get_miss_distance(distance: float) -> Annotation:
+def get_miss_distance(distance: float | None) -> Annotation:
     return Annotation(
         x=-0.01,
         y=-0.13,
         xref="paper",
         yref="paper",
-        text=f"Miss distance {distance:.2f} m",
+        text=(
+            "Miss distance N/A"
+            if distance is None
+            else f"Miss distance {distance:.2f} m"
+        ),
+        showarrow=False,
+    )
+
+
+def get_preview_note(percent: float) -> Annotation:
+    return Annotation(
+        x=1.0,
+        y=1.0,
+        xref="paper",
+        yref="paper",
+        xanchor="right",
+        yanchor="bottom",
+        text=f"<i>Preview of {percent:.3g}% of rows</i>",
+        font={"size": 10},
         showarrow=False,
     )
 
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import base64
+from typing import TYPE_CHECKING, Optional
+
+from .expressions import resolve_column
+from .rate_groups import RateGroups
+from .unit_conversion import unit_transformation
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    from .dtype_policy import DtypePolicy
+
+
+class AxisDataCache:
+    """
+    Unit transformed axis data shared by every trace in a figure
+
+    Variables reading the same column with the same scale factor (typically
+    ``time_s``) are transformed once and reference a single Series. Safe to
+    share between threads preparing traces. Detached caches never hold views
+    of the output data, so the DataFrame can be released once traces are built
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame | RateGroups,
+        detach: bool = False,
+        dtype_policy: Optional[DtypePolicy] = None,
+    ) -> None:
+        self.data = data
+        self.detach = detach
+        self.dtype_policy = dtype_policy
+        self.__series: dict[str, pd.Series] = {}
+
+    def get(
+        self, column: str, scale_factor: Optional[str], group: Optional[str] = None
+    ) -> pd.Series:
+        """Transformed column, computed on first use
+
+        Parameters
+        ----------
+        column : str
+            Column name in the output data, or a derived variable expression
+        scale_factor : Optional[str]
+            Unit conversion applied to the column
+        group : Optional[str], optional
+            Rate group time base the column is aligned onto, when the output
+            data is ``RateGroups``, by default None
+
+        Returns
+        -------
+        pd.Series
+            Shared transformed data, do not modify in place
+        """
+        key = self.key(column, scale_factor, group)
+        series = self.__series.get(key)
+        if series is None:
+            column_data = resolve_column(self.data, column, group)
+            series = unit_transformation(column_data, scale_factor)
+            if self.dtype_policy is not None:
+                series = self.dtype_policy.apply(column, series)
+            if self.detach and series is column_data:
+                # Untransformed columns are views of the output data
+                series = series.copy()
+
+            # Concurrent misses may both transform, but only one result is kept
+            series = self.__series.setdefault(key, series)
+
+        return series
+
+    def __getitem__(self, key: str) -> pd.Series:
+        return self.__series[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__series
+
+    def __len__(self) -> int:
+        return len(self.__series)
+
+    def release(self) -> None:
+        """Drops the output data, keeping only the column names"""
+        if isinstance(self.data, RateGroups):
+            self.data = self.data.header()
+        else:
+            self.data = self.data.iloc[:0].copy()
+
+    @staticmethod
+    def source(key: str) -> tuple[str, str]:
+        """Column and scale factor of a dataset reference"""
+        column, scale_factor = key.rsplit("|", 1)
+        return column.split("@", 1)[0], scale_factor
+
+    @staticmethod
+    def key(
+        column: str, scale_factor: Optional[str], group: Optional[str] = None
+    ) -> str:
+        """Dataset reference for a (column, scale factor) pair
+
+        Columns aligned onto a rate group are referenced as ``column@group``
+        """
+        if group is not None:
+            column = f"{column}@{group}"
+        return f"{column}|{scale_factor}"
+
+
+def encode_array(values: pd.Series | np.ndarray) -> dict[str, str | list[int]]:
+    """Encodes numeric data as a plotly.js typed array (``dtype``/``bdata``)
+
+    Parameters
+    ----------
+    values : pd.Series | np.ndarray
+        Numeric data
+
+    Returns
+    -------
+    dict[str, str | list[int]]
+        Base64 little-endian buffer with its dtype and shape
+
+    Raises
+    ------
+    ValueError
+        Data other than floats or integers, e.g. strings or dates
+    """
+    import numpy as np
+
+    array = np.ascontiguousarray(np.asarray(values))
+    if not is_typed_array(array):
+        raise ValueError(f"Typed arrays hold numbers, not '{array.dtype}' data")
+    array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+    return {
+        "dtype": array.dtype.str[1:],
+        "bdata": base64.b64encode(array.tobytes()).decode("ascii"),
+        "shape": list(array.shape),
+    }
+
+
+def is_typed_array(values: pd.Series | np.ndarray) -> bool:
+    """Whether data can be encoded as a typed array, i.e. floats or integers"""
+    return values.dtype.kind in "fiu"
+
+
+def decode_array(encoded: dict) -> np.ndarray:
+    """Decodes a typed array created by ``encode_array``
+
+    Parameters
+    ----------
+    encoded : dict
+        Typed array with ``dtype``, ``bdata`` and optional ``shape``
+
+    Returns
+    -------
+    np.ndarray
+        Read-only array backed by the decoded buffer
+    """
+    import numpy as np
+
+    array = np.frombuffer(
+        base64.b64decode(encoded["bdata"]), dtype=np.dtype("<" + encoded["dtype"])
+    )
+    if "shape" in encoded:
+        array = array.reshape(encoded["shape"])
+
+    return array
+
+
+def to_shared_dict(
+    figure: go.Figure, axis_data: AxisDataCache, trace_sources: list[dict[str, str]]
+) -> dict:
+    """Serializes a figure with axis data stored once per dataset
+
+    Numeric trace axes built from the axis cache are replaced by
+    ``{"dataset": key}`` references into a ``datasets`` table of typed array
+    buffers, other axes are kept inline
+
+    Parameters
+    ----------
+    figure : go.Figure
+        Figure being serialized
+    axis_data : AxisDataCache
+        Axis data the figure traces were built from
+    trace_sources : list[dict[str, str]]
+        Dataset key of each trace axis, in trace order
+
+    Returns
+    -------
+    dict
+        ``{"datasets": {...}, "data": [...], "layout": {...}}``
+    """
+    import numpy as np
+
+    datasets: dict[str, dict] = {}
+    traces = []
+    for trace, sources in zip(figure.data, trace_sources):
+        trace_dict = trace.to_plotly_json()
+        for axis_name, key in sources.items():
+            if key not in datasets:
+                # Traces prepared in other processes only exist in the figure
+                values = np.asarray(
+                    axis_data[key] if key in axis_data else trace_dict[axis_name]
+                )
+                if not is_typed_array(values):
+                    # Categories and dates stay inline, as plotly serializes them
+                    continue
+
+                column, scale_factor = axis_data.source(key)
+                datasets[key] = {
+                    "column": column,
+                    "scaleFactor": scale_factor,
+                    "data": encode_array(values),
+                }
+            trace_dict[axis_name] = {"dataset": key}
+        traces.append(trace_dict)
+
+    # Traces without recorded sources keep their data inline
+    traces += [trace.to_plotly_json() for trace in figure.data[len(traces) :]]
+
+    return {
+        "datasets": datasets,
+        "data": traces,
+        "layout": figure.layout.to_plotly_json(),
+    }
+
+
+def from_shared_dict(shared: dict) -> go.Figure:
+    """Rebuilds a figure serialized by ``to_shared_dict``
+
+    Parameters
+    ----------
+    shared : dict
+        Figure with a ``datasets`` table
+
+    Returns
+    -------
+    go.Figure
+        Figure with dataset references resolved
+    """
+    import plotly.graph_objects as go
+
+    arrays = {
+        key: decode_array(dataset["data"])
+        for key, dataset in shared["datasets"].items()
+    }
+
+    traces = []
+    for trace in shared["data"]:
+        trace = dict(trace)
+        for name, value in trace.items():
+            if isinstance(value, dict) and set(value) == {"dataset"}:
+                trace[name] = arrays[value["dataset"]]
+        traces.append(trace)
+
+    return go.Figure(data=traces, layout=shared["layout"])
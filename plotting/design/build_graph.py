@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, TypedDict
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .plot_base import PlotBase
+
+DESIGN_DIRECTORY = Path(__file__).parent
+
+
+class BuildTarget(TypedDict):
+    """Output built from a template and a run's output data"""
+
+    output: str
+    template: str
+    data: str
+    plot_type: str
+
+
+class BuildRecord(TypedDict):
+    """Inputs an output was built from, used to detect stale outputs"""
+
+    template: str
+    template_hash: str
+    data: str
+    data_stat: list[int]
+    columns: dict[str, str]
+    design_version: str
+    plot_type: str
+
+
+def design_version() -> str:
+    """Fingerprint of the ``plotting.design`` sources, any edit changes it"""
+    digest = hashlib.blake2b(digest_size=16)
+    for file in sorted(DESIGN_DIRECTORY.glob("*.py")):
+        digest.update(file.name.encode())
+        digest.update(file.read_bytes())
+
+    return digest.hexdigest()
+
+
+def file_hash(path: str | Path) -> str:
+    return hashlib.blake2b(Path(path).read_bytes(), digest_size=16).hexdigest()
+
+
+def column_fingerprint(series: pd.Series) -> str:
+    """Content hash of a column, independent of its position and index"""
+    import pandas as pd
+
+    hashed = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    return hashlib.blake2b(hashed.tobytes(), digest_size=16).hexdigest()
+
+
+def build_output(target: BuildTarget) -> tuple[PlotBase, pd.DataFrame]:
+    """Default builder, writing HTML or figure JSON depending on the extension
+
+    Parameters
+    ----------
+    target : BuildTarget
+        Output to build
+
+    Returns
+    -------
+    tuple[PlotBase, pd.DataFrame]
+        Built plot and the data it was built from
+    """
+    from . import plots
+    from .dtype_policy import DtypePolicy
+
+    template = json.loads(Path(target["template"]).read_text())
+    data = DtypePolicy.from_template(template).read_csv(target["data"])
+    plot: PlotBase = getattr(plots, target["plot_type"])(template, data)
+
+    output = Path(target["output"])
+    output.parent.mkdir(parents=True, exist_ok=True)
+    if output.suffix == ".html":
+        plot.figure.write_html(output)
+    else:
+        output.write_text(plot.to_json())
+
+    return plot, data
+
+
+class BuildGraph:
+    """
+    Dependency records for incremental builds
+
+    Each output records its template file hash, the data columns the plot read
+    with their fingerprints, and the design version. Outputs are rebuilt only
+    when one of them changed
+    """
+
+    def __init__(self, manifest: str | Path) -> None:
+        """Loads the records of previous builds
+
+        Parameters
+        ----------
+        manifest : str | Path
+            JSON file storing the build records
+        """
+        self.manifest = Path(manifest)
+        self.records: dict[str, BuildRecord] = (
+            json.loads(self.manifest.read_text()) if self.manifest.exists() else {}
+        )
+        self.version = design_version()
+
+    def is_stale(self, target: BuildTarget) -> bool:
+        """Whether a target must be rebuilt
+
+        Data is only read when the data file changed on disk, and then only the
+        recorded columns are fingerprinted
+        """
+        record = self.records.get(target["output"])
+        if (
+            record is None
+            or not Path(target["output"]).exists()
+            or record["design_version"] != self.version
+            or record["plot_type"] != target["plot_type"]
+            or record["template"] != target["template"]
+            or record["data"] != target["data"]
+            or record["template_hash"] != file_hash(target["template"])
+        ):
+            return True
+
+        data_stat = self.__data_stat(target["data"])
+        if data_stat == record["data_stat"]:
+            return False
+
+        from .dtype_policy import DtypePolicy
+
+        # Read as the builder read it, so float32 columns fingerprint the same
+        columns = record["columns"]
+        template = json.loads(Path(target["template"]).read_text())
+        data = DtypePolicy.from_template(template).read_csv(
+            target["data"], usecols=lambda name: name in columns
+        )
+        if set(data.columns) != set(columns) or any(
+            column_fingerprint(data[name]) != fingerprint
+            for name, fingerprint in columns.items()
+        ):
+            return True
+
+        # Unrelated columns changed, skip the read next time
+        record["data_stat"] = data_stat
+        return False
+
+    def stale(self, targets: Iterable[BuildTarget]) -> list[BuildTarget]:
+        return [target for target in targets if self.is_stale(target)]
+
+    def record(self, target: BuildTarget, plot: PlotBase, data: pd.DataFrame) -> None:
+        """Records the inputs a target was built from
+
+        Parameters
+        ----------
+        target : BuildTarget
+            Built target
+        plot : PlotBase
+            Plot the output was written from
+        data : pd.DataFrame
+            Data the plot was built from
+        """
+        self.records[target["output"]] = {
+            "template": target["template"],
+            "template_hash": file_hash(target["template"]),
+            "data": target["data"],
+            "data_stat": self.__data_stat(target["data"]),
+            "columns": {
+                column: column_fingerprint(data[column]) for column in plot.columns()
+            },
+            "design_version": self.version,
+            "plot_type": target["plot_type"],
+        }
+
+    def save(self) -> None:
+        self.manifest.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.manifest.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.records, indent=2))
+        os.replace(temporary, self.manifest)
+
+    def build(
+        self,
+        targets: Iterable[BuildTarget],
+        builder: Callable[[BuildTarget], tuple[PlotBase, pd.DataFrame]] = build_output,
+    ) -> list[str]:
+        """Rebuilds stale targets and saves their records
+
+        Parameters
+        ----------
+        targets : Iterable[BuildTarget]
+            Every output of the build
+        builder : Callable[[BuildTarget], tuple[PlotBase, pd.DataFrame]], optional
+            Writes a target's output, by default build_output
+
+        Returns
+        -------
+        list[str]
+            Rebuilt outputs
+        """
+        rebuilt = []
+        for target in self.stale(targets):
+            plot, data = builder(target)
+            self.record(target, plot, data)
+            rebuilt.append(target["output"])
+
+        self.save()
+        return rebuilt
+
+    def watch(
+        self,
+        targets: Callable[[], Iterable[BuildTarget]],
+        directories: Iterable[str | Path],
+        builder: Callable[[BuildTarget], tuple[PlotBase, pd.DataFrame]] = build_output,
+        interval: float = 1.0,
+        on_build: Optional[Callable[[list[str]], None]] = None,
+    ) -> None:
+        """Rebuilds stale targets whenever files in the directories change
+
+        Polls file modification times, so no watcher dependency is needed.
+        Runs until interrupted
+
+        Parameters
+        ----------
+        targets : Callable[[], Iterable[BuildTarget]]
+            Current targets, called after every change so new files are picked up
+        directories : Iterable[str | Path]
+            Data and template directories to watch
+        builder : Callable[[BuildTarget], tuple[PlotBase, pd.DataFrame]], optional
+            Writes a target's output, by default build_output
+        interval : float, optional
+            Seconds between polls, by default 1.0
+        on_build : Optional[Callable[[list[str]], None]], optional
+            Receives the outputs rebuilt after each change, by default None
+        """
+        directories = [Path(directory) for directory in directories]
+        snapshot = None
+        while True:
+            current = {
+                str(file): file.stat().st_mtime_ns
+                for directory in directories
+                for file in directory.rglob("*")
+                if file.is_file()
+            }
+            if current != snapshot:
+                snapshot = current
+                rebuilt = self.build(targets(), builder)
+                if on_build is not None:
+                    on_build(rebuilt)
+
+            time.sleep(interval)
+
+    @staticmethod
+    def __data_stat(path: str) -> list[int]:
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
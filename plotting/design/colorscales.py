@@ -1,7 +1,180 @@
+from __future__ import annotations
+
+import json
+import re
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# rgb(), hsl() and hsv() colors with optional alpha, without spaces
+COLOR_FUNCTION = re.compile(
+    r"(rgb|hsl|hsv)a?\(([\d.]+%?),([\d.]+%?),([\d.]+%?)(,[\d.]+%?)?\)"
+)
+
+HEX_COLOR = re.compile(r"#([0-9a-f]{3}|[0-9a-f]{6})")
+
+# CSS named colors, the names plotly accepts
+NAMED_COLORS = {
+    "aliceblue": "#f0f8ff",
+    "antiquewhite": "#faebd7",
+    "aqua": "#00ffff",
+    "aquamarine": "#7fffd4",
+    "azure": "#f0ffff",
+    "beige": "#f5f5dc",
+    "bisque": "#ffe4c4",
+    "black": "#000000",
+    "blanchedalmond": "#ffebcd",
+    "blue": "#0000ff",
+    "blueviolet": "#8a2be2",
+    "brown": "#a52a2a",
+    "burlywood": "#deb887",
+    "cadetblue": "#5f9ea0",
+    "chartreuse": "#7fff00",
+    "chocolate": "#d2691e",
+    "coral": "#ff7f50",
+    "cornflowerblue": "#6495ed",
+    "cornsilk": "#fff8dc",
+    "crimson": "#dc143c",
+    "cyan": "#00ffff",
+    "darkblue": "#00008b",
+    "darkcyan": "#008b8b",
+    "darkgoldenrod": "#b8860b",
+    "darkgray": "#a9a9a9",
+    "darkgrey": "#a9a9a9",
+    "darkgreen": "#006400",
+    "darkkhaki": "#bdb76b",
+    "darkmagenta": "#8b008b",
+    "darkolivegreen": "#556b2f",
+    "darkorange": "#ff8c00",
+    "darkorchid": "#9932cc",
+    "darkred": "#8b0000",
+    "darksalmon": "#e9967a",
+    "darkseagreen": "#8fbc8f",
+    "darkslateblue": "#483d8b",
+    "darkslategray": "#2f4f4f",
+    "darkslategrey": "#2f4f4f",
+    "darkturquoise": "#00ced1",
+    "darkviolet": "#9400d3",
+    "deeppink": "#ff1493",
+    "deepskyblue": "#00bfff",
+    "dimgray": "#696969",
+    "dimgrey": "#696969",
+    "dodgerblue": "#1e90ff",
+    "firebrick": "#b22222",
+    "floralwhite": "#fffaf0",
+    "forestgreen": "#228b22",
+    "fuchsia": "#ff00ff",
+    "gainsboro": "#dcdcdc",
+    "ghostwhite": "#f8f8ff",
+    "gold": "#ffd700",
+    "goldenrod": "#daa520",
+    "gray": "#808080",
+    "grey": "#808080",
+    "green": "#008000",
+    "greenyellow": "#adff2f",
+    "honeydew": "#f0fff0",
+    "hotpink": "#ff69b4",
+    "indianred": "#cd5c5c",
+    "indigo": "#4b0082",
+    "ivory": "#fffff0",
+    "khaki": "#f0e68c",
+    "lavender": "#e6e6fa",
+    "lavenderblush": "#fff0f5",
+    "lawngreen": "#7cfc00",
+    "lemonchiffon": "#fffacd",
+    "lightblue": "#add8e6",
+    "lightcoral": "#f08080",
+    "lightcyan": "#e0ffff",
+    "lightgoldenrodyellow": "#fafad2",
+    "lightgray": "#d3d3d3",
+    "lightgrey": "#d3d3d3",
+    "lightgreen": "#90ee90",
+    "lightpink": "#ffb6c1",
+    "lightsalmon": "#ffa07a",
+    "lightseagreen": "#20b2aa",
+    "lightskyblue": "#87cefa",
+    "lightslategray": "#778899",
+    "lightslategrey": "#778899",
+    "lightsteelblue": "#b0c4de",
+    "lightyellow": "#ffffe0",
+    "lime": "#00ff00",
+    "limegreen": "#32cd32",
+    "linen": "#faf0e6",
+    "magenta": "#ff00ff",
+    "maroon": "#800000",
+    "mediumaquamarine": "#66cdaa",
+    "mediumblue": "#0000cd",
+    "mediumorchid": "#ba55d3",
+    "mediumpurple": "#9370db",
+    "mediumseagreen": "#3cb371",
+    "mediumslateblue": "#7b68ee",
+    "mediumspringgreen": "#00fa9a",
+    "mediumturquoise": "#48d1cc",
+    "mediumvioletred": "#c71585",
+    "midnightblue": "#191970",
+    "mintcream": "#f5fffa",
+    "mistyrose": "#ffe4e1",
+    "moccasin": "#ffe4b5",
+    "navajowhite": "#ffdead",
+    "navy": "#000080",
+    "oldlace": "#fdf5e6",
+    "olive": "#808000",
+    "olivedrab": "#6b8e23",
+    "orange": "#ffa500",
+    "orangered": "#ff4500",
+    "orchid": "#da70d6",
+    "palegoldenrod": "#eee8aa",
+    "palegreen": "#98fb98",
+    "paleturquoise": "#afeeee",
+    "palevioletred": "#db7093",
+    "papayawhip": "#ffefd5",
+    "peachpuff": "#ffdab9",
+    "peru": "#cd853f",
+    "pink": "#ffc0cb",
+    "plum": "#dda0dd",
+    "powderblue": "#b0e0e6",
+    "purple": "#800080",
+    "rebeccapurple": "#663399",
+    "red": "#ff0000",
+    "rosybrown": "#bc8f8f",
+    "royalblue": "#4169e1",
+    "saddlebrown": "#8b4513",
+    "salmon": "#fa8072",
+    "sandybrown": "#f4a460",
+    "seagreen": "#2e8b57",
+    "seashell": "#fff5ee",
+    "sienna": "#a0522d",
+    "silver": "#c0c0c0",
+    "skyblue": "#87ceeb",
+    "slateblue": "#6a5acd",
+    "slategray": "#708090",
+    "slategrey": "#708090",
+    "snow": "#fffafa",
+    "springgreen": "#00ff7f",
+    "steelblue": "#4682b4",
+    "tan": "#d2b48c",
+    "teal": "#008080",
+    "thistle": "#d8bfd8",
+    "tomato": "#ff6347",
+    "turquoise": "#40e0d0",
+    "violet": "#ee82ee",
+    "wheat": "#f5deb3",
+    "white": "#ffffff",
+    "whitesmoke": "#f5f5f5",
+    "yellow": "#ffff00",
+    "yellowgreen": "#9acd32",
+}
+
+
+@cache
 def additional_colorscales() -> dict[str, list[str]]:
     """Additional RGB colorscales
 
-    Parula scale came from MATLAB
+    Parula scale came from MATLAB. Built once and shared, so treat the result
+    as read-only
 
     Returns
     -------
@@ -268,3 +441,1042 @@ def additional_colorscales() -> dict[str, list[str]]:
             "rgb(250,252,14)",
         ]
     }
+
+
+# Snapshot of plotly.colors.sequential (plotly 5.19.0, reversed "_r" variants
+# omitted) so colorscales resolve without importing plotly.express
+SEQUENTIAL_COLORSCALES: dict[str, list[str]] = {
+    "Aggrnyl": [
+        "rgb(36, 86, 104)",
+        "rgb(15, 114, 121)",
+        "rgb(13, 143, 129)",
+        "rgb(57, 171, 126)",
+        "rgb(110, 197, 116)",
+        "rgb(169, 220, 103)",
+        "rgb(237, 239, 93)",
+    ],
+    "Agsunset": [
+        "rgb(75, 41, 145)",
+        "rgb(135, 44, 162)",
+        "rgb(192, 54, 157)",
+        "rgb(234, 79, 136)",
+        "rgb(250, 120, 118)",
+        "rgb(246, 169, 122)",
+        "rgb(237, 217, 163)",
+    ],
+    "Blackbody": [
+        "rgb(0,0,0)",
+        "rgb(230,0,0)",
+        "rgb(230,210,0)",
+        "rgb(255,255,255)",
+        "rgb(160,200,255)",
+    ],
+    "Bluered": ["rgb(0,0,255)", "rgb(255,0,0)"],
+    "Blues": [
+        "rgb(247,251,255)",
+        "rgb(222,235,247)",
+        "rgb(198,219,239)",
+        "rgb(158,202,225)",
+        "rgb(107,174,214)",
+        "rgb(66,146,198)",
+        "rgb(33,113,181)",
+        "rgb(8,81,156)",
+        "rgb(8,48,107)",
+    ],
+    "Blugrn": [
+        "rgb(196, 230, 195)",
+        "rgb(150, 210, 164)",
+        "rgb(109, 188, 144)",
+        "rgb(77, 162, 132)",
+        "rgb(54, 135, 122)",
+        "rgb(38, 107, 110)",
+        "rgb(29, 79, 96)",
+    ],
+    "Bluyl": [
+        "rgb(247, 254, 174)",
+        "rgb(183, 230, 165)",
+        "rgb(124, 203, 162)",
+        "rgb(70, 174, 160)",
+        "rgb(8, 144, 153)",
+        "rgb(0, 113, 139)",
+        "rgb(4, 82, 117)",
+    ],
+    "Brwnyl": [
+        "rgb(237, 229, 207)",
+        "rgb(224, 194, 162)",
+        "rgb(211, 156, 131)",
+        "rgb(193, 118, 111)",
+        "rgb(166, 84, 97)",
+        "rgb(129, 55, 83)",
+        "rgb(84, 31, 63)",
+    ],
+    "BuGn": [
+        "rgb(247,252,253)",
+        "rgb(229,245,249)",
+        "rgb(204,236,230)",
+        "rgb(153,216,201)",
+        "rgb(102,194,164)",
+        "rgb(65,174,118)",
+        "rgb(35,139,69)",
+        "rgb(0,109,44)",
+        "rgb(0,68,27)",
+    ],
+    "BuPu": [
+        "rgb(247,252,253)",
+        "rgb(224,236,244)",
+        "rgb(191,211,230)",
+        "rgb(158,188,218)",
+        "rgb(140,150,198)",
+        "rgb(140,107,177)",
+        "rgb(136,65,157)",
+        "rgb(129,15,124)",
+        "rgb(77,0,75)",
+    ],
+    "Burg": [
+        "rgb(255, 198, 196)",
+        "rgb(244, 163, 168)",
+        "rgb(227, 129, 145)",
+        "rgb(204, 96, 125)",
+        "rgb(173, 70, 108)",
+        "rgb(139, 48, 88)",
+        "rgb(103, 32, 68)",
+    ],
+    "Burgyl": [
+        "rgb(251, 230, 197)",
+        "rgb(245, 186, 152)",
+        "rgb(238, 138, 130)",
+        "rgb(220, 113, 118)",
+        "rgb(200, 88, 108)",
+        "rgb(156, 63, 93)",
+        "rgb(112, 40, 74)",
+    ],
+    "Cividis": [
+        "#00224e",
+        "#123570",
+        "#3b496c",
+        "#575d6d",
+        "#707173",
+        "#8a8678",
+        "#a59c74",
+        "#c3b369",
+        "#e1cc55",
+        "#fee838",
+    ],
+    "Darkmint": [
+        "rgb(210, 251, 212)",
+        "rgb(165, 219, 194)",
+        "rgb(123, 188, 176)",
+        "rgb(85, 156, 158)",
+        "rgb(58, 124, 137)",
+        "rgb(35, 93, 114)",
+        "rgb(18, 63, 90)",
+    ],
+    "Electric": [
+        "rgb(0,0,0)",
+        "rgb(30,0,100)",
+        "rgb(120,0,100)",
+        "rgb(160,90,0)",
+        "rgb(230,200,0)",
+        "rgb(255,250,220)",
+    ],
+    "Emrld": [
+        "rgb(211, 242, 163)",
+        "rgb(151, 225, 150)",
+        "rgb(108, 192, 139)",
+        "rgb(76, 155, 130)",
+        "rgb(33, 122, 121)",
+        "rgb(16, 89, 101)",
+        "rgb(7, 64, 80)",
+    ],
+    "GnBu": [
+        "rgb(247,252,240)",
+        "rgb(224,243,219)",
+        "rgb(204,235,197)",
+        "rgb(168,221,181)",
+        "rgb(123,204,196)",
+        "rgb(78,179,211)",
+        "rgb(43,140,190)",
+        "rgb(8,104,172)",
+        "rgb(8,64,129)",
+    ],
+    "Greens": [
+        "rgb(247,252,245)",
+        "rgb(229,245,224)",
+        "rgb(199,233,192)",
+        "rgb(161,217,155)",
+        "rgb(116,196,118)",
+        "rgb(65,171,93)",
+        "rgb(35,139,69)",
+        "rgb(0,109,44)",
+        "rgb(0,68,27)",
+    ],
+    "Greys": [
+        "rgb(255,255,255)",
+        "rgb(240,240,240)",
+        "rgb(217,217,217)",
+        "rgb(189,189,189)",
+        "rgb(150,150,150)",
+        "rgb(115,115,115)",
+        "rgb(82,82,82)",
+        "rgb(37,37,37)",
+        "rgb(0,0,0)",
+    ],
+    "Hot": ["rgb(0,0,0)", "rgb(230,0,0)", "rgb(255,210,0)", "rgb(255,255,255)"],
+    "Inferno": [
+        "#000004",
+        "#1b0c41",
+        "#4a0c6b",
+        "#781c6d",
+        "#a52c60",
+        "#cf4446",
+        "#ed6925",
+        "#fb9b06",
+        "#f7d13d",
+        "#fcffa4",
+    ],
+    "Jet": [
+        "rgb(0,0,131)",
+        "rgb(0,60,170)",
+        "rgb(5,255,255)",
+        "rgb(255,255,0)",
+        "rgb(250,0,0)",
+        "rgb(128,0,0)",
+    ],
+    "Magenta": [
+        "rgb(243, 203, 211)",
+        "rgb(234, 169, 189)",
+        "rgb(221, 136, 172)",
+        "rgb(202, 105, 157)",
+        "rgb(177, 77, 142)",
+        "rgb(145, 53, 125)",
+        "rgb(108, 33, 103)",
+    ],
+    "Magma": [
+        "#000004",
+        "#180f3d",
+        "#440f76",
+        "#721f81",
+        "#9e2f7f",
+        "#cd4071",
+        "#f1605d",
+        "#fd9668",
+        "#feca8d",
+        "#fcfdbf",
+    ],
+    "Mint": [
+        "rgb(228, 241, 225)",
+        "rgb(180, 217, 204)",
+        "rgb(137, 192, 182)",
+        "rgb(99, 166, 160)",
+        "rgb(68, 140, 138)",
+        "rgb(40, 114, 116)",
+        "rgb(13, 88, 95)",
+    ],
+    "OrRd": [
+        "rgb(255,247,236)",
+        "rgb(254,232,200)",
+        "rgb(253,212,158)",
+        "rgb(253,187,132)",
+        "rgb(252,141,89)",
+        "rgb(239,101,72)",
+        "rgb(215,48,31)",
+        "rgb(179,0,0)",
+        "rgb(127,0,0)",
+    ],
+    "Oranges": [
+        "rgb(255,245,235)",
+        "rgb(254,230,206)",
+        "rgb(253,208,162)",
+        "rgb(253,174,107)",
+        "rgb(253,141,60)",
+        "rgb(241,105,19)",
+        "rgb(217,72,1)",
+        "rgb(166,54,3)",
+        "rgb(127,39,4)",
+    ],
+    "Oryel": [
+        "rgb(236, 218, 154)",
+        "rgb(239, 196, 126)",
+        "rgb(243, 173, 106)",
+        "rgb(247, 148, 93)",
+        "rgb(249, 123, 87)",
+        "rgb(246, 99, 86)",
+        "rgb(238, 77, 90)",
+    ],
+    "Peach": [
+        "rgb(253, 224, 197)",
+        "rgb(250, 203, 166)",
+        "rgb(248, 181, 139)",
+        "rgb(245, 158, 114)",
+        "rgb(242, 133, 93)",
+        "rgb(239, 106, 76)",
+        "rgb(235, 74, 64)",
+    ],
+    "Pinkyl": [
+        "rgb(254, 246, 181)",
+        "rgb(255, 221, 154)",
+        "rgb(255, 194, 133)",
+        "rgb(255, 166, 121)",
+        "rgb(250, 138, 118)",
+        "rgb(241, 109, 122)",
+        "rgb(225, 83, 131)",
+    ],
+    "Plasma": [
+        "#0d0887",
+        "#46039f",
+        "#7201a8",
+        "#9c179e",
+        "#bd3786",
+        "#d8576b",
+        "#ed7953",
+        "#fb9f3a",
+        "#fdca26",
+        "#f0f921",
+    ],
+    "Plotly3": [
+        "#0508b8",
+        "#1910d8",
+        "#3c19f0",
+        "#6b1cfb",
+        "#981cfd",
+        "#bf1cfd",
+        "#dd2bfd",
+        "#f246fe",
+        "#fc67fd",
+        "#fe88fc",
+        "#fea5fd",
+        "#febefe",
+        "#fec3fe",
+    ],
+    "PuBu": [
+        "rgb(255,247,251)",
+        "rgb(236,231,242)",
+        "rgb(208,209,230)",
+        "rgb(166,189,219)",
+        "rgb(116,169,207)",
+        "rgb(54,144,192)",
+        "rgb(5,112,176)",
+        "rgb(4,90,141)",
+        "rgb(2,56,88)",
+    ],
+    "PuBuGn": [
+        "rgb(255,247,251)",
+        "rgb(236,226,240)",
+        "rgb(208,209,230)",
+        "rgb(166,189,219)",
+        "rgb(103,169,207)",
+        "rgb(54,144,192)",
+        "rgb(2,129,138)",
+        "rgb(1,108,89)",
+        "rgb(1,70,54)",
+    ],
+    "PuRd": [
+        "rgb(247,244,249)",
+        "rgb(231,225,239)",
+        "rgb(212,185,218)",
+        "rgb(201,148,199)",
+        "rgb(223,101,176)",
+        "rgb(231,41,138)",
+        "rgb(206,18,86)",
+        "rgb(152,0,67)",
+        "rgb(103,0,31)",
+    ],
+    "Purp": [
+        "rgb(243, 224, 247)",
+        "rgb(228, 199, 241)",
+        "rgb(209, 175, 232)",
+        "rgb(185, 152, 221)",
+        "rgb(159, 130, 206)",
+        "rgb(130, 109, 186)",
+        "rgb(99, 88, 159)",
+    ],
+    "Purples": [
+        "rgb(252,251,253)",
+        "rgb(239,237,245)",
+        "rgb(218,218,235)",
+        "rgb(188,189,220)",
+        "rgb(158,154,200)",
+        "rgb(128,125,186)",
+        "rgb(106,81,163)",
+        "rgb(84,39,143)",
+        "rgb(63,0,125)",
+    ],
+    "Purpor": [
+        "rgb(249, 221, 218)",
+        "rgb(242, 185, 196)",
+        "rgb(229, 151, 185)",
+        "rgb(206, 120, 179)",
+        "rgb(173, 95, 173)",
+        "rgb(131, 75, 160)",
+        "rgb(87, 59, 136)",
+    ],
+    "Rainbow": [
+        "rgb(150,0,90)",
+        "rgb(0,0,200)",
+        "rgb(0,25,255)",
+        "rgb(0,152,255)",
+        "rgb(44,255,150)",
+        "rgb(151,255,0)",
+        "rgb(255,234,0)",
+        "rgb(255,111,0)",
+        "rgb(255,0,0)",
+    ],
+    "RdBu": [
+        "rgb(103,0,31)",
+        "rgb(178,24,43)",
+        "rgb(214,96,77)",
+        "rgb(244,165,130)",
+        "rgb(253,219,199)",
+        "rgb(247,247,247)",
+        "rgb(209,229,240)",
+        "rgb(146,197,222)",
+        "rgb(67,147,195)",
+        "rgb(33,102,172)",
+        "rgb(5,48,97)",
+    ],
+    "RdPu": [
+        "rgb(255,247,243)",
+        "rgb(253,224,221)",
+        "rgb(252,197,192)",
+        "rgb(250,159,181)",
+        "rgb(247,104,161)",
+        "rgb(221,52,151)",
+        "rgb(174,1,126)",
+        "rgb(122,1,119)",
+        "rgb(73,0,106)",
+    ],
+    "Redor": [
+        "rgb(246, 210, 169)",
+        "rgb(245, 183, 142)",
+        "rgb(241, 156, 124)",
+        "rgb(234, 129, 113)",
+        "rgb(221, 104, 108)",
+        "rgb(202, 82, 104)",
+        "rgb(177, 63, 100)",
+    ],
+    "Reds": [
+        "rgb(255,245,240)",
+        "rgb(254,224,210)",
+        "rgb(252,187,161)",
+        "rgb(252,146,114)",
+        "rgb(251,106,74)",
+        "rgb(239,59,44)",
+        "rgb(203,24,29)",
+        "rgb(165,15,21)",
+        "rgb(103,0,13)",
+    ],
+    "Sunset": [
+        "rgb(243, 231, 155)",
+        "rgb(250, 196, 132)",
+        "rgb(248, 160, 126)",
+        "rgb(235, 127, 134)",
+        "rgb(206, 102, 147)",
+        "rgb(160, 89, 160)",
+        "rgb(92, 83, 165)",
+    ],
+    "Sunsetdark": [
+        "rgb(252, 222, 156)",
+        "rgb(250, 164, 118)",
+        "rgb(240, 116, 110)",
+        "rgb(227, 79, 111)",
+        "rgb(220, 57, 119)",
+        "rgb(185, 37, 122)",
+        "rgb(124, 29, 111)",
+    ],
+    "Teal": [
+        "rgb(209, 238, 234)",
+        "rgb(168, 219, 217)",
+        "rgb(133, 196, 201)",
+        "rgb(104, 171, 184)",
+        "rgb(79, 144, 166)",
+        "rgb(59, 115, 143)",
+        "rgb(42, 86, 116)",
+    ],
+    "Tealgrn": [
+        "rgb(176, 242, 188)",
+        "rgb(137, 232, 172)",
+        "rgb(103, 219, 165)",
+        "rgb(76, 200, 163)",
+        "rgb(56, 178, 163)",
+        "rgb(44, 152, 160)",
+        "rgb(37, 125, 152)",
+    ],
+    "Turbo": [
+        "#30123b",
+        "#4145ab",
+        "#4675ed",
+        "#39a2fc",
+        "#1bcfd4",
+        "#24eca6",
+        "#61fc6c",
+        "#a4fc3b",
+        "#d1e834",
+        "#f3c63a",
+        "#fe9b2d",
+        "#f36315",
+        "#d93806",
+        "#b11901",
+        "#7a0402",
+    ],
+    "Viridis": [
+        "#440154",
+        "#482878",
+        "#3e4989",
+        "#31688e",
+        "#26828e",
+        "#1f9e89",
+        "#35b779",
+        "#6ece58",
+        "#b5de2b",
+        "#fde725",
+    ],
+    "YlGn": [
+        "rgb(255,255,229)",
+        "rgb(247,252,185)",
+        "rgb(217,240,163)",
+        "rgb(173,221,142)",
+        "rgb(120,198,121)",
+        "rgb(65,171,93)",
+        "rgb(35,132,67)",
+        "rgb(0,104,55)",
+        "rgb(0,69,41)",
+    ],
+    "YlGnBu": [
+        "rgb(255,255,217)",
+        "rgb(237,248,177)",
+        "rgb(199,233,180)",
+        "rgb(127,205,187)",
+        "rgb(65,182,196)",
+        "rgb(29,145,192)",
+        "rgb(34,94,168)",
+        "rgb(37,52,148)",
+        "rgb(8,29,88)",
+    ],
+    "YlOrBr": [
+        "rgb(255,255,229)",
+        "rgb(255,247,188)",
+        "rgb(254,227,145)",
+        "rgb(254,196,79)",
+        "rgb(254,153,41)",
+        "rgb(236,112,20)",
+        "rgb(204,76,2)",
+        "rgb(153,52,4)",
+        "rgb(102,37,6)",
+    ],
+    "YlOrRd": [
+        "rgb(255,255,204)",
+        "rgb(255,237,160)",
+        "rgb(254,217,118)",
+        "rgb(254,178,76)",
+        "rgb(253,141,60)",
+        "rgb(252,78,42)",
+        "rgb(227,26,28)",
+        "rgb(189,0,38)",
+        "rgb(128,0,38)",
+    ],
+    "algae": [
+        "rgb(214, 249, 207)",
+        "rgb(186, 228, 174)",
+        "rgb(156, 209, 143)",
+        "rgb(124, 191, 115)",
+        "rgb(85, 174, 91)",
+        "rgb(37, 157, 81)",
+        "rgb(7, 138, 78)",
+        "rgb(13, 117, 71)",
+        "rgb(23, 95, 61)",
+        "rgb(25, 75, 49)",
+        "rgb(23, 55, 35)",
+        "rgb(17, 36, 20)",
+    ],
+    "amp": [
+        "rgb(241, 236, 236)",
+        "rgb(230, 209, 203)",
+        "rgb(221, 182, 170)",
+        "rgb(213, 156, 137)",
+        "rgb(205, 129, 103)",
+        "rgb(196, 102, 73)",
+        "rgb(186, 74, 47)",
+        "rgb(172, 44, 36)",
+        "rgb(149, 19, 39)",
+        "rgb(120, 14, 40)",
+        "rgb(89, 13, 31)",
+        "rgb(60, 9, 17)",
+    ],
+    "deep": [
+        "rgb(253, 253, 204)",
+        "rgb(206, 236, 179)",
+        "rgb(156, 219, 165)",
+        "rgb(111, 201, 163)",
+        "rgb(86, 177, 163)",
+        "rgb(76, 153, 160)",
+        "rgb(68, 130, 155)",
+        "rgb(62, 108, 150)",
+        "rgb(62, 82, 143)",
+        "rgb(64, 60, 115)",
+        "rgb(54, 43, 77)",
+        "rgb(39, 26, 44)",
+    ],
+    "dense": [
+        "rgb(230, 240, 240)",
+        "rgb(191, 221, 229)",
+        "rgb(156, 201, 226)",
+        "rgb(129, 180, 227)",
+        "rgb(115, 154, 228)",
+        "rgb(117, 127, 221)",
+        "rgb(120, 100, 202)",
+        "rgb(119, 74, 175)",
+        "rgb(113, 50, 141)",
+        "rgb(100, 31, 104)",
+        "rgb(80, 20, 66)",
+        "rgb(54, 14, 36)",
+    ],
+    "gray": [
+        "rgb(0, 0, 0)",
+        "rgb(16, 16, 16)",
+        "rgb(38, 38, 38)",
+        "rgb(59, 59, 59)",
+        "rgb(81, 80, 80)",
+        "rgb(102, 101, 101)",
+        "rgb(124, 123, 122)",
+        "rgb(146, 146, 145)",
+        "rgb(171, 171, 170)",
+        "rgb(197, 197, 195)",
+        "rgb(224, 224, 223)",
+        "rgb(254, 254, 253)",
+    ],
+    "haline": [
+        "rgb(41, 24, 107)",
+        "rgb(42, 35, 160)",
+        "rgb(15, 71, 153)",
+        "rgb(18, 95, 142)",
+        "rgb(38, 116, 137)",
+        "rgb(53, 136, 136)",
+        "rgb(65, 157, 133)",
+        "rgb(81, 178, 124)",
+        "rgb(111, 198, 107)",
+        "rgb(160, 214, 91)",
+        "rgb(212, 225, 112)",
+        "rgb(253, 238, 153)",
+    ],
+    "ice": [
+        "rgb(3, 5, 18)",
+        "rgb(25, 25, 51)",
+        "rgb(44, 42, 87)",
+        "rgb(58, 60, 125)",
+        "rgb(62, 83, 160)",
+        "rgb(62, 109, 178)",
+        "rgb(72, 134, 187)",
+        "rgb(89, 159, 196)",
+        "rgb(114, 184, 205)",
+        "rgb(149, 207, 216)",
+        "rgb(192, 229, 232)",
+        "rgb(234, 252, 253)",
+    ],
+    "matter": [
+        "rgb(253, 237, 176)",
+        "rgb(250, 205, 145)",
+        "rgb(246, 173, 119)",
+        "rgb(240, 142, 98)",
+        "rgb(231, 109, 84)",
+        "rgb(216, 80, 83)",
+        "rgb(195, 56, 90)",
+        "rgb(168, 40, 96)",
+        "rgb(138, 29, 99)",
+        "rgb(107, 24, 93)",
+        "rgb(76, 21, 80)",
+        "rgb(47, 15, 61)",
+    ],
+    "solar": [
+        "rgb(51, 19, 23)",
+        "rgb(79, 28, 33)",
+        "rgb(108, 36, 36)",
+        "rgb(135, 47, 32)",
+        "rgb(157, 66, 25)",
+        "rgb(174, 88, 20)",
+        "rgb(188, 111, 19)",
+        "rgb(199, 137, 22)",
+        "rgb(209, 164, 32)",
+        "rgb(217, 192, 44)",
+        "rgb(222, 222, 59)",
+        "rgb(224, 253, 74)",
+    ],
+    "speed": [
+        "rgb(254, 252, 205)",
+        "rgb(239, 225, 156)",
+        "rgb(221, 201, 106)",
+        "rgb(194, 182, 59)",
+        "rgb(157, 167, 21)",
+        "rgb(116, 153, 5)",
+        "rgb(75, 138, 20)",
+        "rgb(35, 121, 36)",
+        "rgb(11, 100, 44)",
+        "rgb(18, 78, 43)",
+        "rgb(25, 56, 34)",
+        "rgb(23, 35, 18)",
+    ],
+    "tempo": [
+        "rgb(254, 245, 244)",
+        "rgb(222, 224, 210)",
+        "rgb(189, 206, 181)",
+        "rgb(153, 189, 156)",
+        "rgb(110, 173, 138)",
+        "rgb(65, 157, 129)",
+        "rgb(25, 137, 125)",
+        "rgb(18, 116, 117)",
+        "rgb(25, 94, 106)",
+        "rgb(28, 72, 93)",
+        "rgb(25, 51, 80)",
+        "rgb(20, 29, 67)",
+    ],
+    "thermal": [
+        "rgb(3, 35, 51)",
+        "rgb(13, 48, 100)",
+        "rgb(53, 50, 155)",
+        "rgb(93, 62, 153)",
+        "rgb(126, 77, 143)",
+        "rgb(158, 89, 135)",
+        "rgb(193, 100, 121)",
+        "rgb(225, 113, 97)",
+        "rgb(246, 139, 69)",
+        "rgb(251, 173, 60)",
+        "rgb(246, 211, 70)",
+        "rgb(231, 250, 90)",
+    ],
+    "turbid": [
+        "rgb(232, 245, 171)",
+        "rgb(220, 219, 137)",
+        "rgb(209, 193, 107)",
+        "rgb(199, 168, 83)",
+        "rgb(186, 143, 66)",
+        "rgb(170, 121, 60)",
+        "rgb(151, 103, 58)",
+        "rgb(129, 87, 56)",
+        "rgb(104, 72, 53)",
+        "rgb(80, 59, 46)",
+        "rgb(57, 45, 37)",
+        "rgb(34, 30, 27)",
+    ],
+}
+
+
+def make_colorscale(colors: list[str]) -> list[list[float | str]]:
+    """Evenly spaced plotly colorscale from a list of colors
+
+    Equivalent to ``plotly.colors.make_colorscale`` without a custom scale
+
+    Parameters
+    ----------
+    colors : list[str]
+        Colors in sequential order
+
+    Returns
+    -------
+    list[list[float | str]]
+        Pairs of normalized positions and colors
+
+    Raises
+    ------
+    ValueError
+        Fewer than two colors
+    """
+    if len(colors) < 2:
+        raise ValueError("A colorscale requires at least two colors")
+
+    step = 1.0 / (len(colors) - 1)
+    return [[index * step, color] for index, color in enumerate(colors)]
+
+
+def parse_color(color: str) -> tuple[int, int, int]:
+    """Converts a plotly color string to RGB
+
+    Accepts the formats plotly does: ``#rgb``, ``#rrggbb``, ``rgb()``,
+    ``hsl()`` and ``hsv()`` with optional alpha (ignored) and percentages, and
+    CSS color names. Channels are clipped to 0-255
+
+    Parameters
+    ----------
+    color : str
+        Plotly color string
+
+    Returns
+    -------
+    tuple[int, int, int]
+        Red, green and blue channels
+
+    Raises
+    ------
+    ValueError
+        Unsupported color format
+    """
+    import colorsys
+
+    normalized = color.replace(" ", "").lower()
+    normalized = NAMED_COLORS.get(normalized, normalized)
+
+    if HEX_COLOR.fullmatch(normalized):
+        digits = normalized[1:]
+        if len(digits) == 3:
+            digits = "".join(digit * 2 for digit in digits)
+        return tuple(int(digits[index : index + 2], 16) for index in (0, 2, 4))
+
+    match = COLOR_FUNCTION.fullmatch(normalized)
+    if match is None:
+        raise ValueError(f"Unsupported color format: {color}")
+
+    space, *values = match.groups()[:4]
+    if space == "rgb":
+        channels = [_channel(value, 255.0) for value in values]
+    else:
+        # Hue in degrees, saturation and lightness (value) as fractions
+        hue = float(values[0].rstrip("%")) / 360.0 % 1.0
+        saturation, level = (_channel(value, 1.0) for value in values[1:])
+        if space == "hsl":
+            fractions = colorsys.hls_to_rgb(hue, level, saturation)
+        else:
+            fractions = colorsys.hsv_to_rgb(hue, saturation, level)
+        channels = [fraction * 255.0 for fraction in fractions]
+
+    red, green, blue = (min(max(round(value), 0), 255) for value in channels)
+    return red, green, blue
+
+
+def _channel(value: str, scale: float) -> float:
+    """Color function argument on a 0 to ``scale`` range
+
+    Percentages are shares of the range. Saturation, lightness and value may
+    also be fractions up to 1, as in plotly.js
+    """
+    if value.endswith("%"):
+        return float(value[:-1]) / 100.0 * scale
+
+    number = float(value)
+    if scale == 1.0 and number > 1.0:
+        return number / 100.0
+
+    return number
+
+
+class ColorscaleRegistry:
+    """
+    Colorscales parsed once and shared by every heatmap
+
+    Holds the built-in colorscales, custom colorscale files (cached by path and
+    modification time) and their RGB arrays so data can be colored without plotly
+    """
+
+    def __init__(self) -> None:
+        self.__builtin: dict[str, list[str]] = {}
+        self.__files: dict[Path, tuple[int, dict[str, list[str]]]] = {}
+        self.__rgb: dict[tuple[Optional[Path], int, str], np.ndarray] = {}
+
+    def names(self, colorscale_file: Optional[str] = None) -> list[str]:
+        """
+        Supported colorscale names
+
+        Parameters
+        ----------
+        colorscale_file : Optional[str], optional
+            Custom colorscale file, by default None
+
+        Returns
+        -------
+        list[str]
+            Sorted colorscale names
+        """
+        return sorted(self.__scales(colorscale_file))
+
+    def colors(self, name: str, colorscale_file: Optional[str] = None) -> list[str]:
+        """
+        Plotly color strings of a colorscale
+
+        Parameters
+        ----------
+        name : str
+            Colorscale name
+        colorscale_file : Optional[str], optional
+            Custom colorscale file, by default None
+
+        Returns
+        -------
+        list[str]
+            Colors in sequential order
+
+        Raises
+        ------
+        ValueError
+            Unsupported colorscale
+        """
+        scales = self.__scales(colorscale_file)
+        if name not in scales:
+            raise ValueError(
+                f"{name} is not a supported color scale."
+                f" Please choose from {sorted(scales)}"
+            )
+        return scales[name]
+
+    def plotly_colorscale(
+        self, name: str, colorscale_file: Optional[str] = None
+    ) -> list[list[float | str]]:
+        """
+        Colorscale in plotly's ``[[position, color], ...]`` form
+
+        Parameters
+        ----------
+        name : str
+            Colorscale name
+        colorscale_file : Optional[str], optional
+            Custom colorscale file, by default None
+
+        Returns
+        -------
+        list[list[float | str]]
+            Plotly colorscale
+        """
+        return make_colorscale(self.colors(name, colorscale_file))
+
+    def rgb(self, name: str, colorscale_file: Optional[str] = None) -> np.ndarray:
+        """
+        Colorscale as a read-only ``(N, 3)`` uint8 array
+
+        Parameters
+        ----------
+        name : str
+            Colorscale name
+        colorscale_file : Optional[str], optional
+            Custom colorscale file, by default None
+
+        Returns
+        -------
+        np.ndarray
+            RGB values of each color in the scale
+        """
+        import numpy as np
+
+        colors = self.colors(name, colorscale_file)
+
+        path, mtime = self.__file_key(colorscale_file)
+        key = (path, mtime, name)
+        if key not in self.__rgb:
+            values = np.array([parse_color(color) for color in colors], dtype=np.uint8)
+            values.setflags(write=False)
+            self.__rgb[key] = values
+
+        return self.__rgb[key]
+
+    def map_values(
+        self,
+        values: np.ndarray,
+        name: str,
+        cmin: Optional[float] = None,
+        cmax: Optional[float] = None,
+        colorscale_file: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Maps data onto a colorscale the same way plotly's continuous colorscales do
+
+        Parameters
+        ----------
+        values : np.ndarray
+            Data being colored
+        name : str
+            Colorscale name
+        cmin : Optional[float], optional
+            Value mapped to the first color, by default the data minimum
+        cmax : Optional[float], optional
+            Value mapped to the last color, by default the data maximum
+        colorscale_file : Optional[str], optional
+            Custom colorscale file, by default None
+
+        Returns
+        -------
+        np.ndarray
+            ``(N, 3)`` uint8 RGB values. NaN values take the first color
+        """
+        import numpy as np
+
+        scale = self.rgb(name, colorscale_file)
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return np.empty((0, 3), dtype=np.uint8)
+
+        cmin = float(np.nanmin(values)) if cmin is None else cmin
+        cmax = float(np.nanmax(values)) if cmax is None else cmax
+        span = cmax - cmin
+
+        # Normalized position within the colorscale
+        position = np.zeros_like(values)
+        if span > 0:
+            np.subtract(values, cmin, out=position)
+            position /= span
+        np.nan_to_num(position, copy=False, nan=0.0)
+        np.clip(position, 0.0, 1.0, out=position)
+
+        # Linear interpolation between neighboring colors
+        position *= len(scale) - 1
+        lower = np.minimum(position.astype(np.intp), len(scale) - 2)
+        weight = (position - lower)[:, np.newaxis]
+        blended = scale[lower] * (1.0 - weight) + scale[lower + 1] * weight
+
+        return np.rint(blended).astype(np.uint8)
+
+    def __scales(self, colorscale_file: Optional[str] = None) -> dict[str, list[str]]:
+        if not self.__builtin:
+            self.__builtin = {**SEQUENTIAL_COLORSCALES, **additional_colorscales()}
+
+        if colorscale_file is None:
+            return self.__builtin
+
+        return {**self.__builtin, **self.__load_file(colorscale_file)}
+
+    def __load_file(self, colorscale_file: str) -> dict[str, list[str]]:
+        """
+        Reads a JSON file of ``{"Name": ["rgb(...)", ...]}`` colorscales
+
+        Results are cached until the file's modification time changes
+
+        Raises
+        ------
+        ValueError
+            Invalid colorscale file contents
+        """
+        path, mtime = self.__file_key(colorscale_file)
+        if path is None:
+            return {}
+
+        cached = self.__files.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        scales = json.loads(path.read_text())
+        if not isinstance(scales, dict) or not all(
+            isinstance(colors, list) and len(colors) >= 2 for colors in scales.values()
+        ):
+            raise ValueError(
+                f"{path} must map colorscale names to lists of at least two colors"
+            )
+
+        for name, colors in scales.items():
+            for color in colors:
+                try:
+                    parse_color(color)
+                except (AttributeError, ValueError):
+                    raise ValueError(
+                        f"{path}: invalid color {color!r} in colorscale '{name}'"
+                    ) from None
+
+        # Drop stale RGB arrays from a previous version of the file
+        self.__rgb = {key: rgb for key, rgb in self.__rgb.items() if key[0] != path}
+        self.__files[path] = (mtime, scales)
+
+        return scales
+
+    @staticmethod
+    def __file_key(colorscale_file: Optional[str]) -> tuple[Optional[Path], int]:
+        if colorscale_file is None:
+            return None, 0
+
+        path = Path(colorscale_file).resolve()
+        return path, path.stat().st_mtime_ns
+
+
+colorscale_registry = ColorscaleRegistry()
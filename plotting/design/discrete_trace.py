@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import plotly.graph_objs.scatter as s
+
+from .row_lookup import IndexMap
+from .trace_line import Trace2D
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from plotly.basedatatypes import BaseTraceType
+
+    from .axis_data import AxisDataCache
+
+
+def run_starts(values: np.ndarray) -> np.ndarray:
+    """
+    Run-length encodes a piecewise constant signal
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Signal samples
+
+    Returns
+    -------
+    np.ndarray
+        Index of the first sample of every run, followed by the final sample
+    """
+    import numpy as np
+
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    changed = np.diff(values) != 0
+    if values.dtype.kind == "f":
+        # NaN differences are nonzero, but a run of NaN is still one run
+        missing = np.isnan(values)
+        changed &= ~(missing[1:] & missing[:-1])
+
+    # The final sample closes the last run, unless it starts one
+    index = np.concatenate(([0], np.flatnonzero(changed) + 1, [len(values) - 1]))
+    return index[np.concatenate(([True], np.diff(index) != 0))]
+
+
+class DiscreteTrace(Trace2D):
+    """
+    Step trace for discrete valued signals
+
+    Only the samples where the y value changes are plotted, drawn with an
+    ``hv`` line shape so each value holds until the next transition
+    """
+
+    def prepare_trace(
+        self,
+        data: pd.DataFrame,
+        grids: list[dict],
+        legendgroup: str | None = None,
+        anchor: dict[str, str] | None = None,
+        axis_data: AxisDataCache | None = None,
+    ) -> tuple[BaseTraceType, list[pd.Series]]:
+        grid = grids[self.variable_template["subplot"] - 1]
+
+        # Create data
+        data_dict: dict[str, pd.Series] = {}
+        for axis in grid["axes"]:
+            data_dict.update(self.get_axis_data(data, axis, axis_data))
+
+        # Transitions keep every value and the full x extent for axis limits
+        index = run_starts(data_dict["y"].to_numpy())
+        data_dict = {name: values.iloc[index] for name, values in data_dict.items()}
+        self.index_map = IndexMap.from_runs(index, len(data))
+
+        # The encoded data no longer matches the shared axis data
+        self.sources.clear()
+
+        scatter = self.build_scatter(data_dict, grid, legendgroup)
+        if anchor:
+            scatter.update(anchor)
+
+        return scatter, list(data_dict.values())
+
+    def get_line(self) -> s.Line:
+        line = super().get_line()
+        line.shape = "hv"
+
+        return line
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Literal, Optional
+
+from .expressions import is_expression, variable_columns
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+DtypeName = Literal["float64", "float32", "auto"]
+
+# Most precise first, used when one column has several policies
+PRECISION_ORDER: list[DtypeName] = ["float64", "auto", "float32"]
+
+# Largest float32 rounding error allowed, in pixels of the plot
+MAX_PIXEL_ERROR = 0.5
+
+
+class DtypePolicy:
+    """
+    Floating point precision of trace data
+
+    Templates choose ``float64`` (default), ``float32`` or ``auto`` with
+    ``layout.dtype``, and variables may override it with their own ``dtype``.
+    ``auto`` uses float32 unless its rounding would be visible at the plot's
+    resolution, or would merge distinct neighboring x values, e.g. absolute
+    epoch times. A float32 template default is checked like ``auto`` on x
+    columns, only variable overrides cast x data unchecked
+    """
+
+    def __init__(
+        self,
+        default: DtypeName = "float64",
+        columns: Optional[dict[str, DtypeName]] = None,
+        x_columns: Optional[set[str]] = None,
+        pixels: int = 1000,
+        data_columns: Optional[set[str]] = None,
+    ) -> None:
+        """Creates the policy
+
+        Parameters
+        ----------
+        default : DtypeName, optional
+            Policy of columns without an override, by default "float64"
+        columns : Optional[dict[str, DtypeName]], optional
+            Per-column overrides, by default None
+        x_columns : Optional[set[str]], optional
+            Columns plotted on x axes, checked for merged samples,
+            by default None
+        pixels : int, optional
+            Plot resolution used by the precision check, by default 1000
+        data_columns : Optional[set[str]], optional
+            Columns the default policy applies to when reading data,
+            by default None (only the overrides)
+        """
+        for name in [default, *(columns or {}).values()]:
+            if name not in PRECISION_ORDER:
+                raise ValueError(
+                    f"Invalid dtype '{name}'. Must be one of {PRECISION_ORDER}"
+                )
+
+        self.default = default
+        self.columns = columns or {}
+        self.x_columns = x_columns or set()
+        self.pixels = pixels
+        self.data_columns = data_columns or set()
+
+    @classmethod
+    def from_template(cls, template: dict) -> "DtypePolicy":
+        default = template["layout"].get("dtype") or "float64"
+
+        # A column read by several variables keeps the most precise policy.
+        # Derived variables cast their result, and are read from their columns
+        columns: dict[str, DtypeName] = {}
+        data_columns: set[str] = set()
+        for variable in template["variables"]:
+            for axis in ("x", "y", "z", "color"):
+                name = variable.get(f"{axis}Variable")
+                if not name:
+                    continue
+
+                read = variable_columns(name)
+                data_columns.update(read)
+                if variable.get("dtype"):
+                    for column in {name, *read}:
+                        columns[column] = min(
+                            columns.get(column, variable["dtype"]),
+                            variable["dtype"],
+                            key=PRECISION_ORDER.index,
+                        )
+
+        # Columns read by derived x variables, e.g. "=time_s - t0", lose the
+        # same precision
+        x_columns = {
+            column
+            for variable in template["variables"]
+            for column in {
+                variable["xVariable"],
+                *variable_columns(variable["xVariable"]),
+            }
+        }
+
+        return cls(
+            default,
+            columns,
+            x_columns,
+            max(template["layout"]["width"], template["layout"]["height"]),
+            data_columns,
+        )
+
+    def policy(self, column: str) -> DtypeName:
+        if column in self.columns:
+            return self.columns[column]
+        if self.default == "float32" and column in self.x_columns:
+            return "auto"
+
+        return self.default
+
+    def apply(self, column: str, series: pd.Series) -> pd.Series:
+        """Casts transformed trace data to the column's dtype
+
+        Parameters
+        ----------
+        column : str
+            Output data column the series was read from
+        series : pd.Series
+            Trace data after unit transformation
+
+        Returns
+        -------
+        pd.Series
+            The series, or a float32 copy when the policy allows it
+        """
+        import pandas as pd
+
+        policy = self.policy(column)
+        if policy == "float64" or series.dtype.kind != "f":
+            return series
+
+        single = series.to_numpy(dtype="float32")
+        if policy == "auto" and not self.is_visually_exact(
+            series.to_numpy(), single, column in self.x_columns
+        ):
+            return series
+
+        return pd.Series(single, index=series.index, name=series.name)
+
+    def is_visually_exact(
+        self, values: np.ndarray, single: np.ndarray, is_x: bool = False
+    ) -> bool:
+        """Whether float32 rounding stays below the plot's resolution
+
+        Parameters
+        ----------
+        values : np.ndarray
+            Original values
+        single : np.ndarray
+            Values rounded to float32
+        is_x : bool, optional
+            Also require distinct neighboring samples to stay distinct,
+            by default False
+
+        Returns
+        -------
+        bool
+            float32 is indistinguishable from the original data
+        """
+        import numpy as np
+
+        finite = np.isfinite(values)
+        if not finite.any():
+            return True
+
+        # Overflow to infinity counts as an infinite error
+        with np.errstate(invalid="ignore", over="ignore"):
+            error = np.abs(single[finite] - values[finite]).max()
+        span = values[finite].max() - values[finite].min()
+        if error > MAX_PIXEL_ERROR * span / self.pixels:
+            return False
+
+        if is_x and len(values) > 1:
+            merged = (np.diff(single) == 0) & (np.diff(values) != 0)
+            if merged.any():
+                return False
+
+        return True
+
+    def read_dtypes(self) -> dict[str, str]:
+        """Columns read directly as float32
+
+        ``auto`` columns are read as float64 and checked once transformed
+        """
+        return {
+            column: "float32"
+            for column in self.data_columns | set(self.columns)
+            if self.policy(column) == "float32" and not is_expression(column)
+        }
+
+    def read_csv(self, path, **kwargs) -> pd.DataFrame:
+        """Reads output data, parsing float32 columns directly as float32"""
+        import pandas as pd
+
+        return pd.read_csv(path, dtype=self.read_dtypes(), **kwargs)
@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+import ast
+import threading
+import weakref
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Mapping, Optional
+
+from .rate_groups import RateGroups
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Template variables starting with this are derived from other columns
+EXPRESSION_PREFIX = "="
+
+# Rows evaluated at a time, so temporaries stay in cache
+CHUNK_SIZE = 1 << 16
+
+
+def _operators() -> dict[type, Callable]:
+    import numpy as np
+
+    return {
+        ast.Add: np.add,
+        ast.Sub: np.subtract,
+        ast.Mult: np.multiply,
+        ast.Div: np.true_divide,
+        ast.FloorDiv: np.floor_divide,
+        ast.Mod: np.mod,
+        ast.Pow: np.power,
+        ast.USub: np.negative,
+        ast.UAdd: np.positive,
+    }
+
+
+def _functions() -> dict[str, Callable]:
+    import numpy as np
+
+    return {
+        name: getattr(np, name)
+        for name in [
+            "abs",
+            "sqrt",
+            "hypot",
+            "exp",
+            "log",
+            "log10",
+            "sin",
+            "cos",
+            "tan",
+            "arcsin",
+            "arccos",
+            "arctan",
+            "arctan2",
+            "degrees",
+            "radians",
+            "minimum",
+            "maximum",
+            "floor",
+            "ceil",
+            "sign",
+        ]
+    }
+
+
+CONSTANTS = {"pi": 3.141592653589793}
+
+# Powers evaluated by a dedicated NumPy function
+SPECIAL_POWERS = {2: "square", 0.5: "sqrt", 1: "positive", -1: "reciprocal"}
+
+
+class Expression:
+    """
+    Arithmetic over output data columns, e.g. ``hypot(tgt_vel_m_s__1, tgt_vel_m_s__2)``
+
+    Only numbers, columns, arithmetic operators and a fixed set of NumPy
+    functions are allowed, so templates cannot run arbitrary code. Columns
+    whose names are not identifiers are read with ``col("name")``. Rows are
+    evaluated in chunks, reusing each chunk's temporaries in place, so only
+    the result is allocated at full size
+    """
+
+    def __init__(self, source: str) -> None:
+        """Parses and validates an expression
+
+        Parameters
+        ----------
+        source : str
+            Expression, without the template's ``=`` prefix
+
+        Raises
+        ------
+        ValueError
+            Invalid syntax or a disallowed construct
+        """
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+        except SyntaxError as error:
+            raise ValueError(f"Invalid expression '{source}': {error.msg}") from None
+
+        self.source = source
+        self.columns: list[str] = []
+        self.__operators = _operators()
+        self.__functions = _functions()
+        self.__body = self.__validate(tree.body)
+
+        # Formatting does not change the result
+        self.key = ast.dump(self.__body)
+
+    def evaluate(self, columns: Mapping[str, np.ndarray]) -> np.ndarray:
+        """Evaluates the expression over every row
+
+        Parameters
+        ----------
+        columns : Mapping[str, np.ndarray]
+            Values of every column in ``columns``, of equal length
+
+        Returns
+        -------
+        np.ndarray
+            float64 result
+        """
+        import numpy as np
+
+        length = len(columns[self.columns[0]]) if self.columns else 1
+        result = np.empty(length, dtype=np.float64)
+        for start in range(0, length, CHUNK_SIZE):
+            stop = min(start + CHUNK_SIZE, length)
+            chunk = {name: columns[name][start:stop] for name in self.columns}
+            result[start:stop], _ = self.__evaluate(self.__body, chunk)
+
+        return result
+
+    def __validate(self, node: ast.expr) -> ast.expr:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node
+
+        if isinstance(node, ast.Name):
+            if node.id not in CONSTANTS and node.id not in self.columns:
+                self.columns.append(node.id)
+            return node
+
+        if isinstance(node, ast.BinOp) and type(node.op) in self.__operators:
+            node.left = self.__validate(node.left)
+            node.right = self.__validate(node.right)
+            return node
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in self.__operators:
+            node.operand = self.__validate(node.operand)
+            return node
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            name = node.func.id
+            if node.keywords:
+                raise ValueError(f"Invalid expression '{self.source}': keywords")
+
+            # Quoted column names
+            if name == "col" and len(node.args) == 1:
+                argument = node.args[0]
+                if isinstance(argument, ast.Constant) and isinstance(
+                    argument.value, str
+                ):
+                    column = ast.Name(id=argument.value, ctx=ast.Load())
+                    if column.id not in self.columns:
+                        self.columns.append(column.id)
+                    return column
+
+            if name in self.__functions:
+                # Extra arguments would be taken as the ufunc's output array
+                arity = self.__functions[name].nin
+                if len(node.args) != arity:
+                    raise ValueError(
+                        f"Invalid expression '{self.source}': '{name}' takes "
+                        f"{arity} argument{'s' if arity > 1 else ''}, "
+                        f"got {len(node.args)}"
+                    )
+                node.args = [self.__validate(argument) for argument in node.args]
+                return node
+
+            raise ValueError(f"Invalid expression '{self.source}': unknown '{name}'")
+
+        raise ValueError(
+            f"Invalid expression '{self.source}': "
+            f"'{ast.unparse(node)}' is not allowed"
+        )
+
+    def __evaluate(
+        self, node: ast.expr, chunk: dict[str, np.ndarray]
+    ) -> tuple[np.ndarray | float, bool]:
+        """Chunk result and whether it is a temporary that may be overwritten"""
+        import numpy as np
+
+        if isinstance(node, ast.Constant):
+            return float(node.value), False
+
+        if isinstance(node, ast.Name):
+            if node.id in CONSTANTS and node.id not in chunk:
+                return CONSTANTS[node.id], False
+
+            values = chunk[node.id]
+            if values.dtype != np.float64:
+                return values.astype(np.float64), True
+            return values, False
+
+        if isinstance(node, ast.UnaryOp):
+            operand, temporary = self.__evaluate(node.operand, chunk)
+            function = self.__operators[type(node.op)]
+            return self.__apply(function, [(operand, temporary)])
+
+        if isinstance(node, ast.BinOp):
+            if (
+                isinstance(node.op, ast.Pow)
+                and isinstance(node.right, ast.Constant)
+                and node.right.value in SPECIAL_POWERS
+            ):
+                # Common powers without the general (slow) power loop
+                function = getattr(np, SPECIAL_POWERS[node.right.value])
+                return self.__apply(function, [self.__evaluate(node.left, chunk)])
+
+            function = self.__operators[type(node.op)]
+            operands = [self.__evaluate(node.left, chunk)]
+            operands.append(self.__evaluate(node.right, chunk))
+            return self.__apply(function, operands)
+
+        function = self.__functions[node.func.id]
+        return self.__apply(
+            function, [self.__evaluate(argument, chunk) for argument in node.args]
+        )
+
+    @staticmethod
+    def __apply(
+        function: Callable, operands: list[tuple[np.ndarray | float, bool]]
+    ) -> tuple[np.ndarray | float, bool]:
+        import numpy as np
+
+        values = [value for value, _ in operands]
+        if not any(isinstance(value, np.ndarray) for value in values):
+            return float(function(*values)), False
+
+        # Write into a temporary operand instead of allocating another chunk,
+        # never into a column of the caller's data
+        out = next(
+            (
+                value
+                for value, temporary in operands
+                if temporary and isinstance(value, np.ndarray)
+            ),
+            None,
+        )
+        if out is None:
+            return function(*values), True
+
+        return function(*values, out=out), True
+
+
+@lru_cache(maxsize=None)
+def parse_expression(source: str) -> Expression:
+    """Parsed expression, each distinct source parsed once"""
+    return Expression(source)
+
+
+def is_expression(variable: str) -> bool:
+    """Template variable derived from other columns, e.g. ``=hypot(a, b)``"""
+    return variable.startswith(EXPRESSION_PREFIX)
+
+
+def variable_columns(variable: str) -> list[str]:
+    """Output data columns read by a template variable"""
+    if not is_expression(variable):
+        return [variable]
+
+    return list(parse_expression(variable[len(EXPRESSION_PREFIX) :]).columns)
+
+
+class _DerivedCache:
+    """
+    Derived columns of each dataset, evaluated once per expression
+
+    Entries are dropped with their dataset, and evaluated again when a column
+    they read was replaced, e.g. by ``df["a"] = ...``. Results are read-only
+    since every trace and subplot reading the expression shares them
+    """
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__results: dict[
+            int, dict[tuple[Optional[str], str], tuple[list[np.ndarray], np.ndarray]]
+        ] = {}
+
+    def get(
+        self,
+        data: pd.DataFrame | RateGroups,
+        expression: Expression,
+        group: Optional[str],
+    ) -> np.ndarray:
+        import numpy as np
+
+        if isinstance(data, RateGroups):
+            columns = {
+                name: data.aligned(name, group).to_numpy()
+                for name in expression.columns
+            }
+        else:
+            columns = {name: data[name].to_numpy() for name in expression.columns}
+
+        key = (group, expression.key)
+        results = self.__dataset(data)
+        entry = results.get(key)
+        if entry is not None and all(
+            _same_buffer(source, columns[name])
+            for source, name in zip(entry[0], expression.columns)
+        ):
+            return entry[1]
+
+        values = expression.evaluate(columns)
+        if not expression.columns:
+            # Constant expressions span every row
+            values = np.full(len(_index(data, group)), values[0])
+        values.flags.writeable = False
+
+        # The inputs are kept so their buffers cannot be reused by other data
+        # while the entry exists
+        results[key] = ([columns[name] for name in expression.columns], values)
+        return values
+
+    def __dataset(self, data: pd.DataFrame | RateGroups) -> dict:
+        with self.__lock:
+            identity = id(data)
+            if identity not in self.__results:
+                self.__results[identity] = {}
+                weakref.finalize(data, self.__results.pop, identity, None)
+
+            return self.__results[identity]
+
+
+def _same_buffer(old: np.ndarray, new: np.ndarray) -> bool:
+    """Whether two arrays view the same memory the same way"""
+    return (
+        old.__array_interface__["data"][0] == new.__array_interface__["data"][0]
+        and old.shape == new.shape
+        and old.strides == new.strides
+        and old.dtype == new.dtype
+    )
+
+
+_derived = _DerivedCache()
+
+
+def _index(data: pd.DataFrame | RateGroups, group: Optional[str]) -> pd.Index:
+    if isinstance(data, RateGroups):
+        return data.groups[group or next(iter(data.groups))].index
+
+    return data.index
+
+
+def resolve_column(
+    data: pd.DataFrame | RateGroups, variable: str, group: Optional[str] = None
+) -> pd.Series:
+    """Column data of a template variable, evaluating derived variables
+
+    Parameters
+    ----------
+    data : pd.DataFrame | RateGroups
+        Output data
+    variable : str
+        Column name or ``=`` prefixed expression
+    group : Optional[str], optional
+        Rate group time base for ``RateGroups`` data, by default None
+
+    Returns
+    -------
+    pd.Series
+        Column data, derived columns shared by every caller of the same
+        dataset, expression and rate group
+    """
+    import pandas as pd
+
+    if not is_expression(variable):
+        if isinstance(data, RateGroups):
+            return data.aligned(variable, group)
+        return data[variable]
+
+    expression = parse_expression(variable[len(EXPRESSION_PREFIX) :])
+    return pd.Series(
+        _derived.get(data, expression, group),
+        index=_index(data, group),
+        name=variable,
+        copy=False,
+    )
@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Literal, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+    import plotly.graph_objects as go
+
+Codec = Literal["zlib", "lzma", "zstd"]
+
+CODECS: list[Codec] = ["zlib", "lzma", "zstd"]
+
+# Magic, format version, codec index, dictionary id and header length
+PREFIX = struct.Struct("<4sBB16sI")
+MAGIC = b"PFIG"
+VERSION = 1
+NO_DICTIONARY = bytes(16)
+
+# Numeric arrays shorter than this stay in the header JSON
+MIN_CHUNK_SIZE = 16
+
+# Largest dictionary zlib can use, its window size
+ZLIB_DICTIONARY_SIZE = 32768
+
+# Trace attribute replaced by a chunk, e.g. ``{"$chunk": 3}``
+CHUNK_KEY = "$chunk"
+
+
+def figure_dict(figure: go.Figure | dict | str) -> dict:
+    """Figure as a ``{"data", "layout"}`` dict with numeric lists as arrays
+
+    Accepts figures, their dicts or JSON such as ``PlotBase.to_json`` output.
+    Nulls in numeric lists are read as NaN
+    """
+    import numpy as np
+    import plotly.graph_objects as go
+
+    if isinstance(figure, go.Figure):
+        return figure.to_plotly_json()
+
+    if isinstance(figure, str):
+        figure = json.loads(figure)
+
+    def arrays(value):
+        if isinstance(value, dict):
+            return {name: arrays(item) for name, item in value.items()}
+        if isinstance(value, list):
+            numbers = [
+                isinstance(item, (int, float)) and not isinstance(item, bool)
+                for item in value
+            ]
+            if (
+                len(value) >= MIN_CHUNK_SIZE
+                and any(numbers)
+                and all(number or item is None for number, item in zip(numbers, value))
+            ):
+                # JSON writes NaN as null
+                if all(numbers):
+                    return np.asarray(value)
+                return np.array(value, dtype=np.float64)
+            return [arrays(item) for item in value]
+        return value
+
+    return {
+        "data": [arrays(trace) for trace in figure.get("data", [])],
+        "layout": figure.get("layout", {}),
+    }
+
+
+def shuffle(array: np.ndarray) -> bytes:
+    """Groups the n-th byte of every element, so exponents compress together"""
+    import numpy as np
+
+    array = np.ascontiguousarray(array)
+    array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+    if array.dtype.itemsize == 1:
+        return array.tobytes()
+
+    return array.view(np.uint8).reshape(-1, array.dtype.itemsize).T.tobytes()
+
+
+def unshuffle(data: bytes, dtype: str, shape: list[int]) -> np.ndarray:
+    import numpy as np
+
+    dtype = np.dtype("<" + dtype)
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(dtype.itemsize, -1)
+    return np.ascontiguousarray(planes.T).view(dtype).reshape(shape)
+
+
+class FigureStore:
+    """
+    Directory of compressed figures
+
+    Each figure is one file holding a compressed header with the layout and
+    trace attributes, followed by one independently compressed chunk per
+    numeric trace array. Identical arrays, e.g. a time axis shared by every
+    trace, are stored once. Headers of similar figures compress against a
+    dictionary trained on them, stored under ``dictionaries``
+
+    zlib and lzma come with the standard library, zstd requires the
+    ``zstandard`` package. Only zlib and zstd support dictionaries
+    """
+
+    def __init__(
+        self, directory: str | Path, codec: Codec = "zlib", level: int = 6
+    ) -> None:
+        """Opens the store, creating the directory if needed
+
+        Parameters
+        ----------
+        directory : str | Path
+            Store directory
+        codec : Codec, optional
+            Compression of written figures, by default "zlib"
+        level : int, optional
+            Compression level, by default 6
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Invalid codec '{codec}'. Must be one of {CODECS}")
+
+        self.directory = Path(directory)
+        self.directory.joinpath("dictionaries").mkdir(parents=True, exist_ok=True)
+        self.codec = codec
+        self.level = level
+
+    def path(self, name: str) -> Path:
+        return self.directory.joinpath(f"{name}.pfig")
+
+    def train_dictionary(
+        self, figures: Iterable[go.Figure | dict | str], size: int = 32768
+    ) -> str:
+        """Trains a dictionary on the headers of similar figures
+
+        Parameters
+        ----------
+        figures : Iterable[go.Figure | dict | str]
+            Sample figures, e.g. built from one template
+        size : int, optional
+            Dictionary size in bytes, by default 32768
+
+        Returns
+        -------
+        str
+            Dictionary id passed to ``write``
+        """
+        samples = [
+            self.__header_bytes(*_split_arrays(figure_dict(figure))[::2])
+            for figure in figures
+        ]
+
+        if self.codec == "zlib":
+            # Later bytes are closer to the data, so the most common
+            # content goes last
+            dictionary = b"".join(samples)[-min(size, ZLIB_DICTIONARY_SIZE) :]
+        elif self.codec == "zstd":
+            import zstandard
+
+            dictionary = zstandard.train_dictionary(size, samples).as_bytes()
+        else:
+            raise ValueError(f"Codec '{self.codec}' does not support dictionaries")
+
+        dictionary_id = hashlib.blake2b(dictionary, digest_size=16).hexdigest()
+        self.__dictionary_path(dictionary_id).write_bytes(dictionary)
+
+        return dictionary_id
+
+    def write(
+        self,
+        name: str,
+        figure: go.Figure | dict | str,
+        dictionary: Optional[str] = None,
+    ) -> Path:
+        """Stores a figure
+
+        Parameters
+        ----------
+        name : str
+            Figure name in the store
+        figure : go.Figure | dict | str
+            Figure, its dict or its JSON
+        dictionary : Optional[str], optional
+            Dictionary id from ``train_dictionary``, by default None
+
+        Returns
+        -------
+        Path
+            Written file
+        """
+        if dictionary is not None and self.codec == "lzma":
+            raise ValueError("Codec 'lzma' does not support dictionaries")
+
+        layout, arrays, traces = _split_arrays(figure_dict(figure))
+        zdict = None if dictionary is None else self.__dictionary(dictionary)
+
+        chunks = []
+        index = []
+        offset = 0
+        for array in arrays:
+            data = _compress(self.codec, shuffle(array), self.level, zdict)
+            index.append([offset, len(data), array.dtype.str[1:], list(array.shape)])
+            chunks.append(data)
+            offset += len(data)
+
+        header = _compress(
+            self.codec, self.__header_bytes(layout, traces, index), self.level, zdict
+        )
+        prefix = PREFIX.pack(
+            MAGIC,
+            VERSION,
+            CODECS.index(self.codec),
+            NO_DICTIONARY if dictionary is None else bytes.fromhex(dictionary),
+            len(header),
+        )
+
+        path = self.path(name)
+        temporary = path.with_suffix(".tmp")
+        with temporary.open("wb") as file:
+            file.write(prefix)
+            file.write(header)
+            for chunk in chunks:
+                file.write(chunk)
+        temporary.replace(path)
+
+        return path
+
+    def open(self, name: str) -> StoredFigure:
+        return StoredFigure(self.path(name), self.__dictionary)
+
+    def read(self, name: str, traces: Optional[Iterable[int]] = None) -> go.Figure:
+        """Reads a figure, or only some of its traces"""
+        with self.open(name) as stored:
+            return stored.figure(traces)
+
+    def __dictionary_path(self, dictionary_id: str) -> Path:
+        return self.directory.joinpath("dictionaries", f"{dictionary_id}.dict")
+
+    def __dictionary(self, dictionary_id: str) -> bytes:
+        return self.__dictionary_path(dictionary_id).read_bytes()
+
+    @staticmethod
+    def __header_bytes(layout: dict, traces: list[dict], index=None) -> bytes:
+        from plotly.utils import PlotlyJSONEncoder
+
+        header = {"layout": layout, "data": traces, "chunks": index or []}
+        return json.dumps(header, cls=PlotlyJSONEncoder).encode("utf-8")
+
+
+class StoredFigure:
+    """
+    Figure file opened for reading
+
+    The header is decoded on open, trace arrays only when their trace is read
+    """
+
+    def __init__(self, path: Path, dictionaries: Callable[[str], bytes]) -> None:
+        """Reads the header of a stored figure
+
+        Parameters
+        ----------
+        path : Path
+            Figure file
+        dictionaries : Callable[[str], bytes]
+            Dictionary bytes by id
+        """
+        self.path = path
+        self.__file = path.open("rb")
+        self.__buffer = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, codec, dictionary_id, length = PREFIX.unpack_from(self.__buffer)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} figure file")
+
+        self.codec = CODECS[codec]
+        self.__zdict = (
+            None
+            if dictionary_id == NO_DICTIONARY
+            else dictionaries(dictionary_id.hex())
+        )
+
+        header = json.loads(
+            _decompress(
+                self.codec,
+                self.__buffer[PREFIX.size : PREFIX.size + length],
+                self.__zdict,
+            )
+        )
+        self.layout: dict = header["layout"]
+        self.traces: list[dict] = header["data"]
+        self.__chunks: list[list] = header["chunks"]
+        self.__start = PREFIX.size + length
+
+    def __len__(self) -> int:
+        return len(self.traces)
+
+    def trace(self, index: int) -> dict:
+        """Trace attributes with its arrays decoded
+
+        Parameters
+        ----------
+        index : int
+            Trace index
+
+        Returns
+        -------
+        dict
+            Trace dict accepted by ``go.Figure``
+        """
+        decoded: dict[int, np.ndarray] = {}
+
+        def resolve(value):
+            if isinstance(value, dict):
+                if set(value) == {CHUNK_KEY}:
+                    chunk = value[CHUNK_KEY]
+                    if chunk not in decoded:
+                        decoded[chunk] = self.__array(chunk)
+                    return decoded[chunk]
+                return {name: resolve(item) for name, item in value.items()}
+            if isinstance(value, list):
+                return [resolve(item) for item in value]
+            return value
+
+        return resolve(self.traces[index])
+
+    def figure(self, traces: Optional[Iterable[int]] = None) -> go.Figure:
+        """Figure with all or some of its traces
+
+        Parameters
+        ----------
+        traces : Optional[Iterable[int]], optional
+            Trace indices to decode, by default all
+
+        Returns
+        -------
+        go.Figure
+            Equivalent of the stored figure
+        """
+        import plotly.graph_objects as go
+
+        indices = range(len(self.traces)) if traces is None else traces
+        return go.Figure(
+            data=[self.trace(index) for index in indices], layout=self.layout
+        )
+
+    def close(self) -> None:
+        self.__buffer.close()
+        self.__file.close()
+
+    def __enter__(self) -> "StoredFigure":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __array(self, chunk: int) -> np.ndarray:
+        offset, length, dtype, shape = self.__chunks[chunk]
+        start = self.__start + offset
+        data = _decompress(
+            self.codec, self.__buffer[start : start + length], self.__zdict
+        )
+        return unshuffle(data, dtype, shape)
+
+
+def _split_arrays(figure: dict) -> tuple[dict, list[np.ndarray], list[dict]]:
+    """Replaces numeric trace arrays with chunk references
+
+    Returns the layout, the distinct arrays and the traces referencing them
+    """
+    import numpy as np
+
+    arrays: list[np.ndarray] = []
+    chunks: dict[tuple, int] = {}
+
+    def split(value):
+        if isinstance(value, dict):
+            return {name: split(item) for name, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [split(item) for item in value]
+        if (
+            isinstance(value, np.ndarray)
+            and value.dtype.kind in "fiu"
+            and value.size >= MIN_CHUNK_SIZE
+        ):
+            # Plotly copies shared arrays per trace, so dedupe by content
+            key = (
+                value.dtype.str,
+                value.shape,
+                hashlib.blake2b(
+                    np.ascontiguousarray(value).data, digest_size=16
+                ).digest(),
+            )
+            if key not in chunks:
+                chunks[key] = len(arrays)
+                arrays.append(value)
+            return {CHUNK_KEY: chunks[key]}
+        return value
+
+    traces = [split(trace) for trace in figure["data"]]
+    return figure["layout"], arrays, traces
+
+
+def _compress(codec: Codec, data: bytes, level: int, zdict: Optional[bytes]) -> bytes:
+    if codec == "zlib":
+        import zlib
+
+        if zdict is None:
+            return zlib.compress(data, level)
+        compressor = zlib.compressobj(level, zdict=zdict)
+        return compressor.compress(data) + compressor.flush()
+
+    if codec == "lzma":
+        import lzma
+
+        return lzma.compress(data, preset=level)
+
+    import zstandard
+
+    dictionary = None if zdict is None else zstandard.ZstdCompressionDict(zdict)
+    return zstandard.ZstdCompressor(level=level, dict_data=dictionary).compress(data)
+
+
+def _decompress(codec: Codec, data: bytes, zdict: Optional[bytes]) -> bytes:
+    if codec == "zlib":
+        import zlib
+
+        if zdict is None:
+            return zlib.decompress(data)
+        decompressor = zlib.decompressobj(zdict=zdict)
+        return decompressor.decompress(data) + decompressor.flush()
+
+    if codec == "lzma":
+        import lzma
+
+        return lzma.decompress(data)
+
+    import zstandard
+
+    dictionary = None if zdict is None else zstandard.ZstdCompressionDict(zdict)
+    return zstandard.ZstdDecompressor(dict_data=dictionary).decompress(data)
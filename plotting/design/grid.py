@@ -1,10 +1,13 @@
-from enum import Enum
-from typing import Literal
+from __future__ import annotations
 
-import pandas as pd
+from enum import Enum
+from typing import TYPE_CHECKING, Literal
 
 from .unit_conversion import unit_transformation
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 AxisName = Literal["x", "y", "z"]
 
 
@@ -16,8 +19,36 @@ class AxisType(str, Enum):
     MANUAL = "Manual"
 
 
+class AxisStats:
+    """
+    Extent of one trace axis, standing in for its data when computing limits
+
+    Provides the ``min``/``max`` used from a Series, without keeping the data
+    """
+
+    __slots__ = ("minimum", "maximum", "count")
+
+    def __init__(self, minimum: float, maximum: float, count: int) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.count = count
+
+    @classmethod
+    def from_data(cls, data: pd.Series) -> "AxisStats":
+        return cls(data.min(), data.max(), len(data))
+
+    def min(self) -> float:
+        return self.minimum
+
+    def max(self) -> float:
+        return self.maximum
+
+
 def update_2d_grid(
-    trace_data: list[pd.Series], axes_dict: dict, grid: dict, plot_number: int
+    trace_data: list[pd.Series] | list[AxisStats],
+    axes_dict: dict,
+    grid: dict,
+    plot_number: int,
 ) -> None:
     # Visual bounds for an axis
     limits = __axis_limits(grid["axisType"], grid["axes"], trace_data)
@@ -28,8 +59,8 @@ def update_2d_grid(
         if name not in axes_dict:
             axes_dict[name] = {}
 
-        # Create axis info
-        axes_dict[name] = __get_axis_layout(axis, limits[index])
+        # Create axis info, keeping any subplot domain and anchors
+        axes_dict[name].update(__get_axis_layout(axis, limits[index]))
         axes_dict[name]["title"]["standoff"] = 8 if "y" in name else 1
 
         # Set plot domain location within the grid
@@ -38,7 +69,10 @@ def update_2d_grid(
 
 
 def update_3d_grid(
-    trace_data: list[pd.Series], axes_dict: dict, grid: dict, plot_number: int
+    trace_data: list[pd.Series] | list[AxisStats],
+    axes_dict: dict,
+    grid: dict,
+    plot_number: int,
 ) -> None:
     # Visual bounds for an axis
     limits = __axis_limits(grid["axisType"], grid["axes"], trace_data)
@@ -59,12 +93,10 @@ def update_3d_grid(
 
         # Set plot domain location within the grid
         if grid["overwriteDomain"] and axis["name"] in ["x", "y"]:
-            axes_dict[scene_name]["domain"] = {
-                axis["name"]: [
-                    axis["domainMin"],
-                    axis["domainMax"],
-                ]
-            }
+            axes_dict[scene_name].setdefault("domain", {})[axis["name"]] = [
+                axis["domainMin"],
+                axis["domainMax"],
+            ]
 
     # Set camera fields
     axes_dict[scene_name]["camera"] = {
@@ -74,8 +106,10 @@ def update_3d_grid(
 
 
 def __axis_limits(
-    axis_type: AxisType, axes: dict, data: list[pd.Series]
+    axis_type: AxisType, axes: dict, data: list[pd.Series] | list[AxisStats]
 ) -> pd.Series | list[None]:
+    import pandas as pd
+
     if axis_type == AxisType.MANUAL:
         return [
             unit_transformation(
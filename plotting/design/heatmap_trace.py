@@ -1,20 +1,34 @@
-import inspect
+from __future__ import annotations
+
+import math
 from decimal import Decimal, getcontext
-from typing import Optional, TypedDict
+from typing import TYPE_CHECKING, Optional, TypedDict
 
-import numpy as np
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import plotly.graph_objs.scatter as s
-from plotly.basedatatypes import BaseTraceType
 
-from .colorscales import additional_colorscales
+from .colorscales import colorscale_registry
+from .expressions import resolve_column
+from .quantile_sketch import QuantileSketch
 from .trace_line import Trace2D
 
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from plotly.basedatatypes import BaseTraceType
+
+    from .axis_data import AxisDataCache
+
+
+# Automatic heatmap levels of a grid's ``autoLevels``: edges at evenly spaced
+# quantiles of the color values, or evenly spaced round numbers
+AUTO_LEVELS = ("quantile", "nice")
+
+# Heatmap bins of automatic levels, unless the grid sets ``levelCount``
+DEFAULT_LEVEL_COUNT = 10
+
 
 class LevelDict(TypedDict):
-    """Structure of a level item"""
+    """Structure of a level item, a single edge when start equals stop"""
 
     start: float
     stop: float
@@ -26,44 +40,49 @@ class HeatMapTrace(Trace2D):
         super().__init__(variable_template)
         self.heatmap: HeatMap | None = None
 
-    def add_trace(
+    def prepare_trace(
         self,
-        fig: go.Figure,
         data: pd.DataFrame,
         grids: list[dict],
-        row: int | None = None,
-        col: int | None = None,
         legendgroup: str | None = None,
-    ) -> list[pd.Series]:
+        anchor: dict[str, str] | None = None,
+        axis_data: AxisDataCache | None = None,
+    ) -> tuple[BaseTraceType, list[pd.Series]]:
         grid = grids[self.variable_template["subplot"] - 1]
-        color = data[self.variable_template["colorVariable"]]
+        color = resolve_column(data, self.variable_template["colorVariable"])
+
+        contours = None
+        if grid.get("autoLevels"):
+            contours = auto_levels(
+                color.to_numpy(),
+                grid["autoLevels"],
+                grid.get("levelCount") or DEFAULT_LEVEL_COUNT,
+            )
 
         # Create data
         data_dict: dict[str, pd.Series] = {}
         for axis in grid["axes"]:
-            data_dict.update(self.get_axis_data(data, axis))
+            data_dict.update(self.get_axis_data(data, axis, axis_data))
 
         # Heatmap for this trace
         self.heatmap = HeatMap(
             self.variable_template["colorVariable"],
-            data[self.variable_template["colorVariable"]],
+            color,
             max(d.max() for d in data_dict.values()),
             len(color),
-            None,
-            None,
+            grid.get("colorScaleFile"),
+            contours,
             grid["colorBarTitle"],
             grid["colorScale"],
             grid["showColorBar"],
+            grid.get("autoLevels") == "quantile",
         )
 
-        # Add trace
-        fig.add_trace(
-            self.build_scatter(data_dict, grid, legendgroup),
-            row=row,
-            col=col,
-        )
+        scatter = self.build_scatter(data_dict, grid, legendgroup)
+        if anchor:
+            scatter.update(anchor)
 
-        return list(data_dict.values())
+        return scatter, list(data_dict.values())
 
     def build_scatter(
         self, data: dict[str, pd.Series], grid: dict, legendgroup: str | None = None
@@ -76,6 +95,13 @@ class HeatMapTrace(Trace2D):
 
         return scatter
 
+    def _style_marker(self) -> dict:
+        # Marker colors and the colorbar come from the heatmap levels
+        return {
+            "size": self.variable_template["markerSize"],
+            "symbol": self.variable_template["markerType"].lower(),
+        }
+
     def get_marker(self) -> s.Marker:
         if self.heatmap is None:
             raise ValueError("Heatmap is undefined")
@@ -90,6 +116,104 @@ class HeatMapTrace(Trace2D):
         return marker
 
 
+def auto_levels(
+    values: np.ndarray | pd.Series, mode: str, count: int = DEFAULT_LEVEL_COUNT
+) -> list[LevelDict]:
+    """Heatmap levels fitted to color values in one pass
+
+    Parameters
+    ----------
+    values : np.ndarray | pd.Series
+        Color values
+    mode : str
+        One of AUTO_LEVELS
+    count : int, optional
+        Number of bins, by default DEFAULT_LEVEL_COUNT
+
+    Returns
+    -------
+    list[LevelDict]
+        Levels for ``HeatMap``
+    """
+    sketch = QuantileSketch()
+    sketch.update(values)
+    return sketch_levels(sketch, mode, count)
+
+
+def sketch_levels(
+    sketch: QuantileSketch, mode: str, count: int = DEFAULT_LEVEL_COUNT
+) -> list[LevelDict]:
+    """Heatmap levels of sketched color values, e.g. merged from chunks
+
+    Quantile levels put about the same number of points in every bin, and
+    are colored as bands (see ``HeatMap``) so each bin gets an even share of
+    the colorscale. Nice levels span the values with a 1, 2, 2.5 or 5 times a
+    power of ten step
+
+    Parameters
+    ----------
+    sketch : QuantileSketch
+        Sketch of the color values
+    mode : str
+        One of AUTO_LEVELS
+    count : int, optional
+        Number of bins, by default DEFAULT_LEVEL_COUNT. Nice levels may have
+        a few more, and quantile levels fewer when quantiles repeat
+
+    Returns
+    -------
+    list[LevelDict]
+        Levels for ``HeatMap``, empty without values
+    """
+    import numpy as np
+
+    if mode not in AUTO_LEVELS:
+        raise ValueError(f"Invalid autoLevels '{mode}'. Must be one of {AUTO_LEVELS}")
+    if count < 1:
+        raise ValueError("Heatmaps need at least one level")
+    if sketch.count == 0:
+        return []
+
+    low, high = sketch.min, sketch.max
+    if low == high:
+        return [{"start": low, "stop": high, "step": 1.0}]
+
+    if mode == "nice":
+        # Power of ten of the mean bin width
+        magnitude = 10.0 ** math.floor(math.log10((high - low) / count))
+        step = next(
+            factor * magnitude
+            for factor in (1.0, 2.0, 2.5, 5.0, 10.0)
+            if factor * magnitude * count >= high - low
+        )
+        return [
+            {
+                "start": _round(math.floor(low / step) * step),
+                "stop": _round(math.ceil(high / step) * step),
+                "step": _round(step),
+            }
+        ]
+
+    edges = np.unique(sketch.quantiles(np.linspace(0.0, 1.0, count + 1)))
+    if len(edges) > 2:
+        # Two significant digits of each edge's narrowest neighboring bin, so
+        # skewed values keep their narrow bins
+        widths = np.diff(edges)
+        narrowest = np.minimum(np.append(widths, np.inf), np.append(np.inf, widths))
+        magnitudes = 10.0 ** np.floor(np.log10(narrowest))
+        edges = np.unique(np.round(edges / magnitudes, 1) * magnitudes)
+    widths = np.append(np.diff(edges), edges[-1] - edges[-2] if len(edges) > 1 else 1)
+    return [
+        {"start": _round(edge), "stop": _round(edge), "step": _round(width)}
+        for edge, width in zip(edges.tolist(), widths.tolist())
+    ]
+
+
+def _round(value: float) -> float:
+    """Drops the binary rounding noise of level arithmetic, e.g. 0.30000000000000004"""
+    return float(f"{value:.12g}")
+
+
 class HeatMap:
     """
     A specialized trace data variable the creates a Plotly heatmap
@@ -106,6 +230,7 @@ class HeatMap:
         colorBarTitle: Optional[str] = None,
         colorScale: str = "",
         color: bool = False,
+        banded: bool = False,
         **kwargs,
     ) -> None:
         """Creates a heatmap variable
@@ -121,7 +246,7 @@ class HeatMap:
         default_length : Optional[int], optional
             Size of the default heatmap, by default None
         colorscale_file : Optional[str], optional
-            Custom colorscale file containing Parula, by default None
+            Custom JSON colorscale file mapping names to colors, by default None
         contours : Optional[list[LevelDict]], optional
             User defined heatmap levels, by default None
         colorBarTitle : Optional[str], optional
@@ -130,14 +255,20 @@ class HeatMap:
             Color scale to apply, by default ""
         color : bool, optional
             Show the colorbar, by default False
+        banded : bool, optional
+            Color each bin with one color of the scale, so uneven levels share
+            the colors evenly, by default False
         """
+        # Digitizing replaces data rather than modifying it, so both can share
+        # the color values
         self.data = self.__create_colors(colors, default_max, default_length)
-        self.colors = self.data.copy()
+        self.colors = self.data
 
         self.color_variable = name
         self.title = colorBarTitle
         self.color_scale = colorScale
         self.show_colorbar = color
+        self.banded = banded
 
         # User defined heatmap bins
         self.levels = [] if contours is None else contours
@@ -229,6 +360,9 @@ class HeatMap:
         pd.Series
             Heatmap color values
         """
+        import numpy as np
+        import pandas as pd
+
         if colors is not None:
             return colors
 
@@ -265,13 +399,34 @@ class HeatMap:
         self.__cmax = bins[-1] if len(bins) > 0 else None
 
         # Apply the colorscale
-        custom_colors = additional_colorscales()
-        scale = (
-            custom_colors[self.color_scale]
-            if self.color_scale in custom_colors
-            else getattr(px.colors.sequential, self.color_scale)
+        if self.banded and len(bins) > 2:
+            self.__color_scale_values = self.__banded_scale(bins, colorscale_file)
+        else:
+            self.__color_scale_values = colorscale_registry.plotly_colorscale(
+                self.color_scale, colorscale_file
+            )
+
+    def __banded_scale(
+        self, bins: np.ndarray, colorscale_file: Optional[str] = None
+    ) -> list[list[float | str]]:
+        """Colorscale with one color per bin, changing at the bin edges"""
+        import numpy as np
+
+        colors = colorscale_registry.map_values(
+            np.linspace(0.0, 1.0, len(bins) - 1),
+            self.color_scale,
+            0.0,
+            1.0,
+            colorscale_file,
         )
-        self.__color_scale_values = px.colors.make_colorscale(scale)
+        positions = ((bins - bins[0]) / (bins[-1] - bins[0])).tolist()
+
+        scale: list[list[float | str]] = []
+        for index, (red, green, blue) in enumerate(colors.tolist()):
+            color = f"rgb({red}, {green}, {blue})"
+            scale += [[positions[index], color], [positions[index + 1], color]]
+
+        return scale
 
     def __generate_bins(self) -> np.ndarray:
         """
@@ -284,6 +439,8 @@ class HeatMap:
         np.ndarray
             Color container bins
         """
+        import numpy as np
+
         getcontext().prec = 15
 
         bins = np.array([])
@@ -317,25 +474,30 @@ class HeatMap:
         bins : np.ndarray
             Color container bins
         """
+        import numpy as np
+        import pandas as pd
+
+        # Values below the first bin belong to it
         bin_idx = np.searchsorted(bins, self.colors, side="right")
-        bin_idx[self.colors < bins[0]] = 1
-        self.data = pd.Series(bins[bin_idx - 1])
+        bin_idx -= 1
+        np.maximum(bin_idx, 0, out=bin_idx)
+        self.data = pd.Series(bins[bin_idx])
 
     @staticmethod
     def supported_colorscales(
-        _custom_colorscale_file: Optional[str] = None,
+        custom_colorscale_file: Optional[str] = None,
     ) -> list[str]:
         """
         List of supported heatmap colorscales
 
+        Parameters
+        ----------
+        custom_colorscale_file : Optional[str], optional
+            Custom colorscale file adding to the built-in scales, by default None
+
         Returns
         -------
         list[str]
             Supported color scales
         """
-        names = list(additional_colorscales())
-        for name, body in inspect.getmembers(getattr(px.colors, "sequential")):
-            if isinstance(body, list) and name[-2:] != "_r" and name[0] != "_":
-                names.append(name)
-
-        return sorted(names)
+        return colorscale_registry.names(custom_colorscale_file)
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Sequence, TypedDict
+
+from .axis_data import AxisDataCache, encode_array
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .plot_base import PlotBase
+
+# Row mask of each row space, keyed by rate group (None for a single DataFrame)
+RowMasks = dict[Optional[str], "np.ndarray"]
+
+
+class RestylePayload(TypedDict):
+    """Arguments of ``Plotly.restyle(graphDiv, data, traces)``"""
+
+    data: dict[str, list]
+    traces: list[int]
+
+
+class LinkedSelection:
+    """
+    Output data rows selected in one subplot, highlighted in every trace
+
+    Selections are kept as boolean row masks over the output data, one per
+    rate group, so any trace can be highlighted without rebuilding the
+    figure. Each ``select_*`` call returns the restyle payload updating the
+    ``selectedpoints`` of only the traces whose highlight changed
+    """
+
+    def __init__(self, plot: PlotBase, encode: bool = True) -> None:
+        """Creates an empty selection
+
+        Parameters
+        ----------
+        plot : PlotBase
+            Built plot, e.g. ``Subplots``
+        encode : bool, optional
+            Send point indices as typed arrays (``bdata``) instead of lists,
+            by default True
+        """
+        self.plot = plot
+        self.encode = encode
+        self.masks: Optional[RowMasks] = None
+
+        # Points of each trace as last sent, None when not highlighted
+        self.__sent: list[Optional[np.ndarray]] = [None] * len(plot.traces)
+
+    def select_range(
+        self,
+        subplot: int,
+        ranges: dict[str, tuple[float, float]],
+        source: Optional[int] = None,
+    ) -> RestylePayload:
+        """Selects the rows of a subplot's traces inside a box
+
+        Parameters
+        ----------
+        subplot : int
+            Template subplot the box was drawn in
+        ranges : dict[str, tuple[float, float]]
+            Inclusive range of each boxed axis, e.g. ``{"x": (10.0, 20.0)}``
+            for a time window, axes left out are unbounded
+        source : Optional[int], optional
+            Trace keeping plotly's own selection, by default None
+
+        Returns
+        -------
+        RestylePayload
+            Updates of the other traces
+        """
+        masks: RowMasks = {}
+        for index, trace in enumerate(self.plot.traces):
+            if trace.variable_template["subplot"] != subplot:
+                continue
+
+            inside = None
+            for axis, (low, high) in ranges.items():
+                values = self.__axis_values(index, axis)
+                within = (values >= min(low, high)) & (values <= max(low, high))
+                inside = within if inside is None else inside & within
+            if inside is None:
+                continue
+
+            group = trace.rate_group
+            masks[group] = inside if group not in masks else masks[group] | inside
+
+        if not masks:
+            raise ValueError(f"Subplot {subplot} has no traces to select from")
+
+        return self.__select(masks, source)
+
+    def select_window(
+        self,
+        start: float,
+        end: float,
+        column: Optional[str] = None,
+        source: Optional[int] = None,
+    ) -> RestylePayload:
+        """Selects every row within a window of an output data column
+
+        Parameters
+        ----------
+        start : float
+            Inclusive window start, in the column's units
+        end : float
+            Inclusive window end
+        column : Optional[str], optional
+            Output data column, by default the time column
+        source : Optional[int], optional
+            Trace keeping plotly's own selection, by default None
+
+        Returns
+        -------
+        RestylePayload
+            Updates of the other traces
+        """
+        rate_groups = self.plot.rate_groups
+        if column is None:
+            column = "time_s" if rate_groups is None else rate_groups.time_column
+
+        masks: RowMasks = {}
+        for group in self.__groups():
+            values = self.__column_values(column, None, group)
+            masks[group] = (values >= start) & (values <= end)
+
+        return self.__select(masks, source)
+
+    def select_points(self, trace_index: int, points: Sequence[int]) -> RestylePayload:
+        """Selects the rows behind points of a plotly selection event
+
+        Parameters
+        ----------
+        trace_index : int
+            Selected trace, plotly's ``curveNumber``
+        points : Sequence[int]
+            Selected points, plotly's ``pointIndex`` values
+
+        Returns
+        -------
+        RestylePayload
+            Updates of the other traces
+        """
+        rows = self.plot.source_rows(trace_index, points)
+        return self.__select(self.__rows_mask(trace_index, rows), trace_index)
+
+    def select_lasso(
+        self, trace_index: int, polygon: Sequence[Sequence[float]]
+    ) -> RestylePayload:
+        """Selects the full resolution rows of a trace inside a lasso
+
+        Parameters
+        ----------
+        trace_index : int
+            Trace the lasso was drawn over
+        polygon : Sequence[Sequence[float]]
+            x/y lasso vertices in data coordinates
+
+        Returns
+        -------
+        RestylePayload
+            Updates of every trace, including the lassoed one since plotly only
+            selects its displayed points
+        """
+        rows = self.plot.spatial_index(trace_index).within(polygon)
+        return self.__select(self.__rows_mask(trace_index, rows), None)
+
+    def clear(self) -> RestylePayload:
+        """Removes the selection from every highlighted trace"""
+        self.masks = None
+        return self.__payload([None] * len(self.plot.traces), None)
+
+    def selected_rows(self, group: Optional[str] = None) -> np.ndarray:
+        """Selected output data rows of a row space
+
+        Parameters
+        ----------
+        group : Optional[str], optional
+            Rate group, by default None for a single DataFrame
+
+        Returns
+        -------
+        np.ndarray
+            Sorted rows, for ``output_data.iloc``
+        """
+        import numpy as np
+
+        if self.masks is None:
+            return np.empty(0, dtype=np.intp)
+
+        return np.flatnonzero(self.__group_mask(self.masks, group))
+
+    def selected_points(self, trace_index: int) -> Optional[np.ndarray]:
+        """Displayed points of a trace behind the selected rows
+
+        Decimated points are selected with their row, aggregated points (e.g.
+        discrete steps) when any row of their range is selected
+
+        Parameters
+        ----------
+        trace_index : int
+            Figure trace
+
+        Returns
+        -------
+        Optional[np.ndarray]
+            Point indices, None without a selection
+        """
+        import numpy as np
+
+        if self.masks is None:
+            return None
+
+        mask = self.__group_mask(self.masks, self.plot.traces[trace_index].rate_group)
+        index_map = self.plot.index_maps[trace_index]
+        if index_map is None:
+            points = np.flatnonzero(mask)
+        elif index_map.stops is None:
+            points = np.flatnonzero(mask[index_map.rows])
+        else:
+            # Selected rows before each row, so a range's count is a difference
+            selected = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+            points = np.flatnonzero(
+                selected[index_map.stops] > selected[index_map.rows]
+            )
+
+        return points.astype(np.int32 if len(mask) < 2**31 else np.int64)
+
+    def __select(self, masks: RowMasks, source: Optional[int]) -> RestylePayload:
+        # Converted once between rate groups instead of once per trace
+        self.masks = {
+            group: self.__group_mask(masks, group) for group in self.__groups()
+        }
+        return self.__payload(
+            [self.selected_points(index) for index in range(len(self.plot.traces))],
+            source,
+        )
+
+    def __payload(
+        self, points: list[Optional[np.ndarray]], source: Optional[int]
+    ) -> RestylePayload:
+        """Restyle of the traces whose points differ from the last update"""
+        import numpy as np
+
+        payload: RestylePayload = {"data": {"selectedpoints": []}, "traces": []}
+        for index, selected in enumerate(points):
+            sent = self.__sent[index]
+            if index == source or (
+                sent is selected
+                or (
+                    sent is not None
+                    and selected is not None
+                    and np.array_equal(sent, selected)
+                )
+            ):
+                continue
+
+            self.__sent[index] = selected
+            if selected is not None and self.encode:
+                selected = encode_array(selected)
+            elif selected is not None:
+                selected = selected.tolist()
+            payload["data"]["selectedpoints"].append(selected)
+            payload["traces"].append(index)
+
+        return payload
+
+    def __groups(self) -> list[Optional[str]]:
+        if self.plot.rate_groups is None:
+            return [None]
+
+        return list(self.plot.rate_groups.groups)
+
+    def __axis_values(self, trace_index: int, axis: str) -> np.ndarray:
+        """Full resolution values of a trace axis, as transformed for the plot"""
+        trace = self.plot.traces[trace_index]
+        variable = trace.variable_template
+        grid = self.plot.template["grids"][variable["subplot"] - 1]
+        scale_factor = next(
+            item["scaleFactor"] for item in grid["axes"] if item["name"] == axis
+        )
+
+        return self.__column_values(
+            variable[f"{axis}Variable"], scale_factor, trace.rate_group
+        )
+
+    def __column_values(
+        self, column: str, scale_factor: Optional[str], group: Optional[str]
+    ) -> np.ndarray:
+        # Lean builds only keep the axis data cached while building
+        key = AxisDataCache.key(column, scale_factor, group)
+        if key in self.plot.axis_data:
+            return self.plot.axis_data[key].to_numpy()
+        if self.plot.lean:
+            raise ValueError(f"Lean builds release the output data, '{key}' is gone")
+
+        return self.plot.axis_data.get(column, scale_factor, group).to_numpy()
+
+    def __rows_mask(self, trace_index: int, rows: np.ndarray) -> RowMasks:
+        import numpy as np
+
+        trace = self.plot.traces[trace_index]
+        grid = self.plot.template["grids"][trace.variable_template["subplot"] - 1]
+        length = len(self.__axis_values(trace_index, grid["axes"][0]["name"]))
+
+        mask = np.zeros(length, dtype=bool)
+        mask[rows] = True
+        return {trace.rate_group: mask}
+
+    def __group_mask(self, masks: RowMasks, group: Optional[str]) -> np.ndarray:
+        """Mask of a row space, converted from the others by time if missing"""
+        if group in masks:
+            return masks[group]
+
+        converted = None
+        for source, mask in masks.items():
+            aligned = self.__convert(mask, source, group)
+            converted = aligned if converted is None else converted | aligned
+
+        return converted
+
+    def __convert(
+        self, mask: np.ndarray, source: Optional[str], target: Optional[str]
+    ) -> np.ndarray:
+        """Selects the target rows whose sample interval holds a selected row
+
+        A target row covers its time until the next target sample, it is
+        selected when any source row in that interval is, or when the source
+        sample it is aligned to (the last at or before it) is
+        """
+        import numpy as np
+
+        groups = self.plot.rate_groups
+        source_time = groups.groups[source][groups.time_column].to_numpy()
+        time = groups.groups[target][groups.time_column].to_numpy()
+
+        before = np.searchsorted(source_time, time, side="right") - 1
+        converted = (before >= 0) & mask[np.maximum(before, 0)]
+
+        selected = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+        starts = np.searchsorted(source_time, time, side="left")
+        stops = np.append(starts[1:], len(source_time))
+        return converted | (selected[stops] > selected[starts])
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, TypedDict
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Position column families, suffixed with the component number (1-3)
+TARGET_POSITION = "tgt_pos_ned_m__"
+INTERCEPTOR_POSITION = "msl_pos_ned_m__"
+TIME_COLUMN = "time_s"
+
+
+class ClosestApproach(TypedDict):
+    """Point of closest approach between two trajectories"""
+
+    distance: float
+    time: Optional[float]
+    index: int
+    fraction: float
+
+
+def closest_approach(
+    target: np.ndarray,
+    interceptor: np.ndarray,
+    time: Optional[np.ndarray] = None,
+    chunk_size: int = 1_000_000,
+) -> Optional[ClosestApproach]:
+    """
+    Minimum distance between two trajectories sampled at the same times
+
+    Both trajectories are linearly interpolated between samples, so each
+    sample interval is a segment of relative motion and its closest point has
+    a closed form. Segments are evaluated in chunks to bound temporaries
+
+    Parameters
+    ----------
+    target : np.ndarray
+        Target positions, shape (N, D)
+    interceptor : np.ndarray
+        Interceptor positions, shape (N, D)
+    time : Optional[np.ndarray], optional
+        Sample times, shape (N,), by default None
+    chunk_size : int, optional
+        Segments evaluated per chunk, by default 1_000_000
+
+    Returns
+    -------
+    Optional[ClosestApproach]
+        Closest approach, or None when no finite samples exist
+
+    Raises
+    ------
+    ValueError
+        Trajectory shapes do not match
+    """
+    import numpy as np
+
+    target = np.asarray(target, dtype=np.float64)
+    interceptor = np.asarray(interceptor, dtype=np.float64)
+    if target.shape != interceptor.shape or target.ndim != 2:
+        raise ValueError(
+            f"Trajectory shapes must match as (N, D): {target.shape} and"
+            f" {interceptor.shape}"
+        )
+
+    relative = interceptor - target
+    if len(relative) == 1:
+        distance = float(np.linalg.norm(relative[0]))
+        if np.isnan(distance):
+            return None
+        return {
+            "distance": distance,
+            "time": None if time is None else float(time[0]),
+            "index": 0,
+            "fraction": 0.0,
+        }
+
+    best_distance = np.inf
+    best_index = -1
+    best_fraction = 0.0
+    for start in range(0, len(relative) - 1, chunk_size):
+        stop = min(start + chunk_size, len(relative) - 1)
+        origin = relative[start:stop]
+        direction = relative[start + 1 : stop + 1] - origin
+
+        # Fraction along each segment closest to the origin
+        length = np.einsum("ij,ij->i", direction, direction)
+        projection = -np.einsum("ij,ij->i", origin, direction)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = np.where(length > 0, projection / length, 0.0)
+        np.clip(fraction, 0.0, 1.0, out=fraction)
+
+        closest = origin + fraction[:, np.newaxis] * direction
+        squared = np.einsum("ij,ij->i", closest, closest)
+        if np.all(np.isnan(squared)):
+            continue
+
+        index = int(np.nanargmin(squared))
+        if squared[index] < best_distance:
+            best_distance = float(squared[index])
+            best_index = start + index
+            best_fraction = float(fraction[index])
+
+    if best_index < 0:
+        return None
+
+    approach_time = None
+    if time is not None:
+        approach_time = float(
+            time[best_index] + best_fraction * (time[best_index + 1] - time[best_index])
+        )
+
+    return {
+        "distance": float(np.sqrt(best_distance)),
+        "time": approach_time,
+        "index": best_index,
+        "fraction": best_fraction,
+    }
+
+
+def position_columns(data: pd.DataFrame, prefix: str) -> list[str]:
+    """Consecutive position component columns, e.g. ``prefix1``, ``prefix2``"""
+    columns = []
+    while f"{prefix}{len(columns) + 1}" in data.columns:
+        columns.append(f"{prefix}{len(columns) + 1}")
+
+    return columns
+
+
+def miss_distance_columns(
+    data: pd.DataFrame,
+    target_prefix: str = TARGET_POSITION,
+    interceptor_prefix: str = INTERCEPTOR_POSITION,
+    time_column: str = TIME_COLUMN,
+) -> list[str]:
+    """Output data columns read by ``miss_distance``"""
+    target = position_columns(data, target_prefix)
+    interceptor = position_columns(data, interceptor_prefix)
+    dimensions = min(len(target), len(interceptor))
+    if dimensions == 0:
+        return []
+
+    columns = target[:dimensions] + interceptor[:dimensions]
+    if time_column in data.columns:
+        columns.append(time_column)
+
+    return columns
+
+
+def miss_distance(
+    data: pd.DataFrame,
+    target_prefix: str = TARGET_POSITION,
+    interceptor_prefix: str = INTERCEPTOR_POSITION,
+    time_column: str = TIME_COLUMN,
+) -> Optional[ClosestApproach]:
+    """
+    Closest approach between the target and interceptor in the output data
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Run output data
+    target_prefix : str, optional
+        Target position column family, by default TARGET_POSITION
+    interceptor_prefix : str, optional
+        Interceptor position column family, by default INTERCEPTOR_POSITION
+    time_column : str, optional
+        Sample time column, by default TIME_COLUMN
+
+    Returns
+    -------
+    Optional[ClosestApproach]
+        Closest approach, or None when the position columns are missing
+    """
+    target = position_columns(data, target_prefix)
+    interceptor = position_columns(data, interceptor_prefix)
+
+    # Compare the components both trajectories provide
+    dimensions = min(len(target), len(interceptor))
+    if dimensions == 0 or len(data) == 0:
+        return None
+
+    return closest_approach(
+        data[target[:dimensions]].to_numpy(),
+        data[interceptor[:dimensions]].to_numpy(),
+        data[time_column].to_numpy() if time_column in data.columns else None,
+    )
@@ -1,43 +1,171 @@
+from __future__ import annotations
+
+import json
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import cache
+from typing import TYPE_CHECKING, Generic, Iterable, Sequence, TypeVar
 
-import pandas as pd
 import plotly.graph_objects as go
 from plotly.graph_objs.layout import Legend
 
-from .annotations import Classification, get_miss_distance, get_missile_info
-from .grid import update_2d_grid, update_3d_grid
+from .animation import animation_dict
+from .annotations import (
+    Classification,
+    get_miss_distance,
+    get_missile_info,
+    get_preview_note,
+)
+from .axis_data import AxisDataCache, to_shared_dict
+from .dtype_policy import DtypePolicy
+from .grid import AxisStats, update_2d_grid, update_3d_grid
+from .linked_selection import RestylePayload
+from .miss_distance import miss_distance, miss_distance_columns
+from .preview import SampleInfo
+from .rate_groups import RateGroups
+from .row_lookup import IndexMap, SpatialIndex
+from .subplot_layout import SubplotLayout
+from .template_patch import TemplateChanges, TemplatePatch, changed_props, layout_props
+from .thumbnail import encode_png, rasterize
 from .trace_line import TraceBase
 
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    from plotly.basedatatypes import BaseTraceType
+
 Trace = TypeVar("Trace", bound=TraceBase)
 
 
+@cache
+def _theme_template(theme: str) -> dict:
+    """Layout template of a theme merged over plotly's default template
+
+    Matches what ``update_layout`` produces on a new figure, computed once per
+    theme. Treat the result as read-only
+    """
+    figure = go.Figure()
+    figure.update_layout(go.Layout(template=theme))
+    return figure.layout.template.to_plotly_json()
+
+
+def _prepare_trace(
+    trace: TraceBase,
+    data: pd.DataFrame,
+    grids: list[dict],
+    legendgroup: str | None,
+    anchor: dict[str, str] | None,
+    axis_data: AxisDataCache | None,
+    dtype_policy: DtypePolicy | None = None,
+) -> tuple[BaseTraceType, list[pd.Series], dict[str, str], IndexMap | None]:
+    """Executor task building one trace, module level so it pickles for processes"""
+    if axis_data is None:
+        axis_data = AxisDataCache(data, dtype_policy=dtype_policy)
+
+    scatter, trace_data = trace.prepare_trace(
+        data, grids, legendgroup, anchor, axis_data
+    )
+    return scatter, trace_data, trace.sources, trace.index_map
+
+
 class PlotBase(ABC, Generic[Trace]):
+    # Grid placement for multi-grid figures, set by subclasses before building
+    subplot_layout: SubplotLayout | None = None
+
+    # Rows sampled for a preview, None when built from the full output data
+    preview: SampleInfo | None = None
+
     def __init__(
         self,
         template: dict,
-        output_data: pd.DataFrame,
+        output_data: pd.DataFrame | RateGroups,
         is_3d: bool,
         show_info_annotations: bool = True,
+        executor: Executor | None = None,
+        lean: bool = False,
     ) -> None:
+        """Builds the figure from a template and the run output data
+
+        Parameters
+        ----------
+        template : dict
+            Plot template
+        output_data : pd.DataFrame | RateGroups
+            Run output data, or data written at several rates which traces
+            align onto the rate group of their x variable
+        is_3d : bool
+            Figure contains 3D grids
+        show_info_annotations : bool, optional
+            Allow the template's info annotations, by default True
+        executor : Executor | None, optional
+            Prepares trace data concurrently before the traces are added in
+            template order, by default None (sequential). Thread pools share
+            the axis data cache; process pools receive only the columns each
+            trace reads
+        lean : bool, optional
+            Minimize memory held by the built plot, by default False. Figure
+            traces reference the shared axis data instead of copies, axis limits
+            use per-trace stats, and the output data is released after the build
+        """
         self.template = template
-        self.data = output_data
+        self.executor = executor
+        self.lean = lean
 
         # Allow constructor override
         self.show_info_annotations = (
             show_info_annotations and template["layout"]["showInfo"]
         )
 
+        # Transformed axis data shared across traces, and the cache key each
+        # trace axis was read from
+        self.dtype_policy = DtypePolicy.from_template(template)
+        self.axis_data = AxisDataCache(
+            output_data, detach=lean, dtype_policy=self.dtype_policy
+        )
+        self.trace_sources: list[dict[str, str]] = []
+
+        # Trace handles with the output data rows of their displayed points,
+        # and the spatial index of each trace queried for hovers or lassos
+        self.traces: list[TraceBase] = []
+        self.index_maps: list[IndexMap | None] = []
+        self.__spatial_indexes: dict[int, SpatialIndex] = {}
+
+        self.rate_groups: RateGroups | None = None
+        if isinstance(output_data, RateGroups):
+            # Only the trajectories are aligned for the miss distance, traces
+            # align their own columns
+            self.rate_groups = output_data
+            output_data = output_data.frame(
+                miss_distance_columns(output_data.header())
+                if self.show_info_annotations
+                else []
+            )
+        self.data = output_data
+
         self.is_3d = is_3d
         self.show_legend = any(grid["showLegend"] for grid in template["grids"])
 
         self.classification = Classification(**template["classification"])
 
+        # Closest approach, read once so layout edits never revisit the data
+        self.__approach = (
+            miss_distance(self.data) if self.show_info_annotations else None
+        )
+
+        # Axis data of each trace for limits, and the layout it produced
+        self.__axis_extents: list[list[pd.Series] | list[AxisStats]] = []
+        self.__layout_source: dict = {}
+
         # Create the Plotly Figure
         self.figure: go.Figure = self.inititialize_figure()
-        self._initialize_layout()
+        self.layout: dict = self._initialize_layout()
         self._build_axes(self._build_traces())
 
+        if lean:
+            # Column names are kept for ``columns``
+            self.data = self.data.iloc[:0].copy()
+            self.axis_data.release()
+
     def show_plot(self, renderer: str | None = None) -> None:
         self.figure.show(renderer=renderer)
 
@@ -47,53 +175,424 @@ class PlotBase(ABC, Generic[Trace]):
     def to_json(self) -> str:
         return self.figure.to_json()
 
+    def to_shared_dict(self) -> dict:
+        """Figure dict storing each shared axis array once, see ``to_shared_dict``"""
+        return to_shared_dict(self.figure, self.axis_data, self.trace_sources)
+
+    def to_shared_json(self) -> str:
+        from plotly.utils import PlotlyJSONEncoder
+
+        return json.dumps(self.to_shared_dict(), cls=PlotlyJSONEncoder)
+
+    def to_animation_dict(
+        self, frames: int = 100, points_per_frame: int = 500, **kwargs
+    ) -> dict:
+        """Figure dict playing the traces back over time, see ``animation_dict``"""
+        return animation_dict(self, frames, points_per_frame, **kwargs)
+
+    def to_thumbnail(self, width: int = 160, height: int = 120) -> bytes:
+        """PNG thumbnail drawn without Kaleido, see ``thumbnail.rasterize``"""
+        return encode_png(rasterize(self.figure, width, height))
+
+    def columns(self) -> list[str]:
+        """Output data columns read to build the figure"""
+        grids = self.template["grids"]
+        columns = [
+            column
+            for variable in self.template["variables"]
+            for column in self.trace_handle(variable).columns(grids)
+        ]
+        if self.show_info_annotations:
+            columns += miss_distance_columns(self.data)
+
+        return list(dict.fromkeys(columns))
+
     def generate_images(self):
         pass
 
-    def _build_traces(self) -> list[list[pd.Series]]:
-        traces = []
+    def _build_traces(self) -> list[pd.Series] | list[AxisStats]:
+        jobs: list[tuple[TraceBase, str | None, dict[str, str] | None]] = []
+        cells: list[tuple[int | None, int | None]] = []
         for variable in self.template["variables"]:
-            # Disable legend groups for single plots
-            # This allows for individual traces to be disabled
-            legendgroup = (
-                None
-                if len(self.template["grids"]) <= 1
-                else f"{variable['row']}-{variable['column']}"
-            )
+            # Subplot traces reference their axes directly instead of a grid cell
+            anchor = None
+            row, col = variable["row"], variable["column"]
+            if self.subplot_layout is not None:
+                anchor = self.subplot_layout.trace_anchor(variable["subplot"])
+                row, col = None, None
 
-            trace = self.trace_handle(variable)
-            traces += trace.add_trace(
-                self.figure,
-                self.data,
-                self.template["grids"],
-                variable["row"],
-                variable["column"],
-                legendgroup,
+            jobs.append(
+                (self.__trace_handle(variable), self.__legendgroup(variable), anchor)
             )
+            cells.append((row, col))
+
+        # Traces are added in template order regardless of completion order
+        traces = []
+        for (row, col), (trace, _, _), (scatter, trace_data, sources, index_map) in zip(
+            cells, jobs, self.__prepare_traces(jobs)
+        ):
+            if self.lean:
+                self.__add_shared_trace(scatter, sources, row, col)
+                trace_data = [AxisStats.from_data(data) for data in trace_data]
+            else:
+                self.figure.add_trace(scatter, row=row, col=col)
+            self.trace_sources.append(sources)
+            self.traces.append(trace)
+            self.index_maps.append(index_map)
+            self.__axis_extents.append(trace_data)
+            traces += trace_data
         return traces
 
-    def _initialize_layout(self) -> None:
+    def update_template(self, template: dict) -> TemplatePatch:
+        """Applies an edited template, redoing only the work the edit affects
+
+        Style and layout edits are diffed against the properties the previous
+        template produced, without reading data. Edits of a trace's variables
+        or scale factors prepare only that trace again, and edits of data
+        selection fields (e.g. contours, filters) rebuild the whole figure
+
+        Parameters
+        ----------
+        template : dict
+            Edited plot template, not modified afterwards
+
+        Returns
+        -------
+        TemplatePatch
+            Updates already applied to ``figure``, for ``Plotly.relayout`` and
+            ``Plotly.restyle`` in a client showing the same figure
+        """
+        changes = TemplateChanges(self.template, template)
+        policy = DtypePolicy.from_template(template)
+        if vars(policy) != vars(self.dtype_policy) and (
+            policy.columns
+            or self.dtype_policy.columns
+            or {policy.default, self.dtype_policy.default} != {"float64"}
+        ):
+            # Trace data is cast to another precision
+            changes.full = True
+
+        if self.lean and (changes.full or changes.data):
+            raise ValueError("Lean builds release the output data")
+
+        if changes.full:
+            output_data = self.data if self.rate_groups is None else self.rate_groups
+            type(self).__init__(
+                self, template, output_data, executor=self.executor, lean=self.lean
+            )
+            return {"relayout": {}, "restyle": [], "rebuilt": True}
+
+        old_template, self.template = self.template, template
+        self.dtype_policy = self.axis_data.dtype_policy = policy
+
+        restyle = [
+            self.__restyle_trace(index, old_template)
+            for index in sorted(changes.style - changes.data)
+        ]
+        restyle += [self.__prepare_again(index) for index in sorted(changes.data)]
+        restyle = [payload for payload in restyle if payload["data"]]
+        for payload in restyle:
+            self.figure.plotly_restyle(payload["data"], payload["traces"])
+
+        relayout = self.__relayout() if changes.layout else {}
+        self.__apply_relayout(relayout)
+
+        return {"relayout": relayout, "restyle": restyle, "rebuilt": False}
+
+    def mark_preview(self, sample: SampleInfo) -> None:
+        """Flags the figure as built from sampled output data, see ``preview_plot``
+
+        Parameters
+        ----------
+        sample : SampleInfo
+            Rows the plot was built from
+        """
+        self.preview = sample
+        self.__apply_relayout(self.__relayout())
+
+    def __apply_relayout(self, relayout: dict) -> None:
+        # plotly.py ignores relayouts resizing arrays, e.g. added annotations,
+        # so whole arrays are assigned
+        arrays = {
+            key: value
+            for key, value in relayout.items()
+            if "." not in key and isinstance(value, list)
+        }
+        for key, value in arrays.items():
+            self.figure.layout[key] = value
+
+        remaining = {key: relayout[key] for key in relayout.keys() - arrays.keys()}
+        if remaining:
+            self.figure.plotly_relayout(remaining)
+
+    def __trace_handle(self, variable: dict) -> TraceBase:
+        trace = self.trace_handle(variable)
+        if self.rate_groups is not None:
+            trace.rate_group = self.rate_groups.base_group(
+                variable["xVariable"], trace.columns(self.template["grids"])
+            )
+
+        return trace
+
+    def __legendgroup(self, variable: dict) -> str | None:
+        # Disable legend groups for single plots
+        # This allows for individual traces to be disabled
+        return (
+            None
+            if len(self.template["grids"]) <= 1
+            else f"{variable['row']}-{variable['column']}"
+        )
+
+    def __restyle_trace(self, index: int, old_template: dict) -> RestylePayload:
+        """Restyles a trace from its edited style fields only"""
+        trace = self.traces[index]
+        variable = self.template["variables"][index]
+        legendgroup = self.__legendgroup(variable)
+
+        old_style = trace.style(
+            old_template["grids"][variable["subplot"] - 1], legendgroup
+        )
+        trace.variable_template = variable
+        style = trace.style(
+            self.template["grids"][variable["subplot"] - 1], legendgroup
+        )
+
+        changed = changed_props(old_style, style)
+        return {
+            "data": {name: [value] for name, value in changed.items()},
+            "traces": [index],
+        }
+
+    def __prepare_again(self, index: int) -> RestylePayload:
+        """Prepares one trace from the edited template, replacing every property"""
+        variable = self.template["variables"][index]
+        anchor = None
+        if self.subplot_layout is not None:
+            anchor = self.subplot_layout.trace_anchor(variable["subplot"])
+
+        trace = self.__trace_handle(variable)
+        scatter, trace_data, sources, index_map = _prepare_trace(
+            trace,
+            self.__trace_data(trace),
+            self.template["grids"],
+            self.__legendgroup(variable),
+            anchor,
+            self.axis_data,
+        )
+        self.traces[index] = trace
+        self.trace_sources[index] = sources
+        self.index_maps[index] = index_map
+        self.__axis_extents[index] = trace_data
+        self.__spatial_indexes.pop(index, None)
+
+        properties = scatter.to_plotly_json()
+        properties.pop("type")
+        previous = self.figure.data[index].to_plotly_json()
+        removed = previous.keys() - properties.keys() - {"type", "uid"}
+        return {
+            "data": {
+                **{name: [value] for name, value in properties.items()},
+                **{name: [None] for name in removed},
+            },
+            "traces": [index],
+        }
+
+    def __relayout(self) -> dict:
+        """Layout properties changed by the edited template"""
+        template = self.template
+        if self.subplot_layout is not None:
+            self.subplot_layout = SubplotLayout.from_template(template)
+        self.show_legend = any(grid["showLegend"] for grid in template["grids"])
+        self.classification = Classification(**template["classification"])
+
+        self.layout = self._initialize_layout()
+        source = layout_props(
+            {
+                **self.layout,
+                **self._axes_layout(
+                    [data for trace_data in self.__axis_extents for data in trace_data]
+                ),
+            }
+        )
+        relayout = changed_props(self.__layout_source, source)
+        self.__layout_source = source
+
+        return relayout
+
+    def source_rows(self, trace_index: int, points: Sequence[int]) -> np.ndarray:
+        """Output data rows behind displayed points of a trace
+
+        Parameters
+        ----------
+        trace_index : int
+            Figure trace, plotly's ``curveNumber``
+        points : Sequence[int]
+            Displayed points, plotly's ``pointIndex`` of hover or selection
+            events
+
+        Returns
+        -------
+        np.ndarray
+            Sorted rows of the output data, for ``output_data.iloc``
+        """
+        import numpy as np
+
+        index_map = self.index_maps[trace_index]
+        if index_map is None:
+            return np.unique(np.asarray(points, dtype=np.intp))
+
+        return index_map.source_rows(points)
+
+    def spatial_index(self, trace_index: int) -> SpatialIndex:
+        """Index of a trace's full resolution points, built on first use
+
+        Answers nearest row and lasso queries with rows of the output data, so
+        requires the data to be kept, i.e. not a lean build
+
+        Parameters
+        ----------
+        trace_index : int
+            Figure trace
+
+        Returns
+        -------
+        SpatialIndex
+            Index over the trace's x/y or x/y/z axis data
+        """
+        if trace_index not in self.__spatial_indexes:
+            if self.lean:
+                raise ValueError("Lean builds release the output data")
+
+            trace = self.traces[trace_index]
+            variable = trace.variable_template
+            grid = self.template["grids"][variable["subplot"] - 1]
+            self.__spatial_indexes[trace_index] = SpatialIndex(
+                *(
+                    self.axis_data.get(
+                        variable[f"{axis['name']}Variable"],
+                        axis["scaleFactor"],
+                        trace.rate_group,
+                    ).to_numpy()
+                    for axis in grid["axes"]
+                )
+            )
+
+        return self.__spatial_indexes[trace_index]
+
+    def __add_shared_trace(
+        self, scatter: BaseTraceType, sources: dict[str, str], row: int, col: int
+    ) -> None:
+        """Adds a trace pointing at the shared axis data instead of its own copy
+
+        Plotly copies trace arrays when validating and again when adding a
+        trace, so every trace reading ``time_s`` would hold a private copy.
+        The trace is added without its shared arrays, so they are not copied
+        while it is added. Every public setter (``update_traces``,
+        ``go.Figure(dict)``) validates and copies again, so the arrays are
+        written to the figure's own trace dict. They were validated when the
+        trace was prepared, and are read-only
+        """
+        shared = {}
+        for name, key in sources.items():
+            # Traces prepared in other processes read a different cache
+            if key in self.axis_data:
+                values = self.axis_data[key].to_numpy().view()
+                values.flags.writeable = False
+                shared[name] = values
+
+        # Setting None drops the trace's validated copies
+        scatter.update({name: None for name in shared})
+        self.figure.add_trace(scatter, row=row, col=col)
+        self.figure._data[-1].update(shared)
+
+    def __prepare_traces(
+        self, jobs: list[tuple[TraceBase, str | None, dict[str, str] | None]]
+    ) -> Iterable[
+        tuple[BaseTraceType, list[pd.Series], dict[str, str], IndexMap | None]
+    ]:
+        grids = self.template["grids"]
+        if self.executor is None:
+            # Prepared one at a time so only one trace's copies are alive
+            return (
+                _prepare_trace(
+                    trace,
+                    self.__trace_data(trace),
+                    grids,
+                    legendgroup,
+                    anchor,
+                    self.axis_data,
+                )
+                for trace, legendgroup, anchor in jobs
+            )
+
+        if isinstance(self.executor, ProcessPoolExecutor):
+            # Only ship the columns each trace reads to the worker processes
+            futures = [
+                self.executor.submit(
+                    _prepare_trace,
+                    trace,
+                    self.__trace_data(trace)[trace.columns(grids)],
+                    grids,
+                    legendgroup,
+                    anchor,
+                    None,
+                    self.dtype_policy,
+                )
+                for trace, legendgroup, anchor in jobs
+            ]
+        else:
+            futures = [
+                self.executor.submit(
+                    _prepare_trace,
+                    trace,
+                    self.__trace_data(trace),
+                    grids,
+                    legendgroup,
+                    anchor,
+                    self.axis_data,
+                )
+                for trace, legendgroup, anchor in jobs
+            ]
+
+        return [future.result() for future in futures]
+
+    def __trace_data(self, trace: TraceBase) -> pd.DataFrame:
+        """Output data read by a trace, aligned onto its rate group if needed"""
+        if self.rate_groups is None:
+            return self.data
+
+        return self.rate_groups.frame(
+            trace.columns(self.template["grids"]), trace.rate_group
+        )
+
+    def _initialize_layout(self) -> dict:
         # Add annotations
         annotations = self.classification.get_classifications(
             self.is_3d, self.show_legend
         )
+        if self.subplot_layout is not None:
+            annotations = self.subplot_layout.title_annotations() + annotations
 
         if self.show_info_annotations:
-            annotations.append(get_miss_distance(20.1))
+            approach = self.__approach
+            annotations.append(
+                get_miss_distance(None if approach is None else approach["distance"])
+            )
             annotations.append(get_missile_info("MSL_1"))
 
-        # Add base layout
-        layout = go.Layout(
-            title=self._get_title_dict(self.template["title"]),
-            template=self.template["layout"]["theme"],
-            height=self.template["layout"]["height"],
-            width=self.template["layout"]["width"],
-            legend=Legend(title=self.template["layout"]["legendTitle"]),
-            margin=self._margin_dict(),
-            annotations=annotations,
-        )
+        if self.preview is not None:
+            annotations.append(get_preview_note(self.preview["percent"]))
 
-        self.figure.update_layout(layout)
+        # Base layout, applied with the axes once the traces are built
+        return {
+            "title": self._get_title_dict(self.template["title"]),
+            "template": _theme_template(self.template["layout"]["theme"]),
+            "height": self.template["layout"]["height"],
+            "width": self.template["layout"]["width"],
+            "legend": Legend(title=self.template["layout"]["legendTitle"]),
+            "margin": self._margin_dict(),
+            "annotations": annotations,
+        }
 
     def _get_title_dict(self, title: str) -> dict:
         return {
@@ -104,8 +603,23 @@ class PlotBase(ABC, Generic[Trace]):
             "yanchor": "top",
         }
 
-    def _build_axes(self, trace_data: list[pd.Series]):
-        axes_dict: dict = {}
+    def _build_axes(self, trace_data: list[pd.Series] | list[AxisStats]):
+        axes_dict = self._axes_layout(trace_data)
+        self.__layout_source = layout_props({**self.layout, **axes_dict})
+
+        # Assigning the complete layout once avoids plotly's incremental
+        # relayout machinery, which dominates build time for large subplot grids
+        self.figure.layout = {
+            **self.figure.layout.to_plotly_json(),
+            **self.layout,
+            **axes_dict,
+        }
+
+    def _axes_layout(self, trace_data: list[pd.Series] | list[AxisStats]) -> dict:
+        # Subplot domains and anchors are merged with the axis styling
+        axes_dict: dict = (
+            {} if self.subplot_layout is None else self.subplot_layout.layout()
+        )
         num_2d = 1
         num_3d = 1
         for grid_item in self.template["grids"]:
@@ -116,7 +630,7 @@ class PlotBase(ABC, Generic[Trace]):
                 update_3d_grid(trace_data, axes_dict, grid_item, num_3d)
                 num_3d += 1
 
-        self.figure.update_layout(axes_dict)
+        return axes_dict
 
     def _margin_dict(self):
         bottom_margin = 40
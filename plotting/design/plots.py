@@ -1,15 +1,30 @@
-import pandas as pd
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING
+
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 
+from .discrete_trace import DiscreteTrace
 from .heatmap_trace import HeatMapTrace
 from .plot_base import PlotBase
+from .rate_groups import RateGroups
+from .subplot_layout import SubplotLayout
 from .trace_line import Trace2D, Trace3D
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class Plot2D(PlotBase[Trace2D]):
-    def __init__(self, template: dict, output_data: pd.DataFrame) -> None:
-        super().__init__(template, output_data, False)
+    def __init__(
+        self,
+        template: dict,
+        output_data: pd.DataFrame | RateGroups,
+        executor: Executor | None = None,
+        lean: bool = False,
+    ) -> None:
+        super().__init__(template, output_data, False, executor=executor, lean=lean)
 
     def inititialize_figure(self) -> go.Figure:
         return go.Figure()
@@ -19,8 +34,14 @@ class Plot2D(PlotBase[Trace2D]):
 
 
 class Plot3D(PlotBase[Trace3D]):
-    def __init__(self, template: dict, output_data: pd.DataFrame) -> None:
-        super().__init__(template, output_data, True)
+    def __init__(
+        self,
+        template: dict,
+        output_data: pd.DataFrame | RateGroups,
+        executor: Executor | None = None,
+        lean: bool = False,
+    ) -> None:
+        super().__init__(template, output_data, True, executor=executor, lean=lean)
 
     def inititialize_figure(self) -> go.Figure:
         return go.Figure()
@@ -30,8 +51,14 @@ class Plot3D(PlotBase[Trace3D]):
 
 
 class PlotHeatmap(PlotBase[HeatMapTrace]):
-    def __init__(self, template: dict, output_data: pd.DataFrame) -> None:
-        super().__init__(template, output_data, False, False)
+    def __init__(
+        self,
+        template: dict,
+        output_data: pd.DataFrame | RateGroups,
+        executor: Executor | None = None,
+        lean: bool = False,
+    ) -> None:
+        super().__init__(template, output_data, False, False, executor, lean)
 
     def inititialize_figure(self) -> go.Figure:
         return go.Figure()
@@ -40,37 +67,40 @@ class PlotHeatmap(PlotBase[HeatMapTrace]):
         return HeatMapTrace(variable_template)
 
 
-# class PlotDiscrete(PlotBase[Trace2D]):
-#     def __init__(self, template: dict, output_data: pd.DataFrame) -> None:
-#         super().__init__(template, output_data, False, False)
+class PlotDiscrete(PlotBase[DiscreteTrace]):
+    def __init__(
+        self,
+        template: dict,
+        output_data: pd.DataFrame | RateGroups,
+        executor: Executor | None = None,
+        lean: bool = False,
+    ) -> None:
+        super().__init__(template, output_data, False, False, executor, lean)
 
-#     def inititialize_figure(self) -> go.Figure:
-#         return go.Figure()
+    def inititialize_figure(self) -> go.Figure:
+        return go.Figure()
+
+    def trace_handle(self, variable_template: dict) -> DiscreteTrace:
+        return DiscreteTrace(variable_template)
 
 
 class Subplots(PlotBase[Trace2D | Trace3D]):
-    def __init__(self, template: dict, output_data: pd.DataFrame) -> None:
+    def __init__(
+        self,
+        template: dict,
+        output_data: pd.DataFrame | RateGroups,
+        executor: Executor | None = None,
+        lean: bool = False,
+    ) -> None:
         is_3d = any([len(grid["axes"]) == 3 for grid in template["grids"]])
-        super().__init__(template, output_data, is_3d)
+        self.subplot_layout = SubplotLayout.from_template(template)
+        super().__init__(template, output_data, is_3d, executor=executor, lean=lean)
 
     def inititialize_figure(self) -> go.Figure:
+        # Domains, anchors and titles come from the subplot layout instead of
+        # make_subplots, which is slow for large grids
         # https://github.com/plotly/plotly.js/issues/2746
-        num_rows = len(set(variable["row"] for variable in self.template["variables"]))
-        num_columns = len(
-            set(variable["column"] for variable in self.template["variables"])
-        )
-
-        specs = [[{"is_3d": len(grid["axes"]) == 3}] for grid in self.template["grids"]]
-
-        return make_subplots(
-            num_rows,
-            num_columns,
-            vertical_spacing=self.template["layout"]["verticalSpacing"],
-            shared_xaxes=self.template["layout"]["sharedXAxes"],
-            shared_yaxes=self.template["layout"]["sharedYAxes"],
-            subplot_titles=[grid["title"] for grid in self.template["grids"]],
-            specs=specs,
-        )
+        return go.Figure()
 
     def trace_handle(self, variable_template: dict) -> Trace2D | Trace3D:
         if variable_template["plotType"] == "2d":
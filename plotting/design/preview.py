@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import math
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Literal, TypedDict
+
+from .dtype_policy import DtypePolicy
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .plot_base import PlotBase
+
+# Most rows a preview reads, whatever share ``percentData`` asks for
+PREVIEW_ROWS = 20_000
+
+# Start of a CSV read for its header and the row count estimate
+HEAD_BYTES = 1 << 20
+
+# Bytes read at each sampled CSV offset, doubled for longer lines
+LINE_WINDOW = 512
+
+# Reading at least this share of the rows parses the whole file instead
+FULL_READ_SHARE = 0.5
+
+# Columnar formats, sampled by row group
+COLUMNAR_SUFFIXES = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+
+SampleMethod = Literal["full", "stride", "row_groups"]
+
+
+class SampleInfo(TypedDict):
+    """Rows of an output data file a preview was built from
+
+    ``total_rows`` is estimated from the line lengths at the start of CSV
+    files, and exact for columnar files
+    """
+
+    path: str
+    method: SampleMethod
+    rows: int
+    total_rows: int
+    percent: float
+
+
+def read_sample(
+    path: str | Path, template: dict, max_rows: int = PREVIEW_ROWS
+) -> tuple[pd.DataFrame, SampleInfo]:
+    """Reads evenly spaced rows of an output data file without parsing all of it
+
+    CSV rows are read by seeking to evenly spaced byte offsets, so the file
+    must hold one row per line. Parquet and Feather files read evenly spaced
+    row groups (record batches), i.e. contiguous stretches of the run, which
+    requires pyarrow
+
+    Parameters
+    ----------
+    path : str | Path
+        Output data file
+    template : dict
+        Plot template, its ``percentData`` (0 to 100, 0 for unset) is the
+        share of rows read
+    max_rows : int, optional
+        Most rows read, by default PREVIEW_ROWS
+
+    Returns
+    -------
+    tuple[pd.DataFrame, SampleInfo]
+        Sampled rows in file order, and how they were sampled
+    """
+    percent = template.get("percentData") or 0.0
+    if not 0.0 <= percent <= 100.0:
+        raise ValueError(f"Invalid percentData {percent}. Must be within 0 to 100")
+    if max_rows < 1:
+        raise ValueError("Previews need at least one row")
+
+    policy = DtypePolicy.from_template(template)
+    kind = COLUMNAR_SUFFIXES.get(Path(path).suffix.lower())
+    if kind is None:
+        data, method, total = _sample_csv(path, percent, max_rows, policy)
+    else:
+        data, method, total = _sample_row_groups(path, kind, percent, max_rows)
+        dtypes = {
+            column: dtype
+            for column, dtype in policy.read_dtypes().items()
+            if column in data.columns
+        }
+        data = data.astype(dtypes)
+
+    return data, {
+        "path": str(path),
+        "method": method,
+        "rows": len(data),
+        "total_rows": total,
+        "percent": 100.0 * len(data) / total if total else 100.0,
+    }
+
+
+def preview_plot(
+    plot_type: type[PlotBase],
+    template: dict,
+    path: str | Path,
+    max_rows: int = PREVIEW_ROWS,
+    **kwargs,
+) -> PlotBase:
+    """Builds a plot from sampled rows, flagged as a preview
+
+    Parameters
+    ----------
+    plot_type : type[PlotBase]
+        Plot built, e.g. ``Plot2D``
+    template : dict
+        Plot template
+    path : str | Path
+        Output data file, see ``read_sample``
+    max_rows : int, optional
+        Most rows read, by default PREVIEW_ROWS
+    **kwargs
+        Passed to the plot, e.g. ``lean``
+
+    Returns
+    -------
+    PlotBase
+        The plot, with ``preview`` describing the sample
+    """
+    data, sample = read_sample(path, template, max_rows)
+    plot = plot_type(template, data, **kwargs)
+    plot.mark_preview(sample)
+
+    return plot
+
+
+def _wanted_rows(total: int, percent: float, max_rows: int) -> int:
+    wanted = total if not percent else math.ceil(total * percent / 100.0)
+    return max(1, min(wanted, max_rows, total))
+
+
+def _sample_csv(
+    path: str | Path, percent: float, max_rows: int, policy: DtypePolicy
+) -> tuple[pd.DataFrame, SampleMethod, int]:
+    import io
+
+    import numpy as np
+
+    size = os.path.getsize(path)
+    with open(path, "rb", buffering=0) as file:
+        head = file.read(HEAD_BYTES)
+        start = head.find(b"\n") + 1
+        body = head[start:]
+        lines = body.count(b"\n")
+        if len(head) == size:
+            total = lines + (1 if body and not body.endswith(b"\n") else 0)
+        else:
+            # Line lengths at the start extrapolated to the whole file
+            total = max(1, round((size - start) * lines / max(len(body), 1)))
+
+        rows = _wanted_rows(total, percent, max_rows)
+        if start == 0 or len(head) == size or rows >= total * FULL_READ_SHARE:
+            data = policy.read_csv(path)
+            return data, "full", len(data)
+
+        offsets = start + np.arange(rows, dtype=np.int64) * (size - start) // rows
+        chunks = [head[:start]]
+        previous = -1
+        for offset in offsets.tolist():
+            line_start, line = _line_at(file, offset)
+
+            # Offsets within one line read it once
+            if line_start == previous or not line.strip():
+                continue
+            previous = line_start
+            chunks.append(line if line.endswith(b"\n") else line + b"\n")
+
+    return policy.read_csv(io.BytesIO(b"".join(chunks))), "stride", total
+
+
+def _line_at(file: BinaryIO, offset: int) -> tuple[int, bytes]:
+    """Start and bytes of the first line starting at or after an offset"""
+    window = LINE_WINDOW
+    while True:
+        # The byte before the offset tells whether a line starts there
+        file.seek(offset - 1)
+        chunk = file.read(window + 1)
+        at_end = len(chunk) <= window
+
+        begin = chunk.find(b"\n") + 1
+        end = chunk.find(b"\n", begin) if begin else -1
+        if begin and (end != -1 or at_end):
+            line = chunk[begin:] if end == -1 else chunk[begin : end + 1]
+            return offset - 1 + begin, line
+        if at_end:
+            # Inside the last line
+            return -1, b""
+
+        window *= 2
+
+
+def _sample_row_groups(
+    path: str | Path, kind: str, percent: float, max_rows: int
+) -> tuple[pd.DataFrame, SampleMethod, int]:
+    import numpy as np
+    import pyarrow as pa
+
+    if kind == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        sizes = [
+            parquet.metadata.row_group(group).num_rows
+            for group in range(parquet.num_row_groups)
+        ]
+
+        def read(groups: list[int]) -> pa.Table:
+            return parquet.read_row_groups(groups)
+
+    else:
+        # Memory mapped, so batches are only read once converted
+        reader = pa.ipc.open_file(pa.memory_map(str(path)))
+        sizes = [
+            reader.get_batch(batch).num_rows
+            for batch in range(reader.num_record_batches)
+        ]
+
+        def read(groups: list[int]) -> pa.Table:
+            return pa.Table.from_batches(
+                [reader.get_batch(batch) for batch in groups], reader.schema
+            )
+
+    total = sum(sizes)
+    rows = _wanted_rows(total, percent, max_rows) if total else 0
+    if rows >= total * FULL_READ_SHARE:
+        data = read(list(range(len(sizes)))).to_pandas()
+        return data, "full", total
+
+    # Evenly spaced groups holding about the wanted rows
+    count = min(len(sizes), math.ceil(len(sizes) * rows / total))
+    groups = np.unique(np.linspace(0, len(sizes) - 1, count).round().astype(int))
+    data = read(groups.tolist()).to_pandas()
+    if len(data) > rows:
+        # Groups larger than the sample are strided
+        keep = np.unique(np.linspace(0, len(data) - 1, rows).round().astype(np.intp))
+        data = data.iloc[keep].reset_index(drop=True)
+
+    return data, "row_groups", total
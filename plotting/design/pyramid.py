@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from .row_lookup import IndexMap
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+    from .trace_line import TraceBase
+
+# Per-bin extremes and the sample index each came from
+LEVEL_FIELDS = [
+    ("min_index", "<i8"),
+    ("max_index", "<i8"),
+    ("min", "<f8"),
+    ("max", "<f8"),
+]
+
+
+class ColumnPyramid:
+    """
+    Min/max summaries of a column at power-of-two decimation levels
+
+    Level 0 is the raw data; each bin of level ``k`` covers ``2**k`` samples
+    and keeps its minimum and maximum along with their sample indices
+    """
+
+    def __init__(self, values: np.ndarray, levels: list[np.ndarray]) -> None:
+        self.values = values
+        self.levels = levels
+
+    @property
+    def num_levels(self) -> int:
+        return len(self.levels) + 1
+
+    @classmethod
+    def build(cls, values: np.ndarray, min_bins: int = 64) -> "ColumnPyramid":
+        """Builds every level by pairwise reduction of the previous level
+
+        Parameters
+        ----------
+        values : np.ndarray
+            Raw column data
+        min_bins : int, optional
+            Stop once a level has at most this many bins, by default 64
+        """
+        import numpy as np
+
+        values = np.asarray(values, dtype=np.float64)
+        levels: list[np.ndarray] = []
+
+        current = np.empty(len(values), dtype=LEVEL_FIELDS)
+        current["min_index"] = current["max_index"] = np.arange(len(values))
+        current["min"] = current["max"] = values
+        while len(current) > min_bins:
+            current = cls.__reduce(current)
+            levels.append(current)
+
+        return cls(values, levels)
+
+    @classmethod
+    def raw(cls, values: np.ndarray) -> "ColumnPyramid":
+        """Raw sorted x data, without levels
+
+        Raises
+        ------
+        ValueError
+            Unsorted values, which range queries cannot search
+        """
+        import numpy as np
+
+        values = np.asarray(values, dtype=np.float64)
+        if not np.all(np.diff(values) >= 0):
+            raise ValueError("Pyramid x data must be sorted, e.g. time")
+
+        return cls(values, [])
+
+    def bins(self, level: int, start: int, stop: int) -> np.ndarray:
+        """Bins of a level covering samples ``start`` to ``stop`` (exclusive)"""
+        return self.levels[level - 1][start >> level : ((stop - 1) >> level) + 1]
+
+    def save(self, directory: Path, name: str) -> None:
+        import numpy as np
+
+        directory.mkdir(parents=True, exist_ok=True)
+        for level, array in enumerate([self.values, *self.levels]):
+            # Replaced rather than overwritten, memory mapped readers keep the
+            # previous file
+            path = directory / f"{name}.L{level}.npy"
+            temporary = path.with_suffix(".tmp")
+            with open(temporary, "wb") as file:
+                np.save(file, array)
+            temporary.replace(path)
+
+    @classmethod
+    def load(cls, directory: Path, name: str, num_levels: int) -> "ColumnPyramid":
+        """Memory maps a saved pyramid, so only queried ranges are read"""
+        import numpy as np
+
+        return cls(
+            np.load(directory / f"{name}.L0.npy", mmap_mode="r"),
+            [
+                np.load(directory / f"{name}.L{level}.npy", mmap_mode="r")
+                for level in range(1, num_levels)
+            ],
+        )
+
+    @staticmethod
+    def __reduce(bins: np.ndarray) -> np.ndarray:
+        import numpy as np
+
+        # An odd trailing bin is paired with itself
+        left = bins[0::2]
+        right = bins[1::2]
+        if len(right) < len(left):
+            right = np.concatenate([right, bins[-1:]])
+
+        reduced = np.empty(len(left), dtype=LEVEL_FIELDS)
+
+        # NaN never wins a comparison, so the finite side is kept
+        take_left = ~(right["min"] < left["min"])
+        reduced["min"] = np.where(take_left, left["min"], right["min"])
+        reduced["min_index"] = np.where(
+            take_left, left["min_index"], right["min_index"]
+        )
+
+        take_left = ~(right["max"] > left["max"])
+        reduced["max"] = np.where(take_left, left["max"], right["max"])
+        reduced["max_index"] = np.where(
+            take_left, left["max_index"], right["max_index"]
+        )
+
+        return reduced
+
+
+class TracePyramid:
+    """
+    Range queries over a 2D trace for zoom driven refinement
+
+    The x data must be sorted (e.g. time). Queries pick the coarsest level that
+    still gives every pixel its own bin and return each bin's extremes in
+    sample order, so peaks survive decimation
+    """
+
+    def __init__(self, x: np.ndarray, y: ColumnPyramid) -> None:
+        self.x = x
+        self.y = y
+
+    def sample_range(self, x_start: float, x_end: float) -> tuple[int, int]:
+        """Samples within the x-range plus one neighbor on each side"""
+        import numpy as np
+
+        start = int(np.searchsorted(self.x, x_start, side="left"))
+        stop = int(np.searchsorted(self.x, x_end, side="right"))
+        return max(start - 1, 0), min(stop + 1, len(self.x))
+
+    def level_for(self, x_start: float, x_end: float, pixels: int) -> int:
+        """Coarsest level with at least one bin per pixel over the x-range
+
+        Parameters
+        ----------
+        x_start : float
+            Start of the visible x-range
+        x_end : float
+            End of the visible x-range
+        pixels : int
+            Plot width in pixels
+
+        Returns
+        -------
+        int
+            Pyramid level, 0 for raw samples
+        """
+        start, stop = self.sample_range(x_start, x_end)
+        ratio = (stop - start) // max(pixels, 1)
+        if ratio < 2:
+            return 0
+
+        return min(ratio.bit_length() - 1, self.y.num_levels - 1)
+
+    def query(
+        self, x_start: float, x_end: float, pixels: int
+    ) -> tuple[np.ndarray, np.ndarray, int]:
+        """Trace data for an x-range rendered at a pixel width
+
+        Parameters
+        ----------
+        x_start : float
+            Start of the visible x-range
+        x_end : float
+            End of the visible x-range
+        pixels : int
+            Plot width in pixels
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray, int]
+            x values, y values and the level they came from
+        """
+        import numpy as np
+
+        index, values, level = self.__select(x_start, x_end, pixels)
+        return np.asarray(self.x[index]), values, level
+
+    def index_map(self, x_start: float, x_end: float, pixels: int) -> IndexMap:
+        """Sample index of every point returned by ``query``"""
+        import numpy as np
+
+        index, _, _ = self.__select(x_start, x_end, pixels)
+        if isinstance(index, slice):
+            index = np.arange(index.start, index.stop)
+
+        return IndexMap(index)
+
+    def __select(
+        self, x_start: float, x_end: float, pixels: int
+    ) -> tuple[np.ndarray | slice, np.ndarray, int]:
+        import numpy as np
+
+        start, stop = self.sample_range(x_start, x_end)
+        level = self.level_for(x_start, x_end, pixels)
+        if level == 0:
+            return slice(start, stop), np.asarray(self.y.values[start:stop]), 0
+
+        bins = self.y.bins(level, start, stop)
+
+        # Emit each bin's minimum and maximum in sample order
+        min_first = bins["min_index"] <= bins["max_index"]
+        index = np.empty(2 * len(bins), dtype=np.int64)
+        values = np.empty(2 * len(bins), dtype=np.float64)
+        index[0::2] = np.where(min_first, bins["min_index"], bins["max_index"])
+        index[1::2] = np.where(min_first, bins["max_index"], bins["min_index"])
+        values[0::2] = np.where(min_first, bins["min"], bins["max"])
+        values[1::2] = np.where(min_first, bins["max"], bins["min"])
+
+        return index, values, level
+
+
+class PyramidStore:
+    """
+    Trace pyramids saved in a directory next to the run data
+
+    Pyramids are built from ``TraceBase.get_axis_data`` so unit conversions
+    match the rendered figure, and are memory mapped when loaded. Only y data
+    gets levels, x data is saved raw. Files are named by a hash of the column
+    and its scale factor, and their metadata keeps the length and a hash of
+    the data they were built from
+    """
+
+    def __init__(self, directory: str | Path, min_bins: int = 64) -> None:
+        self.directory = Path(directory)
+        self.min_bins = min_bins
+
+    def trace_pyramid(
+        self,
+        trace: TraceBase,
+        grids: list[dict],
+        data: Optional[pd.DataFrame] = None,
+    ) -> TracePyramid:
+        """Loads a trace's pyramid, building and saving it when missing
+
+        Parameters
+        ----------
+        trace : TraceBase
+            2D trace being refined
+        grids : list[dict]
+            Template grids
+        data : Optional[pd.DataFrame], optional
+            Run output data, only required when the pyramid is not saved yet.
+            Saved pyramids built from other data are rebuilt from it
+
+        Returns
+        -------
+        TracePyramid
+            Pyramid of the trace's y data over its x data
+
+        Raises
+        ------
+        FileNotFoundError
+            Pyramid not saved and no data given
+        ValueError
+            Unsorted x data
+        """
+        grid = grids[trace.variable_template["subplot"] - 1]
+        axes = {axis["name"]: axis for axis in grid["axes"]}
+
+        pyramids: dict[str, ColumnPyramid] = {}
+        for name in ("x", "y"):
+            source = (
+                trace.variable_template[f"{name}Variable"],
+                axes[name]["scaleFactor"],
+            )
+            values = (
+                None
+                if data is None
+                else trace.get_axis_data(data, axes[name])[name].to_numpy()
+            )
+
+            # Only the raw x data is read, a column saved for x alone has no
+            # levels for y
+            pyramid = self.__load(source, values)
+            if pyramid is not None and name == "y" and not pyramid.levels:
+                pyramid = None if len(pyramid.values) > self.min_bins else pyramid
+            if pyramid is None:
+                if values is None:
+                    raise FileNotFoundError(
+                        f"No saved pyramid for {source} in {self.directory}"
+                    )
+                if name == "x":
+                    pyramid = ColumnPyramid.raw(values)
+                else:
+                    pyramid = ColumnPyramid.build(values, self.min_bins)
+                self.__save(source, pyramid)
+            pyramids[name] = pyramid
+
+        return TracePyramid(pyramids["x"].values, pyramids["y"])
+
+    def __load(
+        self, source: tuple[str, Optional[str]], values: Optional[np.ndarray]
+    ) -> Optional[ColumnPyramid]:
+        """Saved pyramid, None when missing or built from other data"""
+        name = self.__file_name(*source)
+        meta_file = self.directory / f"{name}.json"
+        if not meta_file.exists():
+            return None
+
+        meta = json.loads(meta_file.read_text())
+        if values is not None and (
+            meta.get("length") != len(values)
+            or meta.get("fingerprint") != _fingerprint(values)
+        ):
+            return None
+
+        pyramid = ColumnPyramid.load(self.directory, name, meta["levels"])
+        return pyramid if len(pyramid.values) == meta.get("length") else None
+
+    def __save(self, source: tuple[str, Optional[str]], pyramid: ColumnPyramid) -> None:
+        name = self.__file_name(*source)
+
+        # A stale pyramid stops being served before its files are replaced
+        (self.directory / f"{name}.json").unlink(missing_ok=True)
+        pyramid.save(self.directory, name)
+
+        # Metadata is written last and marks the pyramid complete
+        (self.directory / f"{name}.json").write_text(
+            json.dumps(
+                {
+                    "column": source[0],
+                    "scaleFactor": source[1],
+                    "levels": pyramid.num_levels,
+                    "length": len(pyramid.values),
+                    "fingerprint": _fingerprint(pyramid.values),
+                }
+            )
+        )
+
+    @staticmethod
+    def __file_name(column: str, scale_factor: Optional[str]) -> str:
+        # Derived columns, e.g. "=a*b" and "=a+b", need more than a sanitized name
+        key = json.dumps([column, scale_factor]).encode()
+        return hashlib.blake2b(key, digest_size=16).hexdigest()
+
+
+def _fingerprint(values: np.ndarray) -> str:
+    """Content hash of a pyramid's raw data"""
+    import numpy as np
+
+    data = np.ascontiguousarray(values, dtype=np.float64)
+    return hashlib.blake2b(data.tobytes(), digest_size=16).hexdigest()
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Iterable, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Items kept by the top compactor, rank error is about 1.7 / K
+DEFAULT_K = 200
+
+# Capacity ratio between a compactor and the one above it
+CAPACITY_DECAY = 2.0 / 3.0
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch (KLL) of a stream of values
+
+    Values are kept in compactors, sorted arrays whose items each stand for
+    ``2 ** level`` values. A full compactor keeps every other item, from a
+    random offset, in the compactor above. Sketches of separate chunks or
+    workers merge into a sketch of the combined stream, and memory stays
+    ``O(k)`` whatever the stream length. Streams shorter than ``k`` are kept
+    exactly. Non-finite values are skipped
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: int = 0) -> None:
+        """Creates an empty sketch
+
+        Parameters
+        ----------
+        k : int, optional
+            Capacity of the top compactor, by default DEFAULT_K
+        seed : int, optional
+            Seed of the compaction offsets, fixed so builds are reproducible,
+            by default 0
+        """
+        import numpy as np
+
+        if k < 8:
+            raise ValueError("Quantile sketches need k of at least 8")
+
+        self.k = k
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.compactors: list[np.ndarray] = [np.empty(0)]
+        self.__random = np.random.default_rng(seed)
+
+    @classmethod
+    def from_chunks(
+        cls, chunks: Iterable[Sequence[float] | np.ndarray], k: int = DEFAULT_K
+    ) -> "QuantileSketch":
+        """Sketch of values read in chunks, e.g. ``pd.read_csv(chunksize=...)``"""
+        sketch = cls(k)
+        for chunk in chunks:
+            sketch.update(chunk)
+
+        return sketch
+
+    def update(self, values: Sequence[float] | np.ndarray) -> None:
+        """Adds values to the sketch
+
+        Parameters
+        ----------
+        values : Sequence[float] | np.ndarray
+            Values of any length, compacted in one pass
+        """
+        import numpy as np
+
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.compactors[0] = np.concatenate((self.compactors[0], values))
+        self.__compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Adds the values of another sketch, e.g. from another worker
+
+        Parameters
+        ----------
+        other : QuantileSketch
+            Sketch of other values, not modified
+
+        Returns
+        -------
+        QuantileSketch
+            This sketch
+        """
+        import numpy as np
+
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for level, items in enumerate(other.compactors):
+            self.compactors[level] = np.concatenate((self.compactors[level], items))
+
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.__compress()
+
+        return self
+
+    def quantiles(self, quantiles: Sequence[float] | np.ndarray) -> np.ndarray:
+        """Approximate values at quantiles
+
+        Parameters
+        ----------
+        quantiles : Sequence[float] | np.ndarray
+            Quantiles between 0 and 1, 0 and 1 being the exact min and max
+
+        Returns
+        -------
+        np.ndarray
+            Value at each quantile, NaN for an empty sketch
+        """
+        import numpy as np
+
+        quantiles = np.asarray(quantiles, dtype=np.float64)
+        if np.any((quantiles < 0) | (quantiles > 1)):
+            raise ValueError("Quantiles must be within 0 to 1")
+        if self.count == 0:
+            return np.full(quantiles.shape, np.nan)
+
+        items = np.concatenate(self.compactors)
+        weights = np.concatenate(
+            [
+                np.full(len(compactor), 2.0**level)
+                for level, compactor in enumerate(self.compactors)
+            ]
+        )
+        order = np.argsort(items, kind="stable")
+        items, ranks = items[order], np.cumsum(weights[order])
+
+        # Item whose cumulative weight first reaches each rank
+        found = np.searchsorted(ranks, quantiles * ranks[-1], side="left")
+        values = items[np.minimum(found, len(items) - 1)]
+        values[quantiles == 0] = self.min
+        values[quantiles == 1] = self.max
+
+        return values
+
+    def __capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(2, math.ceil(self.k * CAPACITY_DECAY**depth))
+
+    def __compress(self) -> None:
+        import numpy as np
+
+        # New levels lower the capacity of those below, so compact until none
+        # is over capacity
+        compacted = True
+        while compacted:
+            compacted = False
+            for level in range(len(self.compactors)):
+                items = self.compactors[level]
+                if len(items) <= self.__capacity(level):
+                    continue
+
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+
+                # An odd item stays, every other remaining item moves up
+                items = np.sort(items)
+                kept, items = items[: len(items) % 2], items[len(items) % 2 :]
+                promoted = items[self.__random.integers(2) :: 2]
+                self.compactors[level] = kept
+                self.compactors[level + 1] = np.concatenate(
+                    (self.compactors[level + 1], promoted)
+                )
+                compacted = True
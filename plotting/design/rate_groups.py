@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Literal, Optional
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+AlignMethod = Literal["linear", "asof"]
+
+
+class RateGroups:
+    """
+    Output data written at several sample rates
+
+    Each group is a DataFrame with its own time column. Columns are aligned
+    onto another group's time base only when a trace reads them, by linear
+    interpolation or as-of (last sample at or before) lookup, so no combined
+    upsampled DataFrame is built
+    """
+
+    def __init__(
+        self,
+        groups: dict[str, pd.DataFrame],
+        time_column: str = "time_s",
+        method: AlignMethod = "linear",
+    ) -> None:
+        """Creates the rate groups
+
+        Parameters
+        ----------
+        groups : dict[str, pd.DataFrame]
+            Output data of each group, sorted by time
+        time_column : str, optional
+            Time column present in every group, by default "time_s"
+        method : AlignMethod, optional
+            Alignment of columns onto another group's time base,
+            by default "linear"
+        """
+        if method not in ("linear", "asof"):
+            raise ValueError(f"Invalid alignment '{method}'. Must be linear or asof")
+
+        for name, data in groups.items():
+            if time_column not in data.columns:
+                raise ValueError(f"Rate group '{name}' has no '{time_column}' column")
+
+        self.groups = groups
+        self.time_column = time_column
+        self.method = method
+
+        # The first group holding a column is its source
+        self.column_groups: dict[str, str] = {}
+        for name, data in groups.items():
+            for column in data.columns:
+                if column != time_column:
+                    self.column_groups.setdefault(column, name)
+
+        self.__aligned: dict[tuple[str, str], pd.Series] = {}
+
+    def header(self) -> pd.DataFrame:
+        """Empty DataFrame with every column, for column lookups"""
+        import pandas as pd
+
+        return pd.DataFrame(columns=[self.time_column, *self.column_groups])
+
+    def base_group(self, x_column: str, columns: Iterable[str] = ()) -> str:
+        """Time base a trace is aligned onto
+
+        The group of the x variable, or for time on the x axis, the group of
+        the trace's other columns so they keep their native rate
+
+        Parameters
+        ----------
+        x_column : str
+            Trace x variable
+        columns : Iterable[str], optional
+            Other columns read by the trace, by default ()
+
+        Returns
+        -------
+        str
+            Rate group name
+        """
+        for column in (x_column, *columns):
+            if column in self.column_groups:
+                return self.column_groups[column]
+
+        return next(iter(self.groups))
+
+    def fastest_group(self, columns: Iterable[str]) -> str:
+        """Group with the most samples among the groups of the columns"""
+        groups = {self.column_groups[c] for c in columns if c in self.column_groups}
+        return max(groups or self.groups, key=lambda name: len(self.groups[name].index))
+
+    def aligned(self, column: str, group: str) -> pd.Series:
+        """Column sampled on a group's time base
+
+        Parameters
+        ----------
+        column : str
+            Output data column
+        group : str
+            Rate group providing the time base
+
+        Returns
+        -------
+        pd.Series
+            Column data, aligned when it belongs to another group. Samples
+            outside the source time range are NaN
+        """
+        import pandas as pd
+
+        base = self.groups[group]
+        if column in base.columns:
+            return base[column]
+
+        key = (column, group)
+        if key not in self.__aligned:
+            source = self.groups[self.column_groups[column]]
+            values = self.__align(
+                source[self.time_column].to_numpy(),
+                source[column].to_numpy(),
+                base[self.time_column].to_numpy(),
+            )
+            self.__aligned[key] = pd.Series(values, index=base.index, name=column)
+
+        return self.__aligned[key]
+
+    def frame(
+        self, columns: Iterable[str], group: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Columns aligned onto one time base, without copying native columns
+
+        Parameters
+        ----------
+        columns : Iterable[str]
+            Output data columns
+        group : Optional[str], optional
+            Rate group providing the time base, by default the fastest group
+            of the columns
+
+        Returns
+        -------
+        pd.DataFrame
+            Time column followed by the requested columns
+        """
+        import pandas as pd
+
+        columns = list(dict.fromkeys(columns))
+        if group is None:
+            group = self.fastest_group(columns)
+
+        names = [self.time_column, *(c for c in columns if c != self.time_column)]
+        return pd.DataFrame(
+            {name: self.aligned(name, group) for name in names}, copy=False
+        )
+
+    def __align(
+        self, source_time: np.ndarray, values: np.ndarray, time: np.ndarray
+    ) -> np.ndarray:
+        import numpy as np
+
+        if self.method == "linear" and values.dtype.kind in "fiu":
+            return np.interp(time, source_time, values, left=np.nan, right=np.nan)
+
+        # Last source sample at or before each time
+        index = np.searchsorted(source_time, time, side="right") - 1
+        aligned = values[np.maximum(index, 0)]
+        if (index < 0).any():
+            aligned = aligned.astype(np.result_type(aligned.dtype, np.float64))
+            aligned[index < 0] = np.nan
+
+        return aligned
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import html
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from .plot_base import PlotBase
+
+PLOTLY_JS_FILE = "plotly.min.js"
+
+# Inflates each figure blob when its placeholder scrolls into view
+REPORT_SCRIPT = """
+const DTYPES = {
+  f8: Float64Array, f4: Float32Array, i4: Int32Array, u4: Uint32Array,
+  i2: Int16Array, u2: Uint16Array, i1: Int8Array, u1: Uint8Array,
+  i8: BigInt64Array, u8: BigUint64Array,
+};
+
+function toBytes(text) {
+  return Uint8Array.from(atob(text.trim()), (c) => c.charCodeAt(0));
+}
+
+function decodeArray(encoded) {
+  const array = new DTYPES[encoded.dtype](toBytes(encoded.bdata).buffer);
+  // plotly.js has no 64-bit integer arrays
+  return array instanceof BigInt64Array || array instanceof BigUint64Array
+    ? Float64Array.from(array, Number)
+    : array;
+}
+
+async function inflate(text) {
+  const stream = new Blob([toBytes(text)])
+    .stream()
+    .pipeThrough(new DecompressionStream("gzip"));
+  return JSON.parse(await new Response(stream).text());
+}
+
+async function render(element) {
+  const figure = await inflate(
+    document.getElementById(element.dataset.blob).textContent
+  );
+  const arrays = {};
+  for (const [key, dataset] of Object.entries(figure.datasets || {})) {
+    arrays[key] = decodeArray(dataset.data);
+  }
+  for (const trace of figure.data) {
+    for (const [name, value] of Object.entries(trace)) {
+      if (value && value.dataset !== undefined && Object.keys(value).length === 1) {
+        trace[name] = arrays[value.dataset];
+      }
+    }
+  }
+  await Plotly.newPlot(element, figure.data, figure.layout);
+}
+
+const observer = new IntersectionObserver(
+  (entries) => {
+    for (const entry of entries) {
+      if (entry.isIntersecting) {
+        observer.unobserve(entry.target);
+        render(entry.target);
+      }
+    }
+  },
+  { rootMargin: "200px" }
+);
+document.querySelectorAll(".figure").forEach((element) => observer.observe(element));
+"""
+
+
+def figure_blob(plot: PlotBase) -> str:
+    """Gzip compressed shared figure JSON, base64 encoded for embedding
+
+    Parameters
+    ----------
+    plot : PlotBase
+        Built plot
+
+    Returns
+    -------
+    str
+        Blob inflated by the report script
+    """
+    return base64.b64encode(
+        gzip.compress(plot.to_shared_json().encode("utf-8"), mtime=0)
+    ).decode("ascii")
+
+
+def write_report(
+    plots: Iterable[PlotBase],
+    path: str | Path,
+    title: str = "Report",
+    shared_asset: bool = False,
+) -> Path:
+    """
+    Writes many plots into one HTML report sharing a single plotly.js
+
+    Figures are embedded as compressed blobs and rendered only when scrolled
+    into view, so large reports open quickly
+
+    Parameters
+    ----------
+    plots : Iterable[PlotBase]
+        Plots in report order
+    path : str | Path
+        HTML file, or the report directory when ``shared_asset`` is set
+    title : str, optional
+        Document title, by default "Report"
+    shared_asset : bool, optional
+        Write ``index.html`` next to a shared ``plotly.min.js`` instead of
+        inlining plotly.js, by default False
+
+    Returns
+    -------
+    Path
+        Written HTML file
+    """
+    from plotly.offline import get_plotlyjs
+
+    path = Path(path)
+    if shared_asset:
+        path.mkdir(parents=True, exist_ok=True)
+        (path / PLOTLY_JS_FILE).write_text(get_plotlyjs(), encoding="utf-8")
+        plotly_js = f'<script src="{PLOTLY_JS_FILE}"></script>'
+        path = path / "index.html"
+    else:
+        plotly_js = f"<script>{get_plotlyjs()}</script>"
+
+    sections = []
+    for number, plot in enumerate(plots, start=1):
+        # Placeholders reserve the figure size so scrolling stays stable
+        layout = plot.figure.layout
+        sections.append(
+            f'<section><div class="figure" data-blob="blob-{number}"'
+            f' style="width:{layout.width or 700}px;height:{layout.height or 450}px">'
+            f"</div>"
+            f'<script type="application/octet-stream" id="blob-{number}">'
+            f"{figure_blob(plot)}</script></section>"
+        )
+
+    path.write_text(
+        "\n".join(
+            [
+                "<!DOCTYPE html>",
+                '<html><head><meta charset="utf-8">',
+                f"<title>{html.escape(title)}</title>",
+                plotly_js,
+                "</head><body>",
+                f"<h1>{html.escape(title)}</h1>",
+                *sections,
+                f"<script>{REPORT_SCRIPT}</script>",
+                "</body></html>",
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    return path
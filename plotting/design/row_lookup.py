@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Average number of points per spatial index cell
+POINTS_PER_CELL = 16
+
+# Rings searched around a hover point before scanning every point instead
+MAX_RINGS = 16
+
+
+def row_dtype(length: int) -> np.dtype:
+    """Smallest row id type for a number of rows, int32 up to 2**31 rows"""
+    import numpy as np
+
+    return np.dtype(np.int32 if length < 2**31 else np.int64)
+
+
+def expand_ranges(starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """Concatenated ``arange(start, stop)`` of every range, without a loop"""
+    import numpy as np
+
+    lengths = stops - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Each range continues from its start, offset by its position in the output
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return offsets + np.arange(total)
+
+
+class IndexMap:
+    """
+    Output data rows behind the displayed points of a reduced trace
+
+    Decimated traces keep one row per point, aggregated traces a row range per
+    point (``stops``), e.g. each step of a discrete trace covers the rows
+    until the next transition
+    """
+
+    def __init__(self, rows: np.ndarray, stops: Optional[np.ndarray] = None) -> None:
+        """Creates the map
+
+        Parameters
+        ----------
+        rows : np.ndarray
+            Row of each displayed point, or the first row of its range
+        stops : Optional[np.ndarray], optional
+            End (exclusive) of each point's row range, by default None
+        """
+        import numpy as np
+
+        dtype = row_dtype(int(rows.max()) + 1 if len(rows) else 0)
+        self.rows = np.asarray(rows, dtype=dtype)
+        self.stops = None if stops is None else np.asarray(stops, dtype=dtype)
+
+    @classmethod
+    def from_runs(cls, starts: np.ndarray, length: int) -> "IndexMap":
+        """Map of points each covering the rows until the next point
+
+        Parameters
+        ----------
+        starts : np.ndarray
+            First row of each point, sorted
+        length : int
+            Number of rows, ending the last range
+
+        Returns
+        -------
+        IndexMap
+            Map with row ranges
+        """
+        import numpy as np
+
+        return cls(starts, np.append(starts[1:], length))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def source_rows(self, points: Sequence[int] | np.ndarray) -> np.ndarray:
+        """Rows behind displayed points, e.g. plotly's ``pointIndex`` values
+
+        Parameters
+        ----------
+        points : Sequence[int] | np.ndarray
+            Displayed point indices
+
+        Returns
+        -------
+        np.ndarray
+            Sorted unique rows, every row of a range included
+        """
+        import numpy as np
+
+        points = np.asarray(points, dtype=np.intp)
+        if self.stops is None:
+            return np.unique(self.rows[points])
+
+        return np.unique(expand_ranges(self.rows[points], self.stops[points]))
+
+
+class SpatialIndex:
+    """
+    Uniform grid over a trace's full resolution points
+
+    Rows are sorted by grid cell so every cell is one contiguous slice of the
+    sorted coordinates. Hover queries search rings of cells around a point,
+    lasso queries test single points only in cells crossed by the polygon
+    """
+
+    def __init__(self, *coordinates: np.ndarray) -> None:
+        """Indexes the points, rows with non-finite coordinates are skipped
+
+        Parameters
+        ----------
+        *coordinates : np.ndarray
+            x, y and optionally z values of every row
+        """
+        import numpy as np
+
+        if len(coordinates) not in (2, 3):
+            raise ValueError("A spatial index requires x/y or x/y/z coordinates")
+
+        columns = [np.asarray(values, dtype=np.float64) for values in coordinates]
+        finite = np.logical_and.reduce([np.isfinite(values) for values in columns])
+        rows = np.flatnonzero(finite).astype(row_dtype(len(finite)))
+
+        self.dimensions = len(columns)
+        self.low = np.array(
+            [values[rows].min() if len(rows) else 0.0 for values in columns]
+        )
+        high = np.array(
+            [values[rows].max() if len(rows) else 1.0 for values in columns]
+        )
+
+        per_axis = max(1, round((len(rows) / POINTS_PER_CELL) ** (1 / self.dimensions)))
+        self.shape = (per_axis,) * self.dimensions
+        self.cell_size = (high - self.low) / per_axis
+        self.cell_size[self.cell_size == 0] = 1.0
+
+        cells = self.__cell_ids(np.column_stack([values[rows] for values in columns]))
+        order = np.argsort(cells, kind="stable")
+        self.rows = rows[order]
+        self.coordinates = [values[self.rows] for values in columns]
+        self.starts = np.concatenate(
+            ([0], np.cumsum(np.bincount(cells, minlength=int(np.prod(self.shape)))))
+        )
+
+    def nearest(
+        self,
+        point: Sequence[float],
+        k: int = 1,
+        scale: Optional[Sequence[float]] = None,
+        max_distance: Optional[float] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Rows closest to a point, e.g. the cursor of a hover event
+
+        Parameters
+        ----------
+        point : Sequence[float]
+            Position in data coordinates
+        k : int, optional
+            Number of rows, by default 1
+        scale : Optional[Sequence[float]], optional
+            Pixels per data unit of each axis, so distances are measured on
+            screen, by default 1 for every axis
+        max_distance : Optional[float], optional
+            Ignore rows further away, by default None
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Rows and their distances, nearest first
+        """
+        import numpy as np
+
+        point = np.asarray(point, dtype=np.float64)
+        scale = np.ones(self.dimensions) if scale is None else np.asarray(scale)
+        empty = np.empty(0, dtype=self.rows.dtype), np.empty(0)
+        if len(self.rows) == 0:
+            return empty
+
+        center = self.__cell_coordinates(point)
+
+        positions, distances = [], []
+        for ring in range(max(self.shape)):
+            if ring > MAX_RINGS:
+                # Sparse neighbourhood, e.g. a point far outside the data
+                positions, distances = self.__nearest_cells(
+                    point, k, scale, max_distance
+                )
+                break
+
+            positions.append(self.__ring_points(center, ring))
+            distances.append(self.__distances(positions[-1], point, scale))
+
+            # Closest any point in a cell outside the searched rings can be
+            bound = self.__unvisited_distance(point, center, ring, scale)
+            if bound > (np.inf if max_distance is None else max_distance):
+                break
+            found = sum(len(values) for values in distances)
+            if found >= k:
+                nearest = np.concatenate(distances)
+                if np.partition(nearest, k - 1)[k - 1] <= bound:
+                    break
+
+        visited = np.concatenate(positions)
+        distances = np.concatenate(distances)
+        if max_distance is not None:
+            keep = distances <= max_distance
+            visited, distances = visited[keep], distances[keep]
+        if len(visited) == 0:
+            return empty
+
+        if len(distances) > k:
+            # Ties at the kth distance are resolved by row after partitioning
+            cutoff = np.partition(distances, k - 1)[k - 1]
+            keep = np.flatnonzero(distances <= cutoff)
+            visited, distances = visited[keep], distances[keep]
+        closest = np.lexsort((self.rows[visited], distances))[:k]
+        return self.rows[visited[closest]], distances[closest]
+
+    def within(self, polygon: Sequence[Sequence[float]]) -> np.ndarray:
+        """Rows inside a polygon, e.g. the path of a lasso selection
+
+        Parameters
+        ----------
+        polygon : Sequence[Sequence[float]]
+            x/y vertices in data coordinates
+
+        Returns
+        -------
+        np.ndarray
+            Sorted rows inside the polygon (even-odd rule)
+        """
+        import numpy as np
+
+        if self.dimensions != 2:
+            raise ValueError("Lasso selection requires a 2D spatial index")
+
+        vertices = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+        vertices = vertices[np.isfinite(vertices).all(axis=1)]
+        if len(vertices) < 3 or len(self.rows) == 0:
+            return np.empty(0, dtype=self.rows.dtype)
+
+        # Cells of the polygon's bounding box
+        first = self.__cell_coordinates(vertices.min(axis=0))
+        last = self.__cell_coordinates(vertices.max(axis=0))
+        cx, cy = np.meshgrid(
+            np.arange(first[0], last[0] + 1),
+            np.arange(first[1], last[1] + 1),
+            indexing="ij",
+        )
+
+        # Cells crossed by an edge, widened by one so clipped corners count
+        crossed = np.zeros(cx.shape, dtype=bool)
+        closed = np.vstack([vertices, vertices[:1]])
+        for start, stop in zip(closed[:-1], closed[1:]):
+            steps = np.max(np.abs(stop - start) / self.cell_size) * 2 + 1
+            path = start + np.linspace(0.0, 1.0, int(np.ceil(steps)) + 1)[
+                :, np.newaxis
+            ] * (stop - start)
+            cells = self.__cell_coordinates(path) - first
+            crossed[cells[:, 0], cells[:, 1]] = True
+        boundary = crossed.copy()
+        for shift_x in (-1, 0, 1):
+            for shift_y in (-1, 0, 1):
+                boundary |= np.roll(np.roll(crossed, shift_x, 0), shift_y, 1)
+
+        # Uncrossed cells are entirely inside or outside, their center decides
+        centers = self.low + (np.stack([cx, cy], axis=-1) + 0.5) * self.cell_size
+        inside_cells = ~boundary & _in_polygon(
+            centers[..., 0].ravel(), centers[..., 1].ravel(), closed
+        ).reshape(cx.shape)
+
+        cell_ids = np.ravel_multi_index((cx, cy), self.shape)
+        inside = self.__cell_points(cell_ids[inside_cells])
+        candidates = self.__cell_points(cell_ids[boundary])
+        candidates = candidates[
+            _in_polygon(
+                self.coordinates[0][candidates],
+                self.coordinates[1][candidates],
+                closed,
+            )
+        ]
+
+        return np.sort(self.rows[np.concatenate([inside, candidates])])
+
+    def __cell_coordinates(self, points: np.ndarray) -> np.ndarray:
+        import numpy as np
+
+        return np.clip(
+            ((points - self.low) / self.cell_size).astype(np.int64),
+            0,
+            np.array(self.shape) - 1,
+        )
+
+    def __cell_ids(self, points: np.ndarray) -> np.ndarray:
+        import numpy as np
+
+        return np.ravel_multi_index(
+            tuple(self.__cell_coordinates(points).T), self.shape
+        )
+
+    def __cell_points(self, cell_ids: np.ndarray) -> np.ndarray:
+        """Positions in the sorted coordinates of every point in the cells"""
+        return expand_ranges(self.starts[cell_ids], self.starts[cell_ids + 1])
+
+    def __ring_points(self, center: np.ndarray, ring: int) -> np.ndarray:
+        """Points of the cells exactly ``ring`` cells away from the center"""
+        import numpy as np
+
+        span = np.arange(-ring, ring + 1)
+        offsets = np.stack(
+            np.meshgrid(*[span] * self.dimensions, indexing="ij"), axis=-1
+        ).reshape(-1, self.dimensions)
+        offsets = offsets[np.abs(offsets).max(axis=1) == ring]
+
+        cells = center + offsets
+        cells = cells[((cells >= 0) & (cells < np.array(self.shape))).all(axis=1)]
+        return self.__cell_points(np.ravel_multi_index(tuple(cells.T), self.shape))
+
+    def __nearest_cells(
+        self,
+        point: np.ndarray,
+        k: int,
+        scale: np.ndarray,
+        max_distance: Optional[float],
+    ) -> tuple[list[np.ndarray], list[np.ndarray]]:
+        """Best first search over the non-empty cells, closest cells first"""
+        import numpy as np
+
+        cells = np.flatnonzero(np.diff(self.starts))
+        low = (
+            self.low
+            + np.column_stack(np.unravel_index(cells, self.shape)) * self.cell_size
+        )
+        gap = np.maximum(np.maximum(low - point, point - low - self.cell_size), 0.0)
+        bounds = np.sqrt(np.sum((gap * scale) ** 2, axis=1))
+        if max_distance is not None:
+            cells, bounds = (
+                cells[bounds <= max_distance],
+                bounds[bounds <= max_distance],
+            )
+        order = np.argsort(bounds, kind="stable")
+
+        positions, distances = [], []
+        done, chunk = 0, 64
+        while done < len(order):
+            positions.append(self.__cell_points(cells[order[done : done + chunk]]))
+            distances.append(self.__distances(positions[-1], point, scale))
+            done, chunk = done + chunk, chunk * 2
+
+            found = sum(len(values) for values in distances)
+            if done < len(order) and found >= k:
+                nearest = np.partition(np.concatenate(distances), k - 1)[k - 1]
+                if nearest <= bounds[order[done]]:
+                    break
+
+        return positions, distances
+
+    def __unvisited_distance(
+        self, point: np.ndarray, center: np.ndarray, ring: int, scale: np.ndarray
+    ) -> float:
+        """Distance from the point to the cells beyond the searched rings"""
+        import numpy as np
+
+        shape = np.array(self.shape)
+        grid_high = self.low + shape * self.cell_size
+        bound = np.inf
+        for axis in range(self.dimensions):
+            # Unsearched cells below and above the rings along this axis
+            for first, last in (
+                (0, center[axis] - ring),
+                (center[axis] + ring + 1, shape[axis]),
+            ):
+                if first >= last:
+                    continue
+
+                low, high = self.low.copy(), grid_high.copy()
+                low[axis] = self.low[axis] + first * self.cell_size[axis]
+                high[axis] = self.low[axis] + last * self.cell_size[axis]
+                gap = np.maximum(np.maximum(low - point, point - high), 0.0) * scale
+                bound = min(bound, float(np.sqrt(np.sum(gap**2))))
+
+        return bound
+
+    def __distances(
+        self, positions: np.ndarray, point: np.ndarray, scale: np.ndarray
+    ) -> np.ndarray:
+        import numpy as np
+
+        squared = np.zeros(len(positions))
+        for values, center, factor in zip(self.coordinates, point, scale):
+            squared += ((values[positions] - center) * factor) ** 2
+
+        return np.sqrt(squared)
+
+
+def _in_polygon(x: np.ndarray, y: np.ndarray, closed: np.ndarray) -> np.ndarray:
+    """Even-odd point in polygon test, one vectorized pass per edge"""
+    import numpy as np
+
+    inside = np.zeros(len(x), dtype=bool)
+    for (x1, y1), (x2, y2) in zip(closed[:-1], closed[1:]):
+        if y1 == y2:
+            continue
+
+        crosses = (y1 > y) != (y2 > y)
+        crossing_x = x1 + (y - y1) * ((x2 - x1) / (y2 - y1))
+        inside ^= crosses & (x < crossing_x)
+
+    return inside
@@ -0,0 +1,257 @@
+from typing import Optional, TypedDict
+
+
+class SubplotCell(TypedDict):
+    """Placement of a single grid within the subplot layout"""
+
+    row: int
+    column: int
+    is_3d: bool
+    number: int
+    x_domain: list[float]
+    y_domain: list[float]
+
+
+class SubplotLayout:
+    """
+    Computes subplot domains, axis anchors and scene assignments directly,
+    replacing ``plotly.subplots.make_subplots`` for template driven grids
+    """
+
+    def __init__(
+        self,
+        grids: list[dict],
+        variables: list[dict],
+        vertical_spacing: float = 0.08,
+        horizontal_spacing: Optional[float] = None,
+        shared_xaxes: bool = False,
+        shared_yaxes: bool = False,
+    ) -> None:
+        """Creates the subplot layout
+
+        Parameters
+        ----------
+        grids : list[dict]
+            Template grids, one per subplot
+        variables : list[dict]
+            Template variables, used to locate each grid's row and column
+        vertical_spacing : float, optional
+            Space between rows in normalized paper units, by default 0.08
+        horizontal_spacing : Optional[float], optional
+            Space between columns, by default 0.2 divided by the column count
+        shared_xaxes : bool, optional
+            Link x axes within each column, by default False
+        shared_yaxes : bool, optional
+            Link y axes within each row, by default False
+        """
+        self.grids = grids
+        self.shared_xaxes = shared_xaxes
+        self.shared_yaxes = shared_yaxes
+
+        positions = self.__grid_positions(grids, variables)
+        self.num_rows = max(row for row, _ in positions)
+        self.num_columns = max(column for _, column in positions)
+
+        self.vertical_spacing = vertical_spacing
+        self.horizontal_spacing = (
+            0.2 / self.num_columns if horizontal_spacing is None else horizontal_spacing
+        )
+
+        if self.num_rows > 1 and vertical_spacing > 1 / (self.num_rows - 1):
+            raise ValueError(
+                f"Vertical spacing {vertical_spacing} must be at most"
+                f" {1 / (self.num_rows - 1):.4f} for {self.num_rows} rows"
+            )
+        if self.num_columns > 1 and self.horizontal_spacing > 1 / (
+            self.num_columns - 1
+        ):
+            raise ValueError(
+                f"Horizontal spacing {self.horizontal_spacing} must be at most"
+                f" {1 / (self.num_columns - 1):.4f} for {self.num_columns} columns"
+            )
+
+        self.cells = self.__create_cells(positions)
+
+    @classmethod
+    def from_template(cls, template: dict) -> "SubplotLayout":
+        return cls(
+            template["grids"],
+            template["variables"],
+            template["layout"]["verticalSpacing"],
+            None,
+            template["layout"]["sharedXAxes"],
+            template["layout"]["sharedYAxes"],
+        )
+
+    def trace_anchor(self, subplot: int) -> dict[str, str]:
+        """Trace properties assigning a trace to its subplot axes
+
+        Parameters
+        ----------
+        subplot : int
+            One-based subplot (grid) number
+
+        Returns
+        -------
+        dict[str, str]
+            ``scene`` for 3D subplots, ``xaxis``/``yaxis`` for 2D subplots
+        """
+        cell = self.cells[subplot - 1]
+        if cell["is_3d"]:
+            return {"scene": self.__axis_id("scene", cell["number"])}
+
+        return {
+            "xaxis": self.__axis_id("x", cell["number"]),
+            "yaxis": self.__axis_id("y", cell["number"]),
+        }
+
+    def layout(self) -> dict:
+        """Layout dict with the domains, anchors and shared axis links of every grid
+
+        Keys follow the ``xaxis{n}``/``yaxis{n}``/``scene{n}`` naming used by
+        ``update_2d_grid`` and ``update_3d_grid`` so both can merge into it
+
+        Returns
+        -------
+        dict
+            Plotly layout properties
+        """
+        layout: dict = {}
+        for cell in self.cells:
+            number = cell["number"]
+            if cell["is_3d"]:
+                layout[f"scene{number}"] = {
+                    "domain": {"x": cell["x_domain"], "y": cell["y_domain"]}
+                }
+                continue
+
+            layout[f"xaxis{number}"] = {
+                "anchor": self.__axis_id("y", number),
+                "domain": cell["x_domain"],
+            }
+            layout[f"yaxis{number}"] = {
+                "anchor": self.__axis_id("x", number),
+                "domain": cell["y_domain"],
+            }
+
+        if self.shared_xaxes:
+            self.__link_axes(layout, "x")
+        if self.shared_yaxes:
+            self.__link_axes(layout, "y")
+
+        return layout
+
+    def title_annotations(self) -> list[dict]:
+        """Subplot titles centered above each grid
+
+        Returns
+        -------
+        list[dict]
+            Plotly annotations for grids with a title
+        """
+        return [
+            {
+                "text": grid["title"],
+                "x": sum(cell["x_domain"]) / 2,
+                "y": cell["y_domain"][1],
+                "xref": "paper",
+                "yref": "paper",
+                "xanchor": "center",
+                "yanchor": "bottom",
+                "showarrow": False,
+                "font": {"size": 16},
+            }
+            for grid, cell in zip(self.grids, self.cells)
+            if grid.get("title")
+        ]
+
+    def __create_cells(self, positions: list[tuple[int, int]]) -> list[SubplotCell]:
+        width = (
+            1 - self.horizontal_spacing * (self.num_columns - 1)
+        ) / self.num_columns
+        height = (1 - self.vertical_spacing * (self.num_rows - 1)) / self.num_rows
+
+        cells: list[SubplotCell] = []
+        num_2d = 1
+        num_3d = 1
+        for grid, (row, column) in zip(self.grids, positions):
+            # Axis numbering matches the grid order used when building axes
+            is_3d = len(grid["axes"]) == 3
+            if is_3d:
+                number = num_3d
+                num_3d += 1
+            else:
+                number = num_2d
+                num_2d += 1
+
+            # Row one is at the top of the figure
+            x_start = (column - 1) * (width + self.horizontal_spacing)
+            y_start = (self.num_rows - row) * (height + self.vertical_spacing)
+            cells.append(
+                {
+                    "row": row,
+                    "column": column,
+                    "is_3d": is_3d,
+                    "number": number,
+                    "x_domain": [x_start, min(x_start + width, 1.0)],
+                    "y_domain": [y_start, min(y_start + height, 1.0)],
+                }
+            )
+
+        return cells
+
+    def __link_axes(self, layout: dict, axis: str) -> None:
+        """Matches 2D axes to a shared base axis and hides duplicate tick labels
+
+        X axes share within a column using the bottom subplot, y axes share
+        within a row using the left-most subplot
+        """
+        groups: dict[int, list[SubplotCell]] = {}
+        for cell in self.cells:
+            if not cell["is_3d"]:
+                key = cell["column"] if axis == "x" else cell["row"]
+                groups.setdefault(key, []).append(cell)
+
+        for cells in groups.values():
+            base = (
+                max(cells, key=lambda cell: cell["row"])
+                if axis == "x"
+                else min(cells, key=lambda cell: cell["column"])
+            )
+            for cell in cells:
+                if cell is base:
+                    continue
+                layout[f"{axis}axis{cell['number']}"].update(
+                    {
+                        "matches": self.__axis_id(axis, base["number"]),
+                        "showticklabels": False,
+                    }
+                )
+
+    @staticmethod
+    def __grid_positions(
+        grids: list[dict], variables: list[dict]
+    ) -> list[tuple[int, int]]:
+        """Row and column of each grid, taken from the first variable plotted on it
+
+        Grids without a located variable stack in a single column
+        """
+        positions: dict[int, tuple[int, int]] = {}
+        for variable in variables:
+            subplot = variable.get("subplot")
+            if (
+                subplot not in positions
+                and variable["row"] is not None
+                and variable["column"] is not None
+            ):
+                positions[subplot] = (variable["row"], variable["column"])
+
+        return [
+            positions.get(grid["subplot"], (index + 1, 1))
+            for index, grid in enumerate(grids)
+        ]
+
+    @staticmethod
+    def __axis_id(name: str, number: int) -> str:
+        """Plotly references the first axis without a number, e.g. ``x``, ``x2``"""
+        return name if number == 1 else f"{name}{number}"
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+from typing import Any, TypedDict
+
+from .linked_selection import RestylePayload
+
+# Variable fields only styling their own trace
+STYLE_FIELDS = {
+    "traceName",
+    "connectgaps",
+    "mode",
+    "markerColor",
+    "markerSize",
+    "markerType",
+    "lineColor",
+    "lineWidth",
+    "lineType",
+    "lineShape",
+    "legendGroupTitle",
+}
+
+# Variable fields read when preparing the trace data
+DATA_FIELDS = {"xVariable", "yVariable", "zVariable", "colorVariable"}
+
+# Axis fields only styling the grid's axes, ``scaleFactor`` transforms data
+AXIS_FIELDS = {
+    "domainMax",
+    "domainMin",
+    "enableBox",
+    "enableGrid",
+    "label",
+    "max",
+    "min",
+    "tickMode",
+    "tickText",
+    "tickVals",
+}
+
+# Grid fields of the axes layout, the heatmap levels and the legend
+GRID_AXIS_FIELDS = {"axisType", "overwriteDomain", "title"}
+GRID_HEATMAP_FIELDS = {
+    "autoLevels",
+    "colorBarTitle",
+    "colorScale",
+    "levelCount",
+    "showColorBar",
+}
+
+# Layout fields applied without touching traces
+LAYOUT_FIELDS = {
+    "height",
+    "width",
+    "theme",
+    "legendTitle",
+    "verticalSpacing",
+    "shareXAxis",
+    "shareYAxis",
+    "sharedXAxes",
+    "sharedYAxes",
+}
+
+# Layout keys plotly names without a number for the first grid
+FIRST_AXES = {"xaxis", "yaxis", "zaxis", "scene"}
+
+# Fields not used to build figures, the grid's legend group title is unused
+IGNORED_FIELDS = {
+    "description",
+    "name",
+    "temporary",
+    "legendPosition",
+    "legendGroupTitle",
+}
+
+
+class TemplatePatch(TypedDict):
+    """Figure update applying a template edit
+
+    ``relayout`` and ``restyle`` follow ``Plotly.relayout`` and
+    ``Plotly.restyle``. ``rebuilt`` edits changed data every part depends on,
+    e.g. contours or filters, so the whole figure was rebuilt instead
+    """
+
+    relayout: dict[str, Any]
+    restyle: list[RestylePayload]
+    rebuilt: bool
+
+
+class TemplateChanges:
+    """
+    Figure parts affected by a template edit
+
+    Every field falls in the narrowest scope depending on it: the layout,
+    the style of single traces, the data of single traces (redone by
+    preparing only those traces again), or the whole figure. Unknown fields
+    conservatively rebuild the whole figure
+    """
+
+    def __init__(self, old: dict, new: dict) -> None:
+        self.full = False
+        self.layout = False
+        self.style: set[int] = set()
+        self.data: set[int] = set()
+
+        self.__compare(old, new)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.full or self.layout or self.style or self.data)
+
+    def __compare(self, old: dict, new: dict) -> None:
+        for key in old.keys() | new.keys():
+            if key in IGNORED_FIELDS or old.get(key) == new.get(key):
+                continue
+
+            if key == "title" or key == "classification":
+                self.layout = True
+            elif key == "layout":
+                self.__compare_layout(old[key], new[key])
+            elif key == "grids":
+                self.__compare_grids(old, new)
+            elif key == "variables":
+                self.__compare_variables(old[key], new[key])
+            else:
+                # Data selection, e.g. contours, filters or percentData
+                self.full = True
+
+    def __compare_layout(self, old: dict, new: dict) -> None:
+        for key in old.keys() | new.keys():
+            if key in IGNORED_FIELDS or old.get(key) == new.get(key):
+                continue
+
+            if key in LAYOUT_FIELDS:
+                self.layout = True
+            else:
+                # Info annotations read the data, dtype changes every trace
+                self.full = True
+
+    def __compare_grids(self, old_template: dict, new_template: dict) -> None:
+        old, new = old_template["grids"], new_template["grids"]
+        if len(old) != len(new):
+            self.full = True
+            return
+
+        for number, (old_grid, new_grid) in enumerate(zip(old, new), start=1):
+            traces = [
+                index
+                for index, variable in enumerate(new_template["variables"])
+                if variable["subplot"] == number
+            ]
+            for key in old_grid.keys() | new_grid.keys():
+                if key in IGNORED_FIELDS or old_grid.get(key) == new_grid.get(key):
+                    continue
+
+                if key in GRID_AXIS_FIELDS:
+                    self.layout = True
+                elif key in GRID_HEATMAP_FIELDS:
+                    self.data.update(traces)
+                elif key == "showLegend":
+                    # Classification annotations move with the legend
+                    self.layout = True
+                    self.style.update(traces)
+                elif key == "axes":
+                    self.__compare_axes(old_grid[key], new_grid[key], traces)
+                else:
+                    self.full = True
+
+    def __compare_axes(
+        self, old: list[dict], new: list[dict], traces: list[int]
+    ) -> None:
+        if [axis["name"] for axis in old] != [axis["name"] for axis in new]:
+            self.full = True
+            return
+
+        for old_axis, new_axis in zip(old, new):
+            for key in old_axis.keys() | new_axis.keys():
+                if old_axis.get(key) == new_axis.get(key):
+                    continue
+
+                self.layout = True
+                if key == "scaleFactor":
+                    self.data.update(traces)
+                elif key not in AXIS_FIELDS:
+                    self.full = True
+
+    def __compare_variables(self, old: list[dict], new: list[dict]) -> None:
+        if len(old) != len(new):
+            self.full = True
+            return
+
+        for index, (old_variable, new_variable) in enumerate(zip(old, new)):
+            for key in old_variable.keys() | new_variable.keys():
+                if old_variable.get(key) == new_variable.get(key):
+                    continue
+
+                if key in STYLE_FIELDS:
+                    self.style.add(index)
+                elif key in DATA_FIELDS:
+                    # Axis limits may follow the data
+                    self.layout = True
+                    self.data.add(index)
+                else:
+                    # Placement and dtype
+                    self.full = True
+
+
+def flatten(props: dict, prefix: str = "") -> dict[str, Any]:
+    """Nested plotly properties as ``relayout``/``restyle`` dotted keys
+
+    Lists, arrays and the layout template are kept whole
+    """
+    flat: dict[str, Any] = {}
+    for key, value in props.items():
+        if hasattr(value, "to_plotly_json"):
+            value = value.to_plotly_json()
+        elif isinstance(value, list):
+            value = [
+                item.to_plotly_json() if hasattr(item, "to_plotly_json") else item
+                for item in value
+            ]
+
+        if isinstance(value, dict) and value and key != "template":
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+
+    return flat
+
+
+def layout_props(layout: dict) -> dict:
+    """Layout with first axes and scenes under plotly's names, e.g. ``xaxis``
+
+    Grids number their axes from 1, which plotly accepts when building a
+    layout but not in relayout paths
+    """
+    return {
+        (key[:-1] if key[-1:] == "1" and key[:-1] in FIRST_AXES else key): value
+        for key, value in layout.items()
+    }
+
+
+def changed_props(old: dict, new: dict) -> dict[str, Any]:
+    """Dotted properties of ``new`` differing from ``old``, removed ones None"""
+    old, new = flatten(old), flatten(new)
+
+    changed = {
+        key: value
+        for key, value in new.items()
+        if key not in old or not _same(old[key], value)
+    }
+    changed.update({key: None for key in old.keys() - new.keys()})
+    return changed
+
+
+def _same(old: Any, new: Any) -> bool:
+    import numpy as np
+
+    # Cached objects, e.g. theme templates, compare by identity first
+    if old is new:
+        return True
+
+    # Series and arrays, e.g. manual axis ranges, compare elementwise
+    if hasattr(old, "__array__") or hasattr(new, "__array__"):
+        try:
+            return np.array_equal(np.asarray(old), np.asarray(new))
+        except (TypeError, ValueError):
+            return False
+
+    return bool(old == new)
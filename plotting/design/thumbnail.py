@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import functools
+import struct
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from .colorscales import parse_color
+
+if TYPE_CHECKING:
+    import numpy as np
+    import plotly.graph_objects as go
+
+# plotly's default colorway, for traces without a color or theme colorway
+DEFAULT_COLORWAY = (
+    "#636EFA",
+    "#EF553B",
+    "#00CC96",
+    "#AB63FA",
+    "#FFA15A",
+    "#19D3F3",
+    "#FF6692",
+    "#B6E880",
+    "#FF97FF",
+    "#FECB52",
+)
+
+BACKGROUND = (255, 255, 255, 255)
+AXIS_COLOR = (160, 160, 160, 255)
+
+# Fraction of the data span added around auto ranged axes
+AUTORANGE_PADDING = 0.02
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def rasterize(
+    figure: go.Figure | dict, width: int = 160, height: int = 120
+) -> np.ndarray:
+    """Draws the 2D traces of a figure into a small RGBA image
+
+    Representative rather than exact: no text, ticks or legends, markers are
+    squares and traces are drawn in order without blending. Axis ranges set by
+    ``update_2d_grid`` are used as is, auto ranged axes span their data.
+    3D traces are skipped
+
+    Parameters
+    ----------
+    figure : go.Figure | dict
+        Built figure, or a figure dict such as ``FigureStore`` traces
+    width : int, optional
+        Image width in pixels, by default 160
+    height : int, optional
+        Image height in pixels, by default 120
+
+    Returns
+    -------
+    np.ndarray
+        ``(height, width, 4)`` uint8 image
+    """
+    import numpy as np
+
+    # Validated properties are read directly, plotly's accessors would cost
+    # more than drawing
+    if isinstance(figure, dict):
+        data, layout = figure["data"], figure.get("layout", {})
+    else:
+        data, layout = figure._data, figure._layout
+
+    image = np.empty((height, width, 4), dtype=np.uint8)
+    image[:] = BACKGROUND
+
+    colorway = _colorway(layout)
+    scale = width / (layout.get("width") or 700)
+
+    # Traces grouped by the axes they are drawn on
+    subplots: dict[tuple[str, str], list[tuple[int, dict]]] = {}
+    for index, trace in enumerate(data):
+        if trace.get("type", "scatter") not in ("scatter", "scattergl") or (
+            trace.get("visible") is False
+        ):
+            continue
+
+        key = (trace.get("xaxis") or "x", trace.get("yaxis") or "y")
+        subplots.setdefault(key, []).append((index, trace))
+
+    for (x_id, y_id), traces in subplots.items():
+        x_axis = _axis(layout, "xaxis", x_id)
+        y_axis = _axis(layout, "yaxis", y_id)
+
+        # Plot area of the axes' domains, y pointing down
+        left, right = _pixel_span(x_axis.get("domain"), width)
+        low, high = _pixel_span(y_axis.get("domain"), height)
+        top, bottom = height - 1 - high, height - 1 - low
+
+        points = [_trace_values(trace) for _, trace in traces]
+        x_range = _axis_range(x_axis.get("range"), [x for x, _ in points])
+        y_range = _axis_range(y_axis.get("range"), [y for _, y in points])
+
+        image[bottom, left : right + 1] = AXIS_COLOR
+        image[top : bottom + 1, left] = AXIS_COLOR
+
+        for (index, trace), (x, y) in zip(traces, points):
+            if x_range is None or y_range is None or len(x) == 0:
+                continue
+
+            # Pixel coordinates, NaN where there is no point
+            px = (x - x_range[0]) * ((right - left) / (x_range[1] - x_range[0]))
+            px += left
+            py = (y - y_range[0]) * ((top - bottom) / (y_range[1] - y_range[0]))
+            py += bottom
+
+            line = trace.get("line") or {}
+            marker = trace.get("marker") or {}
+            color = _trace_color(line, marker, colorway[index % len(colorway)])
+            mode = trace.get("mode") or "lines"
+            if "lines" in mode:
+                if line.get("shape") in ("hv", "vh"):
+                    px, py = _step(px, py, line["shape"])
+
+                line_width = max(1, round((line.get("width") or 2) * scale))
+                _draw(
+                    image,
+                    *_line_pixels(px, py, trace.get("connectgaps")),
+                    color,
+                    line_width,
+                    (left, right, top, bottom),
+                )
+
+            if "markers" in mode:
+                size = max(1, round((marker.get("size") or 6) * scale))
+                colors = _marker_colors(marker, len(x))
+                finite = np.isfinite(px) & np.isfinite(py)
+                _draw(
+                    image,
+                    np.rint(px[finite]).astype(np.intp),
+                    np.rint(py[finite]).astype(np.intp),
+                    color if colors is None else colors[finite],
+                    size,
+                    (left, right, top, bottom),
+                )
+
+    return image
+
+
+def encode_png(image: np.ndarray, level: int = 6) -> bytes:
+    """PNG file of an RGBA image, written with zlib only
+
+    Parameters
+    ----------
+    image : np.ndarray
+        ``(height, width, 4)`` uint8 image
+    level : int, optional
+        zlib compression level, by default 6
+
+    Returns
+    -------
+    bytes
+        PNG file contents
+    """
+    import numpy as np
+
+    height, width, _ = image.shape
+
+    # Every scanline starts with filter type 0 (none)
+    scanlines = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = image.reshape(height, width * 4)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + kind
+            + data
+            + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    return b"".join(
+        [
+            PNG_SIGNATURE,
+            chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+            chunk(b"IDAT", zlib.compress(scanlines.tobytes(), level)),
+            chunk(b"IEND", b""),
+        ]
+    )
+
+
+def write_thumbnail(
+    figure: go.Figure, path: str | Path, width: int = 160, height: int = 120
+) -> Path:
+    """Writes a PNG thumbnail of a figure, see ``rasterize``"""
+    path = Path(path)
+    path.write_bytes(encode_png(rasterize(figure, width, height)))
+    return path
+
+
+def _colorway(layout: dict) -> tuple[tuple[int, int, int], ...]:
+    theme = (layout.get("template") or {}).get("layout") or {}
+    colorway = layout.get("colorway") or theme.get("colorway") or DEFAULT_COLORWAY
+
+    # Colors that cannot be parsed keep the default color at their position
+    return tuple(
+        _parse_color(color)
+        or parse_color(DEFAULT_COLORWAY[index % len(DEFAULT_COLORWAY)])
+        for index, color in enumerate(colorway)
+    )
+
+
+def _parse_color(color) -> Optional[tuple[int, int, int]]:
+    try:
+        return parse_color(color)
+    except (TypeError, ValueError):
+        return None
+
+
+def _axis(layout: dict, name: str, axis_id: str) -> dict:
+    """Layout axis of a trace axis id, e.g. ``x2`` -> ``xaxis2``"""
+    number = axis_id[1:]
+    axis = layout.get(f"{name}{number}")
+    if axis is None and number in ("", "1"):
+        axis = layout.get(f"{name}1" if number == "" else name)
+
+    return axis or {}
+
+
+def _trace_color(
+    line: dict, marker: dict, default: tuple[int, int, int]
+) -> tuple[int, int, int]:
+    for color in (line.get("color"), marker.get("color")):
+        if isinstance(color, str):
+            try:
+                return parse_color(color)
+            except ValueError:
+                # Colors plotly would reject
+                pass
+
+    return default
+
+
+def _marker_colors(marker: dict, count: int) -> Optional[np.ndarray]:
+    """Per-point RGB colors of a marker colored by data, e.g. heatmaps"""
+    import numpy as np
+
+    color = marker.get("color")
+    scale = marker.get("colorscale")
+    if color is None or isinstance(color, str) or not scale:
+        return None
+
+    values = np.asarray(color, dtype=np.float64)
+    if len(values) != count:
+        return None
+
+    cmin = np.nanmin(values) if marker.get("cmin") is None else marker["cmin"]
+    cmax = np.nanmax(values) if marker.get("cmax") is None else marker["cmax"]
+    position = (values - cmin) / ((cmax - cmin) or 1.0)
+    np.nan_to_num(position, copy=False, nan=0.0)
+
+    stops, rgb = _colorscale_rgb(tuple((float(stop), color) for stop, color in scale))
+    channels = [np.interp(position, stops, rgb[:, channel]) for channel in range(3)]
+
+    return np.rint(np.stack(channels, axis=1)).astype(np.uint8)
+
+
+@functools.lru_cache(maxsize=64)
+def _colorscale_rgb(
+    scale: tuple[tuple[float, str], ...],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Stops and float RGB colors of a plotly colorscale, parsed once"""
+    import numpy as np
+
+    stops = np.array([stop for stop, _ in scale])
+    colors = [_parse_color(color) for _, color in scale]
+
+    # Colors that cannot be parsed take the nearest parsed stop's color
+    parsed = [index for index, color in enumerate(colors) if color is not None]
+    if not parsed:
+        colors = [parse_color(DEFAULT_COLORWAY[0])] * len(colors)
+    for index, color in enumerate(colors):
+        if color is None:
+            colors[index] = colors[min(parsed, key=lambda other: abs(other - index))]
+
+    return stops, np.array(colors, dtype=np.float64)
+
+
+def _trace_values(trace: dict) -> tuple[np.ndarray, np.ndarray]:
+    import numpy as np
+
+    try:
+        x = np.asarray(trace.get("x", []), dtype=np.float64)
+        y = np.asarray(trace.get("y", []), dtype=np.float64)
+    except (TypeError, ValueError):
+        # Dates and categories are not drawn
+        return np.empty(0), np.empty(0)
+
+    count = min(len(x), len(y))
+    return x[:count], y[:count]
+
+
+def _axis_range(axis_range, values: list[np.ndarray]) -> Optional[tuple[float, float]]:
+    import numpy as np
+
+    if axis_range is not None:
+        low, high = (float(limit) for limit in axis_range)
+        return (low, high) if high != low else None
+
+    finite = [v[np.isfinite(v)] for v in values]
+    finite = [v for v in finite if len(v)]
+    if not finite:
+        return None
+
+    low = min(v.min() for v in finite)
+    high = max(v.max() for v in finite)
+    padding = (high - low) * AUTORANGE_PADDING or 1.0
+    return low - padding, high + padding
+
+
+def _pixel_span(domain, size: int) -> tuple[int, int]:
+    start, stop = domain or (0, 1)
+    return round(start * (size - 1)), round(stop * (size - 1))
+
+
+def _step(x: np.ndarray, y: np.ndarray, shape: str) -> tuple[np.ndarray, np.ndarray]:
+    """Inserts the corner point of every step of an ``hv``/``vh`` line"""
+    import numpy as np
+
+    stepped_x = np.repeat(x, 2)[1:]
+    stepped_y = np.repeat(y, 2)[:-1]
+    if shape == "vh":
+        stepped_x = np.repeat(x, 2)[:-1]
+        stepped_y = np.repeat(y, 2)[1:]
+
+    return stepped_x, stepped_y
+
+
+def _line_pixels(
+    x: np.ndarray, y: np.ndarray, connect_gaps: Optional[bool]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Pixels of the segments between consecutive points
+
+    Points falling on the same pixel as their predecessor are dropped first,
+    so dense data costs the number of distinct pixels, not samples
+    """
+    import numpy as np
+
+    finite = np.isfinite(x) & np.isfinite(y)
+    if connect_gaps:
+        x, y, finite = x[finite], y[finite], finite[finite]
+
+    # Pixel grid positions, far out of range points are clipped to stay integer
+    px = np.rint(np.clip(np.where(finite, x, 0), -1e6, 1e6)).astype(np.int64)
+    py = np.rint(np.clip(np.where(finite, y, 0), -1e6, 1e6)).astype(np.int64)
+
+    keep = np.ones(len(px), dtype=bool)
+    keep[1:] = (px[1:] != px[:-1]) | (py[1:] != py[:-1]) | (finite[1:] != finite[:-1])
+    px, py, finite = px[keep], py[keep], finite[keep]
+    if len(px) == 1:
+        return px[finite], py[finite]
+
+    # Segments between two drawn points, sampled once per pixel step
+    start = finite[:-1] & finite[1:]
+    x0, y0 = px[:-1][start], py[:-1][start]
+    dx, dy = px[1:][start] - x0, py[1:][start] - y0
+    steps = np.maximum(np.abs(dx), np.abs(dy))
+
+    # Very long segments leave the thumbnail, cap their sample count
+    steps = np.minimum(steps, 4096)
+    counts = steps + 1
+    segment = np.repeat(np.arange(len(steps)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    fraction = offset / np.maximum(steps, 1)[segment]
+
+    line_x = np.rint(x0[segment] + dx[segment] * fraction).astype(np.intp)
+    line_y = np.rint(y0[segment] + dy[segment] * fraction).astype(np.intp)
+
+    # Isolated points between gaps
+    isolated = finite.copy()
+    isolated[1:] &= ~finite[:-1]
+    isolated[:-1] &= ~finite[1:]
+
+    return (
+        np.concatenate([line_x, px[isolated]]),
+        np.concatenate([line_y, py[isolated]]),
+    )
+
+
+def _draw(
+    image: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    color: tuple[int, int, int] | np.ndarray,
+    size: int,
+    bounds: tuple[int, int, int, int],
+) -> None:
+    """Paints ``size`` x ``size`` squares centered on pixels within bounds"""
+    import numpy as np
+
+    left, right, top, bottom = bounds
+    per_point = isinstance(color, np.ndarray)
+    colors = color if per_point else np.array(color, dtype=np.uint8)
+
+    low = -((size - 1) // 2)
+    for offset_x in range(low, low + size):
+        for offset_y in range(low, low + size):
+            px = x + offset_x
+            py = y + offset_y
+            inside = (px >= left) & (px <= right) & (py >= top) & (py <= bottom)
+            if per_point:
+                image[py[inside], px[inside], :3] = colors[inside]
+            else:
+                image[py[inside], px[inside], :3] = colors
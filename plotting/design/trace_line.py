@@ -1,14 +1,22 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
-from typing import Callable, Generic, TypeVar
+from typing import TYPE_CHECKING, Callable, Generic, TypeVar
 
-import pandas as pd
 import plotly.graph_objects as go
 import plotly.graph_objs.scatter as s
 import plotly.graph_objs.scatter3d as s3
 from plotly.basedatatypes import BaseTraceType
 
+from .expressions import resolve_column, variable_columns
 from .unit_conversion import unit_transformation
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .axis_data import AxisDataCache
+    from .row_lookup import IndexMap
+
 Marker = TypeVar("Marker", bound=s.Marker | s3.Marker)
 Line = TypeVar("Line", bound=s.Line | s3.Line)
 
@@ -18,6 +26,15 @@ class TraceBase(ABC, Generic[Marker, Line]):
     def __init__(self, variable_template: dict) -> None:
         self.variable_template = variable_template
 
+        # Axis data cache key of each trace axis read through the cache
+        self.sources: dict[str, str] = {}
+
+        # Time base the trace's columns are aligned onto, for multi-rate data
+        self.rate_group: str | None = None
+
+        # Output data rows of the displayed points, None when all are shown
+        self.index_map: IndexMap | None = None
+
     def add_trace(
         self,
         fig: go.Figure,
@@ -26,30 +43,87 @@ class TraceBase(ABC, Generic[Marker, Line]):
         row: int | None = None,
         col: int | None = None,
         legendgroup: str | None = None,
+        anchor: dict[str, str] | None = None,
+        axis_data: AxisDataCache | None = None,
     ) -> list[pd.Series]:
+        scatter, trace_data = self.prepare_trace(
+            data, grids, legendgroup, anchor, axis_data
+        )
+        fig.add_trace(scatter, row=row, col=col)
+
+        return trace_data
 
+    def prepare_trace(
+        self,
+        data: pd.DataFrame,
+        grids: list[dict],
+        legendgroup: str | None = None,
+        anchor: dict[str, str] | None = None,
+        axis_data: AxisDataCache | None = None,
+    ) -> tuple[BaseTraceType, list[pd.Series]]:
+        """Builds the trace and its axis data without adding it to a figure
+
+        Only reads shared state, so traces can be prepared concurrently
+
+        Returns
+        -------
+        tuple[BaseTraceType, list[pd.Series]]
+            Plotly trace and the axis data used for axis limits
+        """
         # Grid corresponding to this trace
         grid = grids[self.variable_template["subplot"] - 1]
 
         # Create data
         data_dict: dict = {}
         for axis in grid["axes"]:
-            data_dict.update(self.get_axis_data(data, axis))
+            data_dict.update(self.get_axis_data(data, axis, axis_data))
 
-        # Add trace
-        fig.add_trace(
-            self.build_scatter(data_dict, grid, legendgroup),
-            row=row,
-            col=col,
+        scatter = self.build_scatter(data_dict, grid, legendgroup)
+        if anchor:
+            scatter.update(anchor)
+
+        return scatter, list(data_dict.values())
+
+    def columns(self, grids: list[dict]) -> list[str]:
+        """Output data columns read by this trace"""
+        grid = grids[self.variable_template["subplot"] - 1]
+        variables = [
+            self.variable_template[f"{axis['name']}Variable"] for axis in grid["axes"]
+        ]
+        if self.variable_template.get("colorVariable"):
+            variables.append(self.variable_template["colorVariable"])
+
+        # Derived variables read the columns of their expression
+        return list(
+            dict.fromkeys(
+                column
+                for variable in variables
+                for column in variable_columns(variable)
+            )
         )
 
-        return list(data_dict.values())
+    def get_axis_data(
+        self,
+        data: pd.DataFrame,
+        axis: dict,
+        axis_data: AxisDataCache | None = None,
+    ) -> dict[str, pd.Series]:
+        column = self.variable_template[f"{axis['name']}Variable"]
+
+        # Shared columns are transformed once per figure
+        if axis_data is not None:
+            self.sources[axis["name"]] = axis_data.key(
+                column, axis["scaleFactor"], self.rate_group
+            )
+            return {
+                axis["name"]: axis_data.get(
+                    column, axis["scaleFactor"], self.rate_group
+                )
+            }
 
-    def get_axis_data(self, data: pd.DataFrame, axis: dict) -> dict[str, pd.Series]:
         return {
             axis["name"]: unit_transformation(
-                data[self.variable_template[f"{axis['name']}Variable"]],
-                axis["scaleFactor"],
+                resolve_column(data, column), axis["scaleFactor"]
             )
         }
 
@@ -72,6 +146,36 @@ class TraceBase(ABC, Generic[Marker, Line]):
             showlegend=grid["showLegend"],
         )
 
+    def style(self, grid: dict, legendgroup: str | None = None) -> dict:
+        """Trace properties set from template style fields, not from data
+
+        Parameters
+        ----------
+        grid : dict
+            Grid template of the trace
+        legendgroup : str | None, optional
+            Legend group of the trace, by default None
+
+        Returns
+        -------
+        dict
+            Plotly trace properties, compared between templates to restyle
+            only what an edit changed
+        """
+        return {
+            "name": self.variable_template["traceName"],
+            "connectgaps": self.variable_template["connectgaps"],
+            "mode": self.variable_template["mode"],
+            "marker": self._style_marker(),
+            "line": self.get_line().to_plotly_json(),
+            "legendgroup": legendgroup,
+            "legendgrouptitle": {"text": self.variable_template["legendGroupTitle"]},
+            "showlegend": grid["showLegend"],
+        }
+
+    def _style_marker(self) -> dict:
+        return self.get_marker().to_plotly_json()
+
     @abstractmethod
     def base_trace_type(self) -> Callable[..., BaseTraceType]:
         pass
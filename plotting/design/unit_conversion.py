@@ -1,5 +1,9 @@
-import numpy as np
-import pandas as pd
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def unit_transformation(data: pd.Series, unit_conversion: str) -> pd.Series:
@@ -23,6 +27,9 @@ def unit_transformation(data: pd.Series, unit_conversion: str) -> pd.Series:
     ValueError
         Invalid scale factor
     """
+    import numpy as np
+    import pandas as pd
+
     if unit_conversion is None or unit_conversion == "None":
         return data
     elif unit_conversion == "m to km":
@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+PLOTTING = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PLOTTING))
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from design.expressions import Expression, resolve_column  # noqa: E402
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame({"a": [1.0, 4.0, 9.0], "b": [2.0, 3.0, 4.0]})
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "a.real",
+        "np.sqrt(a)",
+        "open('file')",
+        "__import__('os')",
+        "(lambda: a)()",
+        "a > b",
+        "a if b else 1",
+        "hypot(a, b=b)",
+        "[a, b]",
+        "'text'",
+    ],
+)
+def test_rejected_constructs(source):
+    with pytest.raises(ValueError, match="Invalid expression"):
+        Expression(source)
+
+
+@pytest.mark.parametrize("source", ["sqrt(a, b)", "hypot(a)", "abs(a, b, a)"])
+def test_wrong_arity(source, data):
+    original = data.copy()
+
+    with pytest.raises(ValueError, match="argument"):
+        resolve_column(data, f"={source}")
+
+    pd.testing.assert_frame_equal(data, original)
+
+
+def test_evaluation_leaves_inputs_unchanged(data):
+    original = data.copy()
+
+    result = resolve_column(data, "=sqrt(a) + -b * 2")
+
+    np.testing.assert_allclose(result, [-3.0, -4.0, -5.0])
+    pd.testing.assert_frame_equal(data, original)
+
+
+def test_derived_columns_follow_replaced_columns(data):
+    first = resolve_column(data, "=a + b")
+    assert resolve_column(data, "=a + b").to_numpy() is first.to_numpy()
+
+    data["a"] = [10.0, 20.0, 30.0]
+
+    np.testing.assert_allclose(resolve_column(data, "=a + b"), [12.0, 23.0, 34.0])
+
+
+def test_chunked_evaluation():
+    columns = {"a": np.arange(200_000, dtype=np.float32)}
+
+    result = Expression("a * 2 + 1").evaluate(columns)
+
+    assert result.dtype == np.float64
+    np.testing.assert_allclose(result, columns["a"] * 2.0 + 1.0)
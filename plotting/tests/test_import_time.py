@@ -0,0 +1,51 @@
+import subprocess
+import sys
+from pathlib import Path
+
+PLOTTING = Path(__file__).resolve().parents[1]
+
+# Cumulative import time of design.plots, so a one-shot render starts well
+# under a second
+IMPORT_BUDGET_S = 0.5
+
+# Loaded on first use, not by importing the package
+LAZY_MODULES = ["pandas", "plotly.express"]
+
+
+def import_times(module: str) -> tuple[dict[str, int], list[str]]:
+    """Cumulative import time of each module, in microseconds, and the lazy
+    modules loaded by importing a module in a fresh interpreter"""
+    check = (
+        f"import sys, {module}; "
+        f"print(*[name for name in {LAZY_MODULES} if name in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=PLOTTING,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # "import time: self [us] | cumulative | imported package"
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+
+    return times, result.stdout.split()
+
+
+def test_plots_import_is_lazy():
+    _, loaded = import_times("design.plots")
+
+    assert loaded == []
+
+
+def test_plots_import_time():
+    times, _ = import_times("design.plots")
+
+    assert times["design.plots"] < IMPORT_BUDGET_S * 1e6
@@ -0,0 +1,57 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+resource = pytest.importorskip("resource")
+
+PLOTTING = Path(__file__).resolve().parents[1]
+
+ROWS = 2_000_000
+
+# Peak growth of a lean build, relative to a full build and to the output data
+LEAN_SHARE = 0.6
+LEAN_DATA_RATIO = 2.0
+
+# Builds a plot and reports the output data size and peak RSS growth in bytes.
+# ru_maxrss is in KiB on Linux and bytes on macOS
+BUILD = """
+import json, resource, sys
+import numpy as np
+import pandas as pd
+from design.plots import Plot2D
+
+template = json.load(open("templates/template_2d.json"))
+columns = {name for variable in template["variables"]
+           for name in (variable["xVariable"], variable["yVariable"])}
+random = np.random.default_rng(0)
+data = pd.DataFrame({name: random.random(%(rows)d) for name in sorted(columns)})
+data["time_s"] = np.arange(%(rows)d, dtype=np.float64)
+
+unit = 1 if sys.platform == "darwin" else 1024
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+plot = Plot2D(template, data, lean=%(lean)s)
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"data": int(data.memory_usage().sum()),
+                  "growth": (after - before) * unit}))
+"""
+
+
+def peak_growth(lean: bool) -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", BUILD % {"rows": ROWS, "lean": lean}],
+        cwd=PLOTTING,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test_lean_build_peak_rss():
+    lean, full = peak_growth(True), peak_growth(False)
+
+    assert lean["growth"] < LEAN_SHARE * full["growth"]
+    assert lean["growth"] < LEAN_DATA_RATIO * lean["data"]
@@ -15,6 +15,6 @@ signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
 if __name__ == "__main__":
-    print("Start")
+    print("Start", flush=True)
     time.sleep(60)
     print("Stop")
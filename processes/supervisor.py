@@ -0,0 +1,302 @@
+import asyncio
+import itertools
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Callable, Literal, Optional, TypedDict
+
+JobStatus = Literal["finished", "failed", "timeout", "cancelled"]
+
+# Called with the job name, stream name and a decoded output line
+OutputHandler = Callable[[str, str, str], None]
+
+# Bytes read from a child's output at a time
+STREAM_CHUNK = 1 << 16
+
+# Longer lines, e.g. progress bars without newlines, are passed on in pieces
+MAX_LINE = 1 << 20
+
+
+class JobResult(TypedDict):
+    """Outcome of a supervised job"""
+
+    name: str
+    status: JobStatus
+    returncode: Optional[int]
+    duration: float
+
+
+class Job:
+    def __init__(
+        self,
+        cmds: list[str],
+        name: Optional[str] = None,
+        priority: int = 0,
+        timeout: Optional[float] = 60.0,
+    ) -> None:
+        """Child process run by the supervisor
+
+        Parameters
+        ----------
+        cmds : list[str]
+            Program and arguments, run without a shell
+        name : Optional[str], optional
+            Label for output and results, by default the command line
+        priority : int, optional
+            Lower values start first, by default 0
+        timeout : Optional[float], optional
+            Seconds before the job is stopped, by default 60.0
+        """
+        self.cmds = cmds
+        self.name = name if name is not None else " ".join(cmds)
+        self.priority = priority
+        self.timeout = timeout
+
+
+def print_output(name: str, stream: str, line: str) -> None:
+    print(f"[{name}] {line}", file=sys.stderr if stream == "stderr" else sys.stdout)
+
+
+class Supervisor:
+    """
+    Runs child processes concurrently with asyncio
+
+    Jobs start in priority order with at most ``max_jobs`` running. Each child
+    runs in its own process group, so stopping a job also stops anything it
+    launched, and output is streamed line by line instead of buffered
+    """
+
+    def __init__(
+        self,
+        max_jobs: Optional[int] = None,
+        grace_period: float = 5.0,
+        on_output: OutputHandler = print_output,
+    ) -> None:
+        """Creates the supervisor
+
+        Parameters
+        ----------
+        max_jobs : Optional[int], optional
+            Concurrency limit, by default the CPU count
+        grace_period : float, optional
+            Seconds between terminating and killing a process group,
+            by default 5.0
+        on_output : OutputHandler, optional
+            Receives every output line, by default printed with the job name
+        """
+        self.max_jobs = max_jobs or os.cpu_count() or 1
+        self.grace_period = grace_period
+        self.on_output = on_output
+
+        self.__queue: list[tuple[int, int, Job]] = []
+        self.__order = itertools.count()
+        self.__running: dict[str, asyncio.subprocess.Process] = {}
+        self.__stopped: set[int] = set()
+        self.__stopping = False
+
+    def submit(self, job: Job) -> None:
+        self.__queue.append((job.priority, next(self.__order), job))
+
+    def run(self) -> list[JobResult]:
+        """Runs every submitted job, stopping them all on SIGINT or SIGTERM
+
+        Returns
+        -------
+        list[JobResult]
+            Results in submission order
+        """
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> list[JobResult]:
+        queue: asyncio.PriorityQueue[tuple[int, int, Job]] = asyncio.PriorityQueue()
+        for item in self.__queue:
+            queue.put_nowait(item)
+        self.__queue.clear()
+        self.__stopped.clear()
+        self.__stopping = False
+
+        results: dict[int, JobResult] = {}
+        restore = self.__install_signal_handlers()
+        workers: list[asyncio.Task] = []
+        try:
+            workers = [
+                asyncio.create_task(self.__worker(queue, results))
+                for _ in range(min(self.max_jobs, queue.qsize()))
+            ]
+            await asyncio.gather(*workers)
+        except BaseException:
+            # No child may outlive the supervisor, e.g. after a cancellation
+            await self.shutdown()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        finally:
+            restore()
+
+        return [results[order] for order in sorted(results)]
+
+    async def shutdown(self, signum: int = signal.SIGTERM) -> None:
+        """Cancels queued jobs and stops every running process group"""
+        self.__stopping = True
+        await asyncio.gather(
+            *(self.__stop(process, signum) for process in self.__running.values())
+        )
+
+    async def __worker(
+        self,
+        queue: asyncio.PriorityQueue[tuple[int, int, Job]],
+        results: dict[int, JobResult],
+    ) -> None:
+        while not queue.empty():
+            _, order, job = queue.get_nowait()
+            if self.__stopping:
+                results[order] = self.__result(job, "cancelled", None, time.time())
+                continue
+
+            results[order] = await self.__run_job(job, order)
+
+    async def __run_job(self, job: Job, order: int) -> JobResult:
+        start = time.time()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *job.cmds,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                **self.__group_options(),
+            )
+        except OSError as error:
+            # e.g. a missing executable, the other jobs keep running
+            self.on_output(job.name, "stderr", f"Failed to start: {error}")
+            return self.__result(job, "failed", None, start)
+
+        # Names are not required to be unique
+        key = f"{order}:{job.name}"
+        self.__running[key] = process
+        try:
+            # Shutdown may have started while the process was launching
+            if self.__stopping:
+                await self.__stop(process, signal.SIGTERM)
+
+            streams = asyncio.gather(
+                self.__stream(job, "stdout", process.stdout),
+                self.__stream(job, "stderr", process.stderr),
+            )
+            try:
+                await asyncio.wait_for(process.wait(), job.timeout)
+            except asyncio.TimeoutError:
+                await self.__stop(process, signal.SIGTERM)
+                await streams
+                return self.__result(job, "timeout", process.returncode, start)
+
+            await streams
+        finally:
+            del self.__running[key]
+
+        # Children may exit cleanly when asked to stop
+        if process.pid in self.__stopped:
+            status: JobStatus = "cancelled"
+        else:
+            status = "finished" if process.returncode == 0 else "failed"
+
+        return self.__result(job, status, process.returncode, start)
+
+    async def __stream(
+        self, job: Job, name: str, reader: Optional[asyncio.StreamReader]
+    ) -> None:
+        if reader is None:
+            return
+
+        # Lines are split here since StreamReader fails on lines over 64 KiB
+        pending = b""
+        while True:
+            chunk = await reader.read(STREAM_CHUNK)
+            if not chunk:
+                break
+
+            *lines, pending = (pending + chunk).split(b"\n")
+            while len(pending) > MAX_LINE:
+                lines.append(pending[:MAX_LINE])
+                pending = pending[MAX_LINE:]
+            for line in lines:
+                self.__emit(job, name, line)
+
+        if pending:
+            self.__emit(job, name, pending)
+
+    def __emit(self, job: Job, name: str, line: bytes) -> None:
+        self.on_output(job.name, name, line.decode(errors="replace").rstrip())
+
+    async def __stop(self, process: asyncio.subprocess.Process, signum: int) -> None:
+        """Signals the process group, then kills it after the grace period"""
+        if process.returncode is not None:
+            return
+
+        self.__stopped.add(process.pid)
+        self.__signal_group(process, signum)
+        try:
+            await asyncio.wait_for(process.wait(), self.grace_period)
+        except asyncio.TimeoutError:
+            self.__signal_group(process, signal.SIGKILL if os.name != "nt" else None)
+            await process.wait()
+
+    def __install_signal_handlers(self) -> Callable[[], None]:
+        """Routes SIGINT and SIGTERM to ``shutdown``, returning a restore function"""
+        loop = asyncio.get_running_loop()
+
+        tasks: set[asyncio.Task] = set()
+
+        def start_shutdown() -> None:
+            # The loop only keeps weak references to tasks
+            task = loop.create_task(self.shutdown(signal.SIGTERM))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        def handler(signum: int, frame=None) -> None:
+            loop.call_soon_threadsafe(start_shutdown)
+
+        previous = {}
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            # Event loop signal handlers are not available on Windows
+            previous[signum] = signal.signal(signum, handler)
+
+        def restore() -> None:
+            for signum, previous_handler in previous.items():
+                signal.signal(signum, previous_handler)
+
+        return restore
+
+    @staticmethod
+    def __group_options() -> dict:
+        if os.name == "nt":
+            return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        return {"start_new_session": True}
+
+    @staticmethod
+    def __signal_group(
+        process: asyncio.subprocess.Process, signum: Optional[int]
+    ) -> None:
+        try:
+            if os.name == "nt":
+                # Console control events reach the whole group, kill does not
+                if signum is None:
+                    process.kill()
+                else:
+                    process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                os.killpg(process.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    @staticmethod
+    def __result(
+        job: Job, status: JobStatus, returncode: Optional[int], start: float
+    ) -> JobResult:
+        return {
+            "name": job.name,
+            "status": status,
+            "returncode": returncode,
+            "duration": time.time() - start,
+        }
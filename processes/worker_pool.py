@@ -0,0 +1,403 @@
+import importlib
+import multiprocessing
+import os
+import pathlib
+import queue
+import signal
+import sys
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Connection
+from typing import Any, Optional, Sequence
+
+PLOTTING_DIRECTORY = pathlib.Path(__file__).parents[1].joinpath("plotting")
+
+# Modules imported, or "module:function" callables run, before any job
+DEFAULT_PRELOAD = (
+    "numpy",
+    "pandas",
+    "plotly.graph_objects",
+    "plotly.io",
+    "design.plots",
+    "design.colorscales:additional_colorscales",
+    "worker_pool:warm_plotting",
+)
+
+# Templates read once per pool, see ``template``
+_templates: dict[str, dict] = {}
+
+
+def template(name: str) -> dict:
+    """Preloaded template by file stem, for use inside jobs
+
+    Jobs must copy the template before modifying it, since it is reused
+    """
+    return _templates[name]
+
+
+def warm_plotting() -> None:
+    """Builds the lazily created plotly state used by every figure
+
+    Theme templates and trace validators otherwise cost seconds on the first
+    plot of each process
+    """
+    import plotly.graph_objects as go
+    from design.plot_base import _theme_template
+
+    for theme in {
+        template["layout"]["theme"]
+        for template in _templates.values()
+        if "theme" in template.get("layout", {})
+    }:
+        _theme_template(theme)
+
+    go.Figure([go.Scatter(x=[0], y=[0]), go.Scatter3d(x=[0], y=[0], z=[0])])
+
+
+def build_plot(
+    plot_type: str, template_name: str, data_file: str, output_file: str
+) -> str:
+    """Job writing a plot's shared JSON, e.g. ``"worker_pool:build_plot"``
+
+    Parameters
+    ----------
+    plot_type : str
+        Plot class in ``design.plots``, e.g. "Plot2D"
+    template_name : str
+        Preloaded template file stem
+    data_file : str
+        Run output CSV
+    output_file : str
+        Written figure JSON
+
+    Returns
+    -------
+    str
+        Written figure JSON path
+    """
+    import copy
+
+    import pandas as pd
+    from design import plots
+
+    plot = getattr(plots, plot_type)(
+        copy.deepcopy(template(template_name)), pd.read_csv(data_file)
+    )
+    pathlib.Path(output_file).write_text(plot.to_shared_json())
+
+    return output_file
+
+
+def _preload(
+    preload: Sequence[str], template_directory: Optional[str], paths: Sequence[str]
+) -> None:
+    for path in paths:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    if template_directory is not None:
+        import json
+
+        for file in pathlib.Path(template_directory).glob("*.json"):
+            _templates[file.stem] = json.loads(file.read_text())
+
+    for name in preload:
+        module, _, function = name.partition(":")
+        loaded = importlib.import_module(module)
+        if function:
+            getattr(loaded, function)()
+
+
+def _resolve(function: str) -> Any:
+    module, _, name = function.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _rss_mb() -> float:
+    import psutil
+
+    return psutil.Process().memory_info().rss / 2**20
+
+
+def _worker_main(
+    connection: Connection, max_jobs: Optional[int], max_rss_mb: Optional[float]
+) -> None:
+    jobs = 0
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+
+        function, args, kwargs = message
+        try:
+            response: tuple = ("ok", _resolve(function)(*args, **kwargs))
+        except Exception as error:
+            response = ("error", error)
+
+        # Recycle to return fragmented memory to the system
+        jobs += 1
+        retire = max_jobs is not None and jobs >= max_jobs
+        if max_rss_mb is not None and not retire:
+            try:
+                retire = _rss_mb() > max_rss_mb
+            except Exception:
+                # The result is still sent when memory cannot be read
+                pass
+        try:
+            connection.send((*response, retire))
+        except Exception as error:
+            # Unpicklable results or exceptions
+            connection.send(("error", RuntimeError(repr(error)), retire))
+
+        if retire:
+            break
+
+
+def _spawned_worker_main(
+    connection: Connection,
+    preload: Sequence[str],
+    template_directory: Optional[str],
+    paths: Sequence[str],
+    max_jobs: Optional[int],
+    max_rss_mb: Optional[float],
+) -> None:
+    _preload(preload, template_directory, paths)
+    _worker_main(connection, max_jobs, max_rss_mb)
+
+
+def _fork_server_main(
+    control: Connection,
+    preload: Sequence[str],
+    template_directory: Optional[str],
+    paths: Sequence[str],
+    max_jobs: Optional[int],
+    max_rss_mb: Optional[float],
+) -> None:
+    """Preloads once, then forks a worker for every request on ``control``
+
+    Each worker's end of a new pipe is sent back as a file descriptor
+    """
+    from multiprocessing.reduction import send_handle
+
+    _preload(preload, template_directory, paths)
+
+    # Workers are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    parent_pid = os.getppid()
+    while control.recv() is not None:
+        connection, worker_connection = multiprocessing.Pipe()
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            control.close()
+            connection.close()
+            try:
+                _worker_main(worker_connection, max_jobs, max_rss_mb)
+            finally:
+                os._exit(0)
+
+        worker_connection.close()
+        send_handle(control, connection.fileno(), parent_pid)
+        connection.close()
+
+
+class WorkerPool:
+    """
+    Warm worker processes for plot jobs
+
+    Modules, templates and plotly state are loaded once in a fork server that
+    workers are forked from. Without ``os.fork`` (Windows), long lived workers
+    each preload once instead. Jobs are sent to workers over pipes, so per-job
+    overhead excludes interpreter start up and imports. Workers are replaced
+    after a job count or memory limit
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        preload: Sequence[str] = DEFAULT_PRELOAD,
+        template_directory: Optional[str | pathlib.Path] = PLOTTING_DIRECTORY.joinpath(
+            "templates"
+        ),
+        paths: Sequence[str | pathlib.Path] = (
+            PLOTTING_DIRECTORY,
+            pathlib.Path(__file__).parent,
+        ),
+        max_jobs_per_worker: Optional[int] = 100,
+        max_rss_mb: Optional[float] = None,
+    ) -> None:
+        """Starts the workers
+
+        Parameters
+        ----------
+        workers : Optional[int], optional
+            Number of workers, by default the CPU count
+        preload : Sequence[str], optional
+            Modules to import, or "module:function" callables to run, before
+            any job, by default DEFAULT_PRELOAD
+        template_directory : Optional[str | pathlib.Path], optional
+            Templates available through ``template``, by default the plotting
+            templates
+        paths : Sequence[str | pathlib.Path], optional
+            Added to ``sys.path`` of the workers so preloads and jobs resolve,
+            by default the plotting and processes directories
+        max_jobs_per_worker : Optional[int], optional
+            Jobs before a worker is replaced, by default 100
+        max_rss_mb : Optional[float], optional
+            Resident memory in MiB after which a worker is replaced,
+            by default None (requires psutil)
+        """
+        if max_rss_mb is not None:
+            # Missing here rather than in every worker after its first job
+            import psutil  # noqa: F401
+
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_mb = max_rss_mb
+
+        self.__context = multiprocessing.get_context("spawn")
+        self.__setup = (
+            tuple(preload),
+            None if template_directory is None else str(template_directory),
+            tuple(str(path) for path in paths),
+            max_jobs_per_worker,
+            max_rss_mb,
+        )
+
+        self.__fork_lock = threading.Lock()
+        self.__fork_server: Optional[multiprocessing.process.BaseProcess] = None
+        if hasattr(os, "fork"):
+            self.__control, server_control = self.__context.Pipe()
+            self.__fork_server = self.__context.Process(
+                target=_fork_server_main,
+                args=(server_control, *self.__setup),
+                daemon=True,
+            )
+            self.__fork_server.start()
+            server_control.close()
+
+        self.__jobs: queue.Queue[Optional[tuple[Future, tuple]]] = queue.Queue()
+        self.__threads = [
+            threading.Thread(target=self.__dispatch, daemon=True)
+            for _ in range(workers or os.cpu_count() or 1)
+        ]
+        for thread in self.__threads:
+            thread.start()
+
+    def submit(self, function: str, *args, **kwargs) -> Future:
+        """Runs a job in a worker
+
+        Parameters
+        ----------
+        function : str
+            Importable "module:function" run with the arguments
+
+        Returns
+        -------
+        Future
+            Job result, or the exception it raised
+        """
+        future: Future = Future()
+        self.__jobs.put((future, (function, args, kwargs)))
+        return future
+
+    def close(self) -> None:
+        """Waits for queued jobs, then stops every worker"""
+        for _ in self.__threads:
+            self.__jobs.put(None)
+        for thread in self.__threads:
+            thread.join()
+
+        if self.__fork_server is not None:
+            self.__control.send(None)
+            self.__fork_server.join()
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __start_worker(self) -> tuple[Optional[Any], Connection]:
+        """Starts a worker, returning its process when it is a direct child"""
+        if self.__fork_server is not None:
+            from multiprocessing.reduction import recv_handle
+
+            with self.__fork_lock:
+                self.__control.send(True)
+                return None, Connection(recv_handle(self.__control))
+
+        connection, worker_connection = self.__context.Pipe()
+        process = self.__context.Process(
+            target=_spawned_worker_main,
+            args=(worker_connection, *self.__setup),
+            daemon=True,
+        )
+        process.start()
+        worker_connection.close()
+
+        return process, connection
+
+    def __replace_worker(
+        self, process: Optional[Any], connection: Connection
+    ) -> tuple[Optional[Any], Connection]:
+        connection.close()
+        if process is not None:
+            process.join()
+
+        return self.__start_worker()
+
+    def __dispatch(self) -> None:
+        """Feeds jobs to one worker, replacing it when it retires or dies"""
+        from multiprocessing.reduction import ForkingPickler
+
+        process, connection = self.__start_worker()
+        while True:
+            item = self.__jobs.get()
+            if item is None:
+                break
+
+            future, message = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                payload = ForkingPickler.dumps(message)
+            except Exception as error:
+                # Unpicklable arguments never reach the worker
+                future.set_exception(error)
+                continue
+
+            try:
+                connection.send_bytes(payload)
+            except OSError:
+                # The worker died while idle, the job goes to a new one
+                process, connection = self.__replace_worker(process, connection)
+                try:
+                    connection.send_bytes(payload)
+                except OSError as error:
+                    future.set_exception(RuntimeError(f"Worker exited: {error!r}"))
+                    process, connection = self.__replace_worker(process, connection)
+                    continue
+
+            try:
+                status, result, retire = connection.recv()
+            except (EOFError, OSError) as error:
+                future.set_exception(RuntimeError(f"Worker exited: {error!r}"))
+                retire = True
+            else:
+                if status == "ok":
+                    future.set_result(result)
+                else:
+                    future.set_exception(result)
+
+            if retire:
+                process, connection = self.__replace_worker(process, connection)
+
+        try:
+            connection.send(None)
+        except OSError:
+            # Already exited
+            pass
+        connection.close()
+        if process is not None:
+            process.join()